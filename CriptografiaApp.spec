@@ -6,7 +6,10 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # Cipher backends and handlers are imported lazily through ciphers.registry
+    hiddenimports=["ciphers.aes_cipher", "ciphers.des_cipher",
+                   "ciphers.playfair_cipher", "ciphers.vigenere_cipher",
+                   "ciphers.handlers"],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,207 @@
+"""
+Cryptography Project - Batch Mode
+Non-interactive encryption/decryption of whole directory trees with a worker pool
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from ciphers import instrumentation
+from ciphers.atomic_io import DEFAULT_FSYNC, FSYNC_POLICIES, PARTIAL_SUFFIX
+from ciphers.parallel import default_workers, worker_budget
+from ciphers.registry import available_ciphers, get_cipher
+from main import EXIT_FAILURE, EXIT_OK, EXIT_USAGE, STATS_FORMATS, load_settings, print_stats
+
+
+def walk_inputs(input_dir, output_dir=None):
+    """Yield (input file, path relative to input_dir) for every file under input_dir
+
+    The relative path is where the file is mirrored in the output tree.
+    Temporary outputs and, when given, an output_dir nested inside
+    input_dir are skipped.
+    """
+    output_root = os.path.realpath(output_dir) if output_dir is not None else None
+
+    for dirpath, dirnames, filenames in os.walk(input_dir):
+        # Never descend into the output tree if it lives inside the input tree
+        dirnames[:] = sorted(d for d in dirnames
+                             if os.path.realpath(os.path.join(dirpath, d)) != output_root)
+        for name in sorted(filenames):
+            if name.endswith(PARTIAL_SUFFIX):
+                continue
+            input_file = os.path.join(dirpath, name)
+            yield input_file, os.path.relpath(input_file, input_dir)
+
+
+def collect_jobs(input_dir, output_dir, force=False):
+    """Walk input_dir and pair every file with its mirrored path under output_dir
+
+    Returns (jobs, skipped) where skipped counts files whose output is
+    already at least as new as the input (unless force is set).
+    """
+    jobs = []
+    skipped = 0
+
+    for input_file, relative in walk_inputs(input_dir, output_dir):
+        output_file = os.path.join(output_dir, relative)
+        if not force and os.path.exists(output_file) and \
+                os.path.getmtime(output_file) >= os.path.getmtime(input_file):
+            skipped += 1
+            continue
+        jobs.append((input_file, output_file))
+
+    return jobs, skipped
+
+
+def process_file(cipher, settings, operation, input_file, output_file, fsync=DEFAULT_FSYNC,
+                 workers=None):
+    """Process one file; the output only appears, complete, once it succeeded
+
+    Returns (bytes read, bytes written, seconds). Runs in pool workers, so it
+    only takes picklable arguments; workers is the budget a parallel cipher
+    may use for this one file (see parallel.worker_budget).
+    """
+    args, kwargs = settings
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    start = time.perf_counter()
+    info = get_cipher(cipher)
+    if info.parallel:
+        kwargs = dict(kwargs, workers=workers)
+    read, written = info.load_file_handler()(*args, operation, input_file, output_file,
+                                             fsync=fsync, **kwargs)
+    return read, written, time.perf_counter() - start
+
+
+def format_rate(size, seconds):
+    """Format a byte count over a duration as MB/s"""
+    return f"{size / (1024 * 1024) / max(seconds, 1e-9):.2f} MB/s"
+
+
+def load_batch_settings(cipher, input_dir, output_dir, key_file=None, table_file=None, mode=None):
+    """Check the directories and load the key/table settings of a batch run
+
+    Raises ValueError or OSError for invalid arguments, keys or tables, so
+    nothing is walked or processed unless the whole run can succeed.
+    """
+    if not os.path.isdir(input_dir):
+        raise ValueError(f"Input directory '{input_dir}' not found")
+    # Every output would be its own input: "up to date" without --force, overwritten with it
+    if os.path.realpath(output_dir) == os.path.realpath(input_dir):
+        raise ValueError("Output directory must differ from the input directory")
+    return load_settings(cipher, key_file, table_file, mode)
+
+
+def run_batch(cipher, operation, input_dir, output_dir, key_file=None, table_file=None,
+              mode=None, workers=None, use_processes=False, force=False, fsync=DEFAULT_FSYNC,
+              log=print, settings=None):
+    """Encrypt or decrypt every file under input_dir into a mirrored tree under output_dir
+
+    Files are dispatched to a thread (or process) pool, per-file and
+    aggregate throughput are reported through log, and files whose output
+    is already up to date are skipped so an interrupted run can resume.
+    settings, when given, come from load_batch_settings. Returns a summary dict.
+    """
+    if settings is None:
+        settings = load_batch_settings(cipher, input_dir, output_dir, key_file, table_file, mode)
+    jobs, skipped = collect_jobs(input_dir, output_dir, force)
+    workers = workers or default_workers()
+    total = len(jobs)
+    log(f"{total} file(s) to {operation}, {skipped} up to date, {workers} worker(s)")
+
+    summary = {"processed": 0, "skipped": skipped, "failed": 0,
+               "bytes_read": 0, "bytes_written": 0, "seconds": 0.0}
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    start = time.perf_counter()
+
+    # Each job shares the CPUs with the rest of the pool instead of starting its own full-size one
+    budget = worker_budget(min(workers, total))
+    with pool_class(max_workers=workers) as pool:
+        futures = {pool.submit(process_file, cipher, settings, operation, input_file, output_file,
+                               fsync, budget): input_file for input_file, output_file in jobs}
+
+        for done, future in enumerate(as_completed(futures), 1):
+            name = os.path.relpath(futures[future], input_dir)
+            try:
+                read, written, seconds = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                log(f"[{done}/{total}] FAILED {name}: {e}")
+                continue
+
+            summary["processed"] += 1
+            summary["bytes_read"] += read
+            summary["bytes_written"] += written
+            log(f"[{done}/{total}] {name}: {read} bytes in {seconds:.3f}s ({format_rate(read, seconds)})")
+
+    summary["seconds"] = time.perf_counter() - start
+    log(f"Done: {summary['processed']} processed, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed, {summary['bytes_read']} bytes in "
+        f"{summary['seconds']:.2f}s ({format_rate(summary['bytes_read'], summary['seconds'])})")
+    return summary
+
+
+def build_parser(prog=None):
+    """Build the batch command-line parser"""
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Encrypt or decrypt a directory tree into a mirrored output tree")
+    parser.add_argument("cipher", choices=[info.name for info in available_ciphers()])
+    parser.add_argument("operation", choices=["encrypt", "decrypt"])
+    parser.add_argument("input_dir", help="directory to process recursively")
+    parser.add_argument("output_dir", help="directory receiving the mirrored tree")
+    parser.add_argument("--key", dest="key_file", help="key file (AES, DES, Vigenère)")
+    parser.add_argument("--table", dest="table_file", help="table file (Playfair, Vigenère)")
+    modes = sorted({mode for info in available_ciphers() for mode in info.modes})
+    parser.add_argument("--mode", choices=modes, default=None,
+                        help="block mode for ciphers that offer several (default: CBC)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="pool size (default: one per CPU core)")
+    parser.add_argument("--processes", action="store_true",
+                        help="use a process pool instead of a thread pool")
+    parser.add_argument("--force", action="store_true",
+                        help="reprocess files whose output is already up to date")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default=DEFAULT_FSYNC,
+                        help="when each output file is synced to disk: never, once complete, or "
+                             f"also periodically while writing (default: {DEFAULT_FSYNC})")
+    parser.add_argument("--stats", choices=STATS_FORMATS,
+                        help="print per-stage timings summed over all files to stderr "
+                             "(thread pool only)")
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.stats and args.processes:
+        # Stages recorded in worker processes never reach this process
+        parser.error("--stats cannot be combined with --processes")
+    
+    try:
+        settings = load_batch_settings(args.cipher, args.input_dir, args.output_dir,
+                                       args.key_file, args.table_file, args.mode)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    
+    recorder = instrumentation.enable() if args.stats else None
+    try:
+        summary = run_batch(args.cipher, args.operation, args.input_dir, args.output_dir,
+                            workers=args.workers, use_processes=args.processes,
+                            force=args.force, fsync=args.fsync, settings=settings)
+    except Exception as e:
+        # Arguments were valid, so anything raised here is a runtime failure
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    finally:
+        if recorder is not None:
+            instrumentation.disable()
+            print_stats(recorder, args.stats)
+    return EXIT_FAILURE if summary["failed"] else EXIT_OK
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
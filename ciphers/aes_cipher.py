@@ -7,6 +7,43 @@ from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad, unpad
 import base64
+import io
+import struct
+
+from ciphers.atomic_io import DEFAULT_FSYNC
+from ciphers.buffers import (decrypt_buffer, decrypt_cbc_parallel, decrypt_file_mmap, encrypt_buffer,
+                             encrypt_file_mmap, strip_padding)
+from ciphers.file_io import (CHUNK_SIZE, CBCDecryptor, CBCEncryptor, RangeReader,
+                             decrypt_cbc_stream, encrypt_cbc_stream, pipe, read_exact)
+from ciphers.instrumentation import stage
+from ciphers.key_cache import decrypt_many, encrypt_many
+from ciphers.parallel import map_ordered
+from ciphers.records import decrypt_records, encrypt_records
+
+# Segmented file format used by the parallel CTR/GCM modes:
+# header = magic | version | mode id | segment size | 8-byte nonce prefix
+# GCM segment = sequence number (version 2+) | ciphertext | tag; CTR segment = ciphertext
+SEGMENT_MAGIC = b'AESP'
+SEGMENT_VERSION = 2
+SEGMENT_VERSIONS = (1, 2)  # versions that can still be decrypted
+SEGMENT_SIZE = 1024 * 1024
+GCM_TAG_SIZE = 16
+SEGMENT_HEADER = struct.Struct('>4sBBI8s')
+SEGMENT_SEQUENCE = struct.Struct('>I')
+SEGMENTED_MODES = {'CTR': 1, 'GCM': 2}
+
+
+def _iter_segments(src, segment_size):
+    """Yield (data, is_final) pairs of fixed-size segments read from src"""
+    current = read_exact(src, segment_size)
+    while True:
+        # Read one segment ahead so the last one can be flagged as final
+        following = read_exact(src, segment_size) if len(current) == segment_size else b''
+        final = not following
+        yield current, final
+        if final:
+            return
+        current = following
 
 
 class AESCipher:
@@ -37,6 +74,30 @@ class AESCipher:
         except Exception as e:
             return f"Decryption failed: {str(e)}"
     
+    def encrypt_many(self, plaintexts):
+        """Encrypt a list of plaintexts in CBC mode, returning 'iv:ct' strings in order
+        
+        Interchangeable with encrypt(), but short messages share one pass
+        over the cached key schedule (see key_cache.encrypt_many).
+        """
+        return encrypt_many(AES, self.key, plaintexts)
+    
+    def decrypt_many(self, ciphertexts):
+        """Decrypt a list of 'iv:ct' strings in CBC mode, returning plaintexts in order
+        
+        Like decrypt, a message that cannot be decrypted yields a
+        "Decryption failed: ..." string instead of stopping the batch.
+        """
+        return decrypt_many(AES, self.key, ciphertexts)
+    
+    def encrypt_records(self, plaintexts, mode='CBC'):
+        """Encrypt a list of plaintexts into one buffer of compact binary records"""
+        return encrypt_records(AES, self.key, plaintexts, mode)
+    
+    def decrypt_records(self, records):
+        """Decrypt binary records (or legacy 'iv:ct' strings), returning plaintexts in order"""
+        return decrypt_records(AES, self.key, records)
+    
     def encrypt_file(self, data):
         """Encrypt binary file data"""
         cipher = AES.new(self.key, AES.MODE_CBC)
@@ -52,3 +113,311 @@ class AESCipher:
         cipher = AES.new(self.key, AES.MODE_CBC, iv)
         pt = unpad(cipher.decrypt(ct), AES.block_size)
         return pt
+    
+    def decrypt_file_parallel(self, data, workers=None):
+        """Decrypt binary file data (IV + CBC ciphertext) across a worker pool
+        
+        Produces the same plaintext as decrypt_file, returned as a bytearray.
+        """
+        if len(data) < AES.block_size:
+            raise ValueError("Ciphertext is too short to contain an IV")
+        output = bytearray(len(data) - AES.block_size)
+        length = decrypt_cbc_parallel(
+            lambda iv: AES.new(self.key, AES.MODE_CBC, iv),
+            data, output, AES.block_size, workers)
+        del output[length:]
+        return output
+    
+    def encrypt_buffer(self, data, output=None):
+        """Encrypt a bytes-like or mmap buffer without intermediate copies (see buffers.encrypt_buffer)"""
+        return encrypt_buffer(self._new_cbc, AES.block_size, data, output)
+    
+    def decrypt_buffer(self, data, output=None):
+        """Decrypt an IV + ciphertext buffer without intermediate copies (see buffers.decrypt_buffer)"""
+        return decrypt_buffer(self._new_cbc, AES.block_size, data, output)
+    
+    def encrypt_file_mmap(self, input_path, output_path, fsync=DEFAULT_FSYNC):
+        """Encrypt a file through memory maps, returning (bytes read, bytes written)"""
+        return encrypt_file_mmap(self._new_cbc, AES.block_size, input_path, output_path, fsync)
+    
+    def decrypt_file_mmap(self, input_path, output_path, fsync=DEFAULT_FSYNC):
+        """Decrypt a file through memory maps, returning (bytes read, bytes written)"""
+        return decrypt_file_mmap(self._new_cbc, AES.block_size, input_path, output_path, fsync)
+    
+    def encrypt_stream(self, chunks):
+        """Encrypt an iterable of byte chunks, yielding IV + ciphertext pieces"""
+        return encrypt_cbc_stream(self._new_cbc, chunks, AES.block_size)
+    
+    def decrypt_stream(self, chunks):
+        """Decrypt an iterable of IV + ciphertext chunks, yielding plaintext pieces"""
+        return decrypt_cbc_stream(self._new_cbc, chunks, AES.block_size)
+    
+    def encryptor(self):
+        """Return an incremental CBC encryptor (update/finalize) for push-style streaming"""
+        return CBCEncryptor(self._new_cbc, AES.block_size)
+    
+    def decryptor(self):
+        """Return an incremental CBC decryptor (update/finalize) for push-style streaming"""
+        return CBCDecryptor(self._new_cbc, AES.block_size)
+    
+    def encrypt_fileobj(self, src, dst, chunk_size=CHUNK_SIZE):
+        """Encrypt a binary file object into another, returning (bytes read, bytes written)"""
+        return pipe(src, dst, self.encrypt_stream, chunk_size)
+    
+    def decrypt_fileobj(self, src, dst, chunk_size=CHUNK_SIZE):
+        """Decrypt a binary file object into another, returning (bytes read, bytes written)"""
+        return pipe(src, dst, self.decrypt_stream, chunk_size)
+    
+    def _new_cbc(self, iv=None):
+        """Create a CBC cipher for this key (random IV when iv is None)"""
+        if iv is None:
+            return AES.new(self.key, AES.MODE_CBC)
+        return AES.new(self.key, AES.MODE_CBC, iv)
+    
+    def encrypt_fileobj_parallel(self, src, dst, mode='GCM', workers=None,
+                                 segment_size=SEGMENT_SIZE):
+        """Encrypt a binary file object in independent segments across a worker pool
+        
+        mode is 'CTR' (keystream split by counter offset) or 'GCM' (each
+        segment carries its own authentication tag). Segments are encrypted
+        in parallel and written back in order. Returns (bytes read, bytes written).
+        """
+        if mode not in SEGMENTED_MODES:
+            raise ValueError(f"Unsupported parallel mode '{mode}' (expected CTR or GCM)")
+        if segment_size <= 0 or segment_size % AES.block_size:
+            raise ValueError("Segment size must be a positive multiple of the AES block size")
+        
+        header = SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, SEGMENTED_MODES[mode],
+                                     segment_size, get_random_bytes(8))
+        dst.write(header)
+        work = self._seal_segment if mode == 'GCM' else self._ctr_segment
+        return self._run_segments(src, dst, header, segment_size, work, workers, len(header))
+    
+    def decrypt_fileobj_parallel(self, src, dst, mode='GCM', workers=None):
+        """Decrypt a segmented CTR/GCM file object across a worker pool
+        
+        mode is the mode the caller expects and must match the file header.
+        The header's mode byte is not authenticated, so unauthenticated CTR is
+        only used when explicitly asked for. GCM segments are verified as they
+        stream in and decryption stops with ValueError at the first tampered,
+        reordered or missing segment, so only verified plaintext is ever
+        written. Returns (bytes read, bytes written).
+        """
+        header = read_exact(src, SEGMENT_HEADER.size)
+        _, segment_size, version = self._parse_segment_header(header, mode)
+        
+        stored_size = self._stored_segment_size(mode, segment_size, version)
+        work = self._open_segment if mode == 'GCM' else self._ctr_segment
+        read, written = self._run_segments(src, dst, header, stored_size, work, workers, 0)
+        return read + len(header), written
+    
+    def segment_info(self, src, mode='GCM'):
+        """Return (mode, segment size, segment count) of a seekable segmented file object
+        
+        Like every segmented reader, raises ValueError unless the header says mode.
+        """
+        _, mode, segment_size, _, count = self._segment_layout(src, mode)
+        return mode, segment_size, count
+    
+    def read_segment(self, src, index, mode='GCM'):
+        """Decrypt a single segment of a seekable segmented file object encrypted with mode
+        
+        Only that segment is read; for GCM it is verified against its tag,
+        sequence number and position (final or not) before being returned.
+        """
+        header, mode, _, stored_size, count = self._segment_layout(src, mode)
+        return self._read_segment(src, header, mode, stored_size, count, index)
+    
+    def _read_segment(self, src, header, mode, stored_size, count, index):
+        """Read and decrypt segment index given the file's layout"""
+        if not 0 <= index < count:
+            raise IndexError(f"Segment {index} out of range (file has {count} segments)")
+        
+        src.seek(SEGMENT_HEADER.size + index * stored_size)
+        data = read_exact(src, stored_size)
+        work = self._open_segment if mode == 'GCM' else self._ctr_segment
+        return work(header, index, data, index == count - 1)[1]
+    
+    def decrypt_range(self, src, offset, length, mode='GCM'):
+        """Decrypt plaintext bytes [offset, offset + length) of a seekable encrypted file object
+        
+        mode is 'CBC' for the format of encrypt_file (IV + ciphertext), or the
+        CTR/GCM mode of a segmented file, which must match its header. Only
+        the blocks or segments the range covers are read. The range is
+        clipped to the end of the plaintext.
+        """
+        size, read_range = self._range_reader(src, mode)
+        if offset < 0 or length < 0:
+            raise ValueError("Offset and length must not be negative")
+        length = min(length, size - offset)
+        return read_range(offset, length) if length > 0 else b''
+    
+    def open_decrypted(self, src, mode='GCM'):
+        """Return a read-only, seekable file object over the plaintext of src (see decrypt_range)"""
+        return RangeReader(*self._range_reader(src, mode))
+    
+    def _range_reader(self, src, mode):
+        """Return (plaintext size, read_range(offset, length)) for a seekable CBC or segmented file"""
+        if mode == 'CBC':
+            return self._cbc_range_reader(src)
+        return self._segmented_range_reader(src, mode)
+    
+    def _cbc_range_reader(self, src):
+        """Random access into IV + CBC ciphertext: each block only needs the one before it"""
+        bs = AES.block_size
+        total = src.seek(0, io.SEEK_END)
+        if total < 2 * bs or total % bs:
+            raise ValueError("Ciphertext is not a multiple of the block size")
+        
+        # The padding length comes from the last block, decrypted with the previous one as IV
+        src.seek(total - 2 * bs)
+        tail = read_exact(src, 2 * bs)
+        last = AES.new(self.key, AES.MODE_CBC, tail[:bs]).decrypt(tail[bs:])
+        size = total - 2 * bs + strip_padding(last, bs, bs)
+        
+        def read_range(offset, length):
+            first = offset // bs
+            count = (offset + length - 1) // bs - first + 1
+            # File offset first * bs is the IV or the ciphertext block preceding block first
+            src.seek(first * bs)
+            data = read_exact(src, (count + 1) * bs)
+            pt = AES.new(self.key, AES.MODE_CBC, data[:bs]).decrypt(data[bs:])
+            start = offset - first * bs
+            return pt[start:start + length]
+        
+        return size, read_range
+    
+    def _segmented_range_reader(self, src, mode):
+        """Random access into a segmented file, decrypting (and verifying) whole segments"""
+        header, mode, segment_size, stored_size, count = self._segment_layout(src, mode)
+        last_stored = src.seek(0, io.SEEK_END) - len(header) - (count - 1) * stored_size
+        size = (count - 1) * segment_size + max(last_stored - (stored_size - segment_size), 0)
+        cached = {}
+        
+        def segment(index):
+            # Keep the last segment so small sequential reads decrypt it only once
+            if index not in cached:
+                cached.clear()
+                cached[index] = self._read_segment(src, header, mode, stored_size, count, index)
+            return cached[index]
+        
+        def read_range(offset, length):
+            first = offset // segment_size
+            last = (offset + length - 1) // segment_size
+            data = b''.join(segment(index) for index in range(first, last + 1))
+            start = offset - first * segment_size
+            return data[start:start + length]
+        
+        return size, read_range
+    
+    def _segment_layout(self, src, mode):
+        """Read the header of a seekable segmented file and derive its segment count
+        
+        Returns (header, mode, segment size, stored segment size, segment count).
+        """
+        src.seek(0)
+        header = read_exact(src, SEGMENT_HEADER.size)
+        mode, segment_size, version = self._parse_segment_header(header, mode)
+        stored_size = self._stored_segment_size(mode, segment_size, version)
+        body = src.seek(0, io.SEEK_END) - len(header)
+        # Even an empty plaintext is stored as one (empty) segment
+        count = max(1, -(-body // stored_size))
+        return header, mode, segment_size, stored_size, count
+    
+    @staticmethod
+    def _parse_segment_header(header, expected):
+        """Validate a segmented file header, returning (mode, segment size, version)
+        
+        The mode byte decides whether tags are checked at all, so it is only
+        compared against the mode the caller expects, never trusted on its
+        own: flipping GCM to CTR must not switch verification off.
+        """
+        if expected not in SEGMENTED_MODES:
+            raise ValueError(f"Unsupported parallel mode '{expected}' (expected CTR or GCM)")
+        if len(header) != SEGMENT_HEADER.size:
+            raise ValueError("File is too short to contain a segment header")
+        magic, version, mode_id, segment_size, _ = SEGMENT_HEADER.unpack(header)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError("Not a segmented AES file (bad magic)")
+        if version not in SEGMENT_VERSIONS:
+            raise ValueError(f"Unsupported segmented file version {version}")
+        for mode, ident in SEGMENTED_MODES.items():
+            if ident == mode_id:
+                if mode != expected:
+                    raise ValueError(f"File was encrypted with AES-{mode}, not AES-{expected}")
+                return mode, segment_size, version
+        raise ValueError(f"Unknown segment mode id {mode_id}")
+    
+    @staticmethod
+    def _stored_segment_size(mode, segment_size, version):
+        """On-disk size of a full segment: sequence number and tag around GCM data"""
+        if mode != 'GCM':
+            return segment_size
+        sequence = SEGMENT_SEQUENCE.size if version >= 2 else 0
+        return sequence + segment_size + GCM_TAG_SIZE
+    
+    def _run_segments(self, src, dst, header, segment_size, work, workers, written):
+        """Dispatch segments from src to work() on a pool and write results in order"""
+        read = 0
+        
+        def segments():
+            pending = _iter_segments(src, segment_size)
+            while True:
+                with stage("read") as timer:
+                    segment = next(pending, None)
+                    timer.size = len(segment[0]) if segment else 0
+                if segment is None:
+                    return
+                yield segment
+        
+        def timed_work(header, index, data, final):
+            # Runs on pool threads, so "cipher" time is summed across workers
+            with stage("cipher", len(data)):
+                return work(header, index, data, final)
+        
+        jobs = ((header, index, data, final) for index, (data, final) in enumerate(segments()))
+        for consumed, piece in map_ordered(timed_work, jobs, workers):
+            with stage("write", len(piece)):
+                dst.write(piece)
+            read += consumed
+            written += len(piece)
+        return read, written
+    
+    def _ctr_segment(self, header, index, data, final):
+        """Apply the CTR keystream to one segment (encryption and decryption are identical)"""
+        segment_size, nonce = SEGMENT_HEADER.unpack(header)[3:]
+        cipher = AES.new(self.key, AES.MODE_CTR, nonce=nonce,
+                         initial_value=index * (segment_size // AES.block_size))
+        return len(data), cipher.encrypt(data)
+    
+    def _segment_gcm(self, header, index, final):
+        """Build the GCM cipher for one segment, binding header, index and final flag"""
+        nonce = SEGMENT_HEADER.unpack(header)[4]
+        cipher = AES.new(self.key, AES.MODE_GCM, nonce=nonce + struct.pack('>I', index))
+        cipher.update(header + struct.pack('>IB', index, final))
+        return cipher
+    
+    def _seal_segment(self, header, index, data, final):
+        """Encrypt one GCM segment, framed by its sequence number and tag"""
+        ct, tag = self._segment_gcm(header, index, final).encrypt_and_digest(data)
+        return len(data), SEGMENT_SEQUENCE.pack(index) + ct + tag
+    
+    def _open_segment(self, header, index, data, final):
+        """Verify and decrypt one GCM segment, returning (bytes consumed, plaintext)"""
+        consumed = len(data)
+        sequence = SEGMENT_SEQUENCE.size if header[4] >= 2 else 0
+        if len(data) < sequence + GCM_TAG_SIZE:
+            raise ValueError(f"Segment {index} is truncated")
+        if sequence:
+            # Cheap check first: a dropped or reordered segment fails before any decryption
+            found = SEGMENT_SEQUENCE.unpack_from(data)[0]
+            if found != index:
+                raise ValueError(f"Segment {index} is out of sequence (found segment {found})")
+            data = data[sequence:]
+        try:
+            pt = self._segment_gcm(header, index, final).decrypt_and_verify(
+                data[:-GCM_TAG_SIZE], data[-GCM_TAG_SIZE:])
+        except ValueError:
+            raise ValueError(f"Segment {index} failed authentication (corrupted or truncated file)")
+        # Count the sequence number too, not just the ciphertext and tag after it
+        return consumed, pt
@@ -0,0 +1,160 @@
+"""
+Asyncio Helpers
+Encrypt and decrypt async streams without blocking the event loop
+"""
+
+import asyncio
+import inspect
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from ciphers.atomic_io import AtomicWriter
+from ciphers.file_io import CHUNK_SIZE
+from ciphers.parallel import default_workers
+
+
+class CipherExecutor:
+    """Thread pool for cipher work with a bounded number of in-flight tasks
+
+    run() waits for a free slot before submitting, so when every slot is busy
+    the producing coroutines pause instead of queueing unbounded work (and
+    the chunks it holds) behind the pool.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or default_workers()
+        self.max_pending = max_pending or self.workers * 2
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        # One semaphore per event loop; weak keys so finished loops (e.g. each asyncio.run) are dropped
+        self._slots = weakref.WeakKeyDictionary()
+
+    async def run(self, func, *args):
+        """Run func(*args) on the pool once a slot is free, returning its result"""
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        async with slots:
+            return await loop.run_in_executor(self._pool, func, *args)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.shutdown(wait=False)
+
+
+_default_executor = None
+
+
+def default_executor():
+    """Return the shared CipherExecutor, creating it on first use"""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = CipherExecutor()
+    return _default_executor
+
+
+async def _write(writer, data):
+    """Write to an asyncio StreamWriter or an object with an async write(), honouring drain()"""
+    result = writer.write(data)
+    if inspect.isawaitable(result):
+        await result
+    drain = getattr(writer, 'drain', None)
+    if drain is not None:
+        await drain()
+
+
+async def _pump(transform, reader, writer, executor, chunk_size, header=b''):
+    """Stream reader -> transform.update/finalize on the executor -> writer
+
+    One chunk per stream is in flight at a time: the next read only happens
+    after the previous output has been written and drained, which propagates
+    backpressure from slow writers to the readers.
+    """
+    read = written = 0
+    if header:
+        await _write(writer, header)
+        written += len(header)
+
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        read += len(chunk)
+        piece = await executor.run(transform.update, chunk)
+        if piece:
+            await _write(writer, piece)
+            written += len(piece)
+
+    piece = await executor.run(transform.finalize)
+    await _write(writer, piece)
+    return read, written + len(piece)
+
+
+async def encrypt_stream_async(cipher, reader, writer, executor=None, chunk_size=CHUNK_SIZE):
+    """Encrypt an async reader into an async writer (IV + CBC ciphertext)
+
+    cipher is an AESCipher or DESCipher; reader needs an async read(size)
+    (e.g. asyncio.StreamReader) and writer a write() that is plain or async,
+    plus an optional async drain(). Returns (bytes read, bytes written).
+    """
+    encryptor = cipher.encryptor()
+    return await _pump(encryptor, reader, writer, executor or default_executor(),
+                       chunk_size, header=encryptor.iv)
+
+
+async def decrypt_stream_async(cipher, reader, writer, executor=None, chunk_size=CHUNK_SIZE):
+    """Decrypt an async reader of IV + CBC ciphertext into an async writer
+
+    Raises ValueError on truncated input or bad padding. Returns (bytes read, bytes written).
+    """
+    return await _pump(cipher.decryptor(), reader, writer, executor or default_executor(),
+                       chunk_size)
+
+
+class _ExecutorFile:
+    """Async read/write facade over a blocking file object, running I/O on the executor"""
+
+    def __init__(self, fileobj, executor):
+        self.fileobj = fileobj
+        self.executor = executor
+
+    async def read(self, size):
+        return await self.executor.run(self.fileobj.read, size)
+
+    async def write(self, data):
+        return await self.executor.run(self.fileobj.write, data)
+
+
+async def _transform_file(stream_async, cipher, input_file, output_file, executor, chunk_size):
+    """Open a file pair and run an async stream transform over it, committing the output on success"""
+    executor = executor or default_executor()
+    src = await executor.run(open, input_file, 'rb')
+    try:
+        dst = await executor.run(AtomicWriter, output_file)
+        try:
+            result = await stream_async(cipher, _ExecutorFile(src, executor),
+                                        _ExecutorFile(dst, executor), executor, chunk_size)
+        except BaseException:
+            await executor.run(dst.discard)
+            raise
+        await executor.run(dst.commit)
+        return result
+    finally:
+        await executor.run(src.close)
+
+
+async def encrypt_file_async(cipher, input_file, output_file, executor=None, chunk_size=CHUNK_SIZE):
+    """Encrypt input_file into output_file without blocking the loop, returning (bytes read, bytes written)"""
+    return await _transform_file(encrypt_stream_async, cipher, input_file, output_file,
+                                 executor, chunk_size)
+
+
+async def decrypt_file_async(cipher, input_file, output_file, executor=None, chunk_size=CHUNK_SIZE):
+    """Decrypt input_file into output_file without blocking the loop, returning (bytes read, bytes written)"""
+    return await _transform_file(decrypt_stream_async, cipher, input_file, output_file,
+                                 executor, chunk_size)
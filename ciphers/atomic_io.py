@@ -0,0 +1,222 @@
+"""
+Atomic Output
+Buffered writer that builds a file under a temporary name and renames it into place on success
+"""
+
+import os
+import secrets
+import stat
+import tempfile
+
+from ciphers.instrumentation import stage
+
+# Size of every write issued to the file (a multiple of common page and stripe sizes),
+# so each write starts on a WRITE_BUFFER_SIZE boundary except the last
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+
+# With the "periodic" policy, data is synced at least this often while writing
+FSYNC_INTERVAL = 64 * 1024 * 1024
+
+# none: rely on the OS; end: sync the file and its directory on commit; periodic: also every FSYNC_INTERVAL
+FSYNC_POLICIES = ("none", "end", "periodic")
+DEFAULT_FSYNC = "end"
+
+# Suffix of temporary outputs; batch mode never treats such files as inputs
+PARTIAL_SUFFIX = ".part"
+
+# O_BINARY only exists (and matters) on Windows
+_TEMP_FLAGS = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+
+
+def _check_policy(fsync):
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {', '.join(FSYNC_POLICIES)}")
+
+
+def _fsync_directory(directory):
+    """Persist a rename in directory (skipped where directories cannot be opened, e.g. Windows)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _create_temp(directory, name):
+    """Create an empty temporary file for name in directory; returns (fd, path)
+
+    tempfile.mkstemp always creates mode 0600. Creating the file with 0666
+    instead lets the kernel apply the umask exactly as a plain open() would,
+    without reading it: os.umask can only be read by changing it, for every
+    thread at once.
+    """
+    for _ in range(tempfile.TMP_MAX):
+        path = os.path.join(directory, f".{name}.{secrets.token_hex(4)}{PARTIAL_SUFFIX}")
+        try:
+            return os.open(path, _TEMP_FLAGS, 0o666), path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No free temporary name for '{name}' in {directory}")
+
+
+class AtomicWriter:
+    """Binary output file that only appears at path once everything was written
+
+    Data goes to a hidden temporary file in the target directory through a
+    WRITE_BUFFER_SIZE buffer; large writes bypass the buffer in whole
+    buffer-sized pieces. commit() flushes, applies the fsync policy and
+    renames the file over path; discard() deletes it, leaving any existing
+    file at path untouched. Used as a context manager, it commits on
+    success and discards on any exception.
+
+    Symlinks are followed, so the file they point to is replaced and the
+    link kept. An existing path that is not a regular file (a device such
+    as /dev/null, or a FIFO) cannot be replaced: it is written directly,
+    without fsync, and discard() cannot take back what was written.
+
+    fileno() and truncate() expose the temporary file for memory-mapped
+    output when mappable is True.
+    """
+
+    def __init__(self, path, fsync=DEFAULT_FSYNC, buffer_size=WRITE_BUFFER_SIZE):
+        _check_policy(fsync)
+        self.path = path
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+        self.closed = False
+        self._buffer = bytearray()
+        self._unsynced = 0
+
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            mode = None
+        # A directory is left to fail at commit, like any target that cannot be replaced
+        self.mappable = mode is None or stat.S_ISREG(mode) or stat.S_ISDIR(mode)
+        if not self.mappable:
+            # Opened by the given name: /dev/stdout resolves to no real path when it is a pipe
+            self._temp_path = None
+            self._file = open(path, 'wb', buffering=0)
+            return
+
+        self._target = os.path.realpath(path)
+        directory, name = os.path.split(self._target)
+        self._directory = directory
+        try:
+            fd, self._temp_path = _create_temp(directory, name)
+        except FileNotFoundError as e:
+            # Name the requested path, not the hidden temporary one
+            raise FileNotFoundError(e.errno, e.strerror, path) from None
+        try:
+            # Replacing a file keeps its permissions
+            if mode is not None and hasattr(os, 'fchmod'):
+                os.fchmod(fd, mode & 0o7777)
+            self._file = os.fdopen(fd, 'r+b', buffering=0)
+        except BaseException:
+            os.close(fd)
+            os.remove(self._temp_path)
+            raise
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        """Buffer data, writing every full buffer out; returns len(data)"""
+        data = memoryview(data).cast('B')
+        size = len(data)
+        buffer = self._buffer
+        if buffer:
+            take = min(self.buffer_size - len(buffer), size)
+            buffer += data[:take]
+            data = data[take:]
+            if len(buffer) < self.buffer_size:
+                return size
+            self._write_out(buffer)
+            buffer.clear()
+
+        # Whole buffers straight from the caller's memory, the rest kept for later
+        direct = len(data) - len(data) % self.buffer_size
+        if direct:
+            self._write_out(data[:direct])
+        buffer += data[direct:]
+        return size
+
+    def _write_out(self, data):
+        """Write all of data to the temporary file, honouring the periodic fsync policy"""
+        view = memoryview(data)
+        while view:
+            view = view[self._file.write(view):]
+        self._unsynced += len(data)
+        if self.fsync == "periodic" and self._unsynced >= FSYNC_INTERVAL and self._temp_path:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def flush(self):
+        """Write out any buffered data"""
+        if self._buffer:
+            self._write_out(self._buffer)
+            self._buffer.clear()
+
+    def fileno(self):
+        self.flush()
+        return self._file.fileno()
+
+    def truncate(self, size):
+        self.flush()
+        return self._file.truncate(size)
+
+    def commit(self):
+        """Flush, sync per the fsync policy and atomically rename the file over path"""
+        if self.closed:
+            return
+        try:
+            with stage("write"):
+                self.flush()
+                if self._temp_path is None:
+                    # Written in place: there is nothing to sync or rename
+                    self._file.close()
+                    self.closed = True
+                    return
+                if self.fsync != "none":
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                os.replace(self._temp_path, self._target)
+                if self.fsync != "none":
+                    _fsync_directory(self._directory)
+        except BaseException:
+            self.discard()
+            raise
+        self.closed = True
+
+    def discard(self):
+        """Close and delete the temporary file without touching path"""
+        if self.closed:
+            return
+        self.closed = True
+        self._file.close()
+        if self._temp_path is None:
+            return
+        try:
+            os.remove(self._temp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+def atomic_output(path, fsync=DEFAULT_FSYNC):
+    """Open path for atomic, buffered binary output (see AtomicWriter)"""
+    return AtomicWriter(path, fsync)
@@ -0,0 +1,206 @@
+"""
+Zero-copy Buffer Helpers
+CBC encryption/decryption over memoryviews and mmaps using PyCryptodome's output= parameter
+"""
+
+import mmap
+import os
+
+from ciphers.atomic_io import DEFAULT_FSYNC, atomic_output
+from ciphers.instrumentation import stage
+from ciphers.parallel import map_ordered
+
+# Ciphertext slice handed to each worker by decrypt_cbc_parallel
+PARALLEL_SEGMENT_SIZE = 4 * 1024 * 1024
+
+
+def padded_size(length, block_size):
+    """Return the PKCS#7 padded size of a plaintext of the given length"""
+    return length - length % block_size + block_size
+
+
+def encrypt_into(cipher, data, output, block_size):
+    """Encrypt data + PKCS#7 padding into output without copying the plaintext
+    
+    Every view is released on the way out, even on error, so the caller can
+    close mmaps passed as data or output while the exception propagates.
+    """
+    with memoryview(data) as src, memoryview(output) as out:
+        full = len(src) - len(src) % block_size
+        
+        if full:
+            with src[:full] as block_src, out[:full] as block_out:
+                cipher.encrypt(block_src, output=block_out)
+        
+        # Only the final partial block is copied to build the padding
+        remainder = bytes(src[full:])
+        pad_len = block_size - len(remainder)
+        with out[full:full + block_size] as last:
+            cipher.encrypt(remainder + bytes([pad_len]) * pad_len, output=last)
+    return full + block_size
+
+
+def decrypt_into(cipher, data, output, block_size):
+    """Decrypt data into output, returning the plaintext length after removing padding
+    
+    Like encrypt_into, no view outlives the call, so a ValueError for bad
+    length or padding reaches the caller instead of a BufferError on close.
+    """
+    with memoryview(data) as src, memoryview(output) as out:
+        length = len(src)
+        if length == 0 or length % block_size:
+            raise ValueError("Ciphertext is not a multiple of the block size")
+        
+        with out[:length] as target:
+            cipher.decrypt(src, output=target)
+    return strip_padding(output, length, block_size)
+
+
+def strip_padding(output, length, block_size):
+    """Validate PKCS#7 padding at the end of output[:length], returning the unpadded length"""
+    with memoryview(output) as out:
+        pad_len = out[length - 1]
+        if pad_len < 1 or pad_len > block_size:
+            raise ValueError("Padding is incorrect.")
+        if bytes(out[length - pad_len:length]) != bytes([pad_len]) * pad_len:
+            raise ValueError("Padding is incorrect.")
+    return length - pad_len
+
+
+def encrypt_buffer(new_cipher, block_size, data, output=None):
+    """Encrypt a bytes-like or mmap buffer to IV + CBC ciphertext without intermediate copies
+    
+    new_cipher(iv) must return a CBC cipher (a random IV is used when iv is
+    None). The result is written into output (allocated if None) and a
+    memoryview over the written region is returned.
+    """
+    size = block_size + padded_size(len(data), block_size)
+    if output is None:
+        output = bytearray(size)
+    
+    # Views are released even on error, so mmaps passed in can still be closed
+    with memoryview(output) as out, out[block_size:size] as body:
+        cipher = new_cipher(None)
+        out[:block_size] = cipher.iv
+        encrypt_into(cipher, data, body, block_size)
+    return memoryview(output)[:size]
+
+
+def decrypt_buffer(new_cipher, block_size, data, output=None):
+    """Decrypt an IV + CBC ciphertext buffer without intermediate copies
+    
+    The plaintext is written into output (allocated if None, must hold at
+    least len(data) - block_size bytes) and a memoryview over the unpadded
+    plaintext is returned.
+    """
+    with memoryview(data) as src:
+        if len(src) < block_size:
+            raise ValueError("Ciphertext is too short to contain an IV")
+        if output is None:
+            output = bytearray(len(src) - block_size)
+        
+        with src[block_size:] as body:
+            cipher = new_cipher(bytes(src[:block_size]))
+            length = decrypt_into(cipher, body, output, block_size)
+    return memoryview(output)[:length]
+
+
+def encrypt_file_mmap(new_cipher, block_size, input_path, output_path, fsync=DEFAULT_FSYNC):
+    """Encrypt a file to IV + CBC ciphertext through memory maps, returning (bytes read, bytes written)
+    
+    The output is built under a temporary name and only replaces
+    output_path once complete (see atomic_output).
+    """
+    with open(input_path, 'rb') as src, atomic_output(output_path, fsync) as dst:
+        if not dst.mappable:
+            # Devices and FIFOs cannot be mapped: cipher in memory and write the result
+            data = src.read()
+            with stage("cipher", len(data)), encrypt_buffer(new_cipher, block_size, data) as out:
+                dst.write(out)
+                return len(data), len(out)
+        data = map_input(src)
+        length = len(data) if data is not None else 0
+        size = block_size + padded_size(length, block_size)
+        out = map_output(dst, size)
+        try:
+            # Input pages are read and output pages written as the cipher touches them
+            with stage("cipher", length), \
+                    encrypt_buffer(new_cipher, block_size, data if data is not None else b'', out):
+                pass
+        finally:
+            out.close()
+            if data is not None:
+                data.close()
+    return length, size
+
+
+def decrypt_file_mmap(new_cipher, block_size, input_path, output_path, fsync=DEFAULT_FSYNC):
+    """Decrypt an IV + CBC ciphertext file through memory maps, returning (bytes read, bytes written)"""
+    with open(input_path, 'rb') as src, atomic_output(output_path, fsync) as dst:
+        if not dst.mappable:
+            data = src.read()
+            if len(data) <= block_size:
+                raise ValueError("Ciphertext is too short to contain an IV and a block")
+            with stage("cipher", len(data)), decrypt_buffer(new_cipher, block_size, data) as out:
+                dst.write(out)
+                return len(data), len(out)
+        data = map_input(src)
+        if data is None or len(data) <= block_size:
+            if data is not None:
+                data.close()
+            raise ValueError("Ciphertext is too short to contain an IV and a block")
+        length = len(data)
+        out = map_output(dst, length - block_size)
+        try:
+            with stage("cipher", length), \
+                    decrypt_buffer(new_cipher, block_size, data, out) as plaintext:
+                size = len(plaintext)
+        finally:
+            out.close()
+            data.close()
+        # Drop the padding bytes from the end of the output file
+        dst.truncate(size)
+    return length, size
+
+
+def decrypt_cbc_parallel(new_cipher, data, output, block_size, workers=None,
+                         segment_size=PARALLEL_SEGMENT_SIZE):
+    """Decrypt IV + CBC ciphertext into output across a worker pool
+    
+    Each plaintext block depends only on its own and the preceding ciphertext
+    block, so the ciphertext is split at block boundaries and every segment
+    is decrypted independently with the block before it as its IV. Padding
+    is only checked on the final segment. new_cipher(iv) must return a fresh
+    CBC cipher. Returns the plaintext length after removing padding.
+    """
+    src = memoryview(data)
+    out = memoryview(output)
+    length = len(src) - block_size
+    
+    if length <= 0 or length % block_size:
+        raise ValueError("Ciphertext is not a multiple of the block size")
+    segment_size -= segment_size % block_size
+    segment_size = max(segment_size, block_size)
+    
+    def work(start):
+        end = min(start + segment_size, length)
+        # src[start:start + block_size] is the IV or the previous ciphertext block
+        cipher = new_cipher(src[start:start + block_size])
+        cipher.decrypt(src[block_size + start:block_size + end], output=out[start:end])
+    
+    for _ in map_ordered(work, ((start,) for start in range(0, length, segment_size)), workers):
+        pass
+    return strip_padding(out, length, block_size)
+
+
+def map_input(fileobj):
+    """Memory-map an open binary file read-only (None if the file is empty)"""
+    if os.fstat(fileobj.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def map_output(fileobj, size):
+    """Resize an open binary file to size bytes and memory-map it for writing"""
+    fileobj.truncate(size)
+    return mmap.mmap(fileobj.fileno(), size, access=mmap.ACCESS_WRITE)
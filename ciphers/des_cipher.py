@@ -8,6 +8,14 @@ from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad, unpad
 import base64
 
+from ciphers.atomic_io import DEFAULT_FSYNC
+from ciphers.buffers import (decrypt_buffer, decrypt_cbc_parallel, decrypt_file_mmap, encrypt_buffer,
+                             encrypt_file_mmap)
+from ciphers.file_io import (CHUNK_SIZE, CBCDecryptor, CBCEncryptor, decrypt_cbc_stream,
+                             encrypt_cbc_stream, pipe)
+from ciphers.key_cache import decrypt_many, encrypt_many
+from ciphers.records import decrypt_records, encrypt_records
+
 
 class DESCipher:
     def __init__(self, key=None):
@@ -39,6 +47,30 @@ class DESCipher:
         except Exception as e:
             return f"Decryption failed: {str(e)}"
     
+    def encrypt_many(self, plaintexts):
+        """Encrypt a list of plaintexts in CBC mode, returning 'iv:ct' strings in order
+        
+        Interchangeable with encrypt(), but short messages share one pass
+        over the cached key schedule (see key_cache.encrypt_many).
+        """
+        return encrypt_many(DES, self.key, plaintexts)
+    
+    def decrypt_many(self, ciphertexts):
+        """Decrypt a list of 'iv:ct' strings in CBC mode, returning plaintexts in order
+        
+        Like decrypt, a message that cannot be decrypted yields a
+        "Decryption failed: ..." string instead of stopping the batch.
+        """
+        return decrypt_many(DES, self.key, ciphertexts)
+    
+    def encrypt_records(self, plaintexts, mode='CBC'):
+        """Encrypt a list of plaintexts into one buffer of compact binary records"""
+        return encrypt_records(DES, self.key, plaintexts, mode)
+    
+    def decrypt_records(self, records):
+        """Decrypt binary records (or legacy 'iv:ct' strings), returning plaintexts in order"""
+        return decrypt_records(DES, self.key, records)
+    
     def encrypt_file(self, data):
         """Encrypt binary file data"""
         cipher = DES.new(self.key, DES.MODE_CBC)
@@ -54,3 +86,63 @@ class DESCipher:
         cipher = DES.new(self.key, DES.MODE_CBC, iv)
         pt = unpad(cipher.decrypt(ct), DES.block_size)
         return pt
+    
+    def decrypt_file_parallel(self, data, workers=None):
+        """Decrypt binary file data (IV + CBC ciphertext) across a worker pool
+        
+        Produces the same plaintext as decrypt_file, returned as a bytearray.
+        """
+        if len(data) < DES.block_size:
+            raise ValueError("Ciphertext is too short to contain an IV")
+        output = bytearray(len(data) - DES.block_size)
+        length = decrypt_cbc_parallel(
+            lambda iv: DES.new(self.key, DES.MODE_CBC, iv),
+            data, output, DES.block_size, workers)
+        del output[length:]
+        return output
+    
+    def encrypt_buffer(self, data, output=None):
+        """Encrypt a bytes-like or mmap buffer without intermediate copies (see buffers.encrypt_buffer)"""
+        return encrypt_buffer(self._new_cbc, DES.block_size, data, output)
+    
+    def decrypt_buffer(self, data, output=None):
+        """Decrypt an IV + ciphertext buffer without intermediate copies (see buffers.decrypt_buffer)"""
+        return decrypt_buffer(self._new_cbc, DES.block_size, data, output)
+    
+    def encrypt_file_mmap(self, input_path, output_path, fsync=DEFAULT_FSYNC):
+        """Encrypt a file through memory maps, returning (bytes read, bytes written)"""
+        return encrypt_file_mmap(self._new_cbc, DES.block_size, input_path, output_path, fsync)
+    
+    def decrypt_file_mmap(self, input_path, output_path, fsync=DEFAULT_FSYNC):
+        """Decrypt a file through memory maps, returning (bytes read, bytes written)"""
+        return decrypt_file_mmap(self._new_cbc, DES.block_size, input_path, output_path, fsync)
+    
+    def encrypt_stream(self, chunks):
+        """Encrypt an iterable of byte chunks, yielding IV + ciphertext pieces"""
+        return encrypt_cbc_stream(self._new_cbc, chunks, DES.block_size)
+    
+    def decrypt_stream(self, chunks):
+        """Decrypt an iterable of IV + ciphertext chunks, yielding plaintext pieces"""
+        return decrypt_cbc_stream(self._new_cbc, chunks, DES.block_size)
+    
+    def encryptor(self):
+        """Return an incremental CBC encryptor (update/finalize) for push-style streaming"""
+        return CBCEncryptor(self._new_cbc, DES.block_size)
+    
+    def decryptor(self):
+        """Return an incremental CBC decryptor (update/finalize) for push-style streaming"""
+        return CBCDecryptor(self._new_cbc, DES.block_size)
+    
+    def encrypt_fileobj(self, src, dst, chunk_size=CHUNK_SIZE):
+        """Encrypt a binary file object into another, returning (bytes read, bytes written)"""
+        return pipe(src, dst, self.encrypt_stream, chunk_size)
+    
+    def decrypt_fileobj(self, src, dst, chunk_size=CHUNK_SIZE):
+        """Decrypt a binary file object into another, returning (bytes read, bytes written)"""
+        return pipe(src, dst, self.decrypt_stream, chunk_size)
+    
+    def _new_cbc(self, iv=None):
+        """Create a CBC cipher for this key (random IV when iv is None)"""
+        if iv is None:
+            return DES.new(self.key, DES.MODE_CBC)
+        return DES.new(self.key, DES.MODE_CBC, iv)
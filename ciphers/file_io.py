@@ -0,0 +1,247 @@
+"""
+File I/O Helpers
+Shared chunked reading utilities for the streaming cipher APIs
+"""
+
+import io
+
+from ciphers.instrumentation import stage
+
+# Default read size for streaming operations (multiple of every block size used)
+CHUNK_SIZE = 1024 * 1024
+
+
+def iter_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    """Yield successive chunks read from a binary file object"""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def read_exact(fileobj, size):
+    """Read exactly size bytes unless EOF is reached first (handles short pipe reads)"""
+    data = fileobj.read(size)
+    if not data or len(data) == size:
+        return data or b''
+    
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        chunk = fileobj.read(remaining)
+        if not chunk:
+            break
+        parts.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(parts)
+
+
+class CBCEncryptor:
+    """Incremental CBC encryption: feed chunks to update(), then call finalize() once
+    
+    new_cipher(iv) must return a CBC cipher (a random IV is used when iv is
+    None). The IV is exposed as .iv and must precede the ciphertext.
+    """
+    
+    def __init__(self, new_cipher, block_size):
+        self.cipher = new_cipher(None)
+        self.iv = self.cipher.iv
+        self.block_size = block_size
+        self.pending = b''
+    
+    def update(self, chunk):
+        """Encrypt every complete block available, keeping the remainder for later"""
+        pending = self.pending + chunk
+        usable = len(pending) - len(pending) % self.block_size
+        self.pending = pending[usable:]
+        return self.cipher.encrypt(pending[:usable]) if usable else b''
+    
+    def finalize(self):
+        """Encrypt the final (partial) block with PKCS#7 padding"""
+        with stage("pad", self.block_size):
+            pad_len = self.block_size - len(self.pending)
+            last = self.pending + bytes([pad_len]) * pad_len
+        return self.cipher.encrypt(last)
+
+
+class CBCDecryptor:
+    """Incremental decryption of IV + CBC ciphertext: feed chunks to update(), then finalize()"""
+    
+    def __init__(self, new_cipher, block_size):
+        self.new_cipher = new_cipher
+        self.cipher = None
+        self.block_size = block_size
+        self.pending = b''
+    
+    def update(self, chunk):
+        """Decrypt all but the last full block available, returning the plaintext so far"""
+        pending = self.pending + chunk
+        if self.cipher is None:
+            if len(pending) < self.block_size:
+                self.pending = pending
+                return b''
+            # Extract the IV before any ciphertext
+            self.cipher = self.new_cipher(pending[:self.block_size])
+            pending = pending[self.block_size:]
+        
+        # Always hold back the last full block so padding can be removed at the end
+        usable = len(pending) - len(pending) % self.block_size
+        if usable == len(pending):
+            usable -= self.block_size
+        if usable <= 0:
+            self.pending = pending
+            return b''
+        self.pending = pending[usable:]
+        return self.cipher.decrypt(pending[:usable])
+    
+    def finalize(self):
+        """Decrypt the held-back block and validate and strip its padding"""
+        block_size = self.block_size
+        if self.cipher is None or len(self.pending) != block_size:
+            raise ValueError("Ciphertext is truncated or not a multiple of the block size")
+        last = self.cipher.decrypt(self.pending)
+        with stage("pad", block_size):
+            pad_len = last[-1]
+            if pad_len < 1 or pad_len > block_size or last[-pad_len:] != bytes([pad_len]) * pad_len:
+                raise ValueError("Padding is incorrect.")
+            return last[:-pad_len]
+
+
+def encrypt_cbc_stream(new_cipher, chunks, block_size):
+    """Encrypt an iterable of byte chunks with CBC, yielding IV + ciphertext pieces
+    
+    new_cipher(iv) must return a CBC cipher (a random IV is used when iv is None).
+    """
+    encryptor = CBCEncryptor(new_cipher, block_size)
+    yield encryptor.iv
+    for chunk in chunks:
+        piece = encryptor.update(chunk)
+        if piece:
+            yield piece
+    yield encryptor.finalize()
+
+
+def decrypt_cbc_stream(new_cipher, chunks, block_size):
+    """Decrypt an iterable of IV + CBC ciphertext chunks, yielding plaintext pieces"""
+    decryptor = CBCDecryptor(new_cipher, block_size)
+    for chunk in chunks:
+        piece = decryptor.update(chunk)
+        if piece:
+            yield piece
+    yield decryptor.finalize()
+
+
+def _run_pipe(read, write, transform, counts):
+    """Drive transform over chunks from read(), timing the read, cipher and write stages"""
+    def chunks():
+        while True:
+            with stage("read") as timer:
+                chunk = read()
+                timer.size = len(chunk)
+            if not chunk:
+                break
+            counts[0] += len(chunk)
+            yield chunk
+    
+    pieces = transform(chunks())
+    while True:
+        # Reads pulled by the transform are nested stages and excluded from "cipher"
+        with stage("cipher") as timer:
+            piece = next(pieces, None)
+            timer.size = len(piece) if piece else 0
+        if piece is None:
+            break
+        with stage("write", len(piece)):
+            write(piece)
+        counts[1] += len(piece)
+    return counts[0], counts[1]
+
+
+def pipe(src, dst, transform, chunk_size=CHUNK_SIZE):
+    """Run a streaming transform from src to dst, returning (bytes read, bytes written)"""
+    return _run_pipe(lambda: src.read(chunk_size), dst.write, transform, [0, 0])
+
+
+def pipe_text(reader, writer, transform, chunk_size=CHUNK_SIZE):
+    """Run a streaming text transform from reader to writer, returning (chars read, chars written)"""
+    return _run_pipe(lambda: reader.read(chunk_size), writer.write, transform, [0, 0])
+
+
+class ProgressReader(io.RawIOBase):
+    """Read-only binary wrapper that reports the running byte count to a callback
+    
+    The callback is invoked after every read; raising from it aborts the
+    operation that is consuming the stream (used for cancellation).
+    """
+    
+    def __init__(self, raw, callback):
+        self.raw = raw
+        self.callback = callback
+        self.bytes_read = 0
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        if count:
+            self.bytes_read += count
+            self.callback(self.bytes_read)
+        return count
+    
+    def close(self):
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+class RangeReader(io.RawIOBase):
+    """Read-only, seekable file object over a random-access read_range(offset, length) function
+    
+    Every read maps directly to one read_range call, so only the data the
+    caller asks for is ever decrypted.
+    """
+    
+    def __init__(self, size, read_range):
+        self.size = size
+        self.read_range = read_range
+        self.position = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self.position
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence ({whence})")
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+    
+    def read(self, size=-1):
+        remaining = max(self.size - self.position, 0)
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        if size == 0:
+            return b''
+        data = self.read_range(self.position, size)
+        self.position += len(data)
+        return data
+    
+    def readall(self):
+        return self.read()
+    
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
@@ -0,0 +1,117 @@
+"""
+Cipher Handlers
+Stream and whole-file helpers for every cipher, shared by the CLI, batch mode and GUI.
+The registry names them on each CipherInfo, so front ends never dispatch on cipher names.
+"""
+
+import os
+
+from ciphers.atomic_io import DEFAULT_FSYNC, atomic_output
+from ciphers.file_io import pipe
+from ciphers.instrumentation import stage
+from ciphers.registry import get_cipher
+from ciphers.table_cache import cached_cipher
+
+# Read size for streaming the classical ciphers
+TEXT_CHUNK_SIZE = 1024 * 1024
+
+
+def aes_stream(key_bytes, operation, src, dst, mode="CBC", workers=None):
+    """Encrypt or decrypt a binary stream with AES, returning (bytes read, bytes written)"""
+    aes = get_cipher("aes").load()(key_bytes)
+    
+    if operation == "encrypt":
+        if mode == "CBC":
+            return aes.encrypt_fileobj(src, dst)
+        return aes.encrypt_fileobj_parallel(src, dst, mode, workers)
+    if mode == "CBC":
+        return aes.decrypt_fileobj(src, dst)
+    return aes.decrypt_fileobj_parallel(src, dst, mode, workers)
+
+
+def des_stream(key_bytes, operation, src, dst):
+    """Encrypt or decrypt a binary stream with DES, returning (bytes read, bytes written)"""
+    des = get_cipher("des").load()(key_bytes)
+    
+    if operation == "encrypt":
+        return des.encrypt_fileobj(src, dst)
+    return des.decrypt_fileobj(src, dst)
+
+
+def playfair_stream(table_content, operation, src, dst):
+    """Encrypt or decrypt a binary stream with Playfair in chunks, returning (bytes read, bytes written)"""
+    with stage("parse"):
+        playfair = cached_cipher("playfair", table_content)
+    transform = playfair.encrypt_bytes_stream if operation == "encrypt" else playfair.decrypt_bytes_stream
+    return pipe(src, dst, transform, TEXT_CHUNK_SIZE)
+
+
+def vigenere_stream(table_content, key, operation, src, dst):
+    """Encrypt or decrypt a binary stream with Vigenère in chunks, returning (bytes read, bytes written)"""
+    with stage("parse"):
+        vigenere = cached_cipher("vigenere", table_content, key)
+    transform = vigenere.encrypt_bytes_stream if operation == "encrypt" else vigenere.decrypt_bytes_stream
+    return pipe(src, dst, transform, TEXT_CHUNK_SIZE)
+
+
+def aes_file(key_bytes, operation, input_file, output_file, mode="CBC", fsync=DEFAULT_FSYNC,
+             workers=None):
+    """Encrypt or decrypt one file with AES, returning (bytes read, bytes written)
+    
+    Like every *_file helper, output_file is written atomically: it only
+    appears, complete, once the operation succeeds. workers caps the
+    threads or processes a helper may start (None: one per CPU).
+    """
+    # Stream binary chunks, never holding the whole file
+    with open(input_file, 'rb') as src, atomic_output(output_file, fsync) as dst:
+        return aes_stream(key_bytes, operation, src, dst, mode, workers)
+
+
+def des_file(key_bytes, operation, input_file, output_file, fsync=DEFAULT_FSYNC):
+    """Encrypt or decrypt one file with DES, returning (bytes read, bytes written)"""
+    des = get_cipher("des").load()(key_bytes)
+    
+    # Memory-mapped input and output, no intermediate copies
+    if operation == "encrypt":
+        return des.encrypt_file_mmap(input_file, output_file, fsync)
+    return des.decrypt_file_mmap(input_file, output_file, fsync)
+
+
+def playfair_file(table_content, operation, input_file, output_file, fsync=DEFAULT_FSYNC):
+    """Encrypt or decrypt one file with Playfair, returning (bytes read, bytes written)"""
+    # Stream raw bytes in chunks through the byte engine, never holding the whole file
+    with open(input_file, 'rb') as src, atomic_output(output_file, fsync) as dst:
+        return playfair_stream(table_content, operation, src, dst)
+
+
+def vigenere_file(table_content, key, operation, input_file, output_file, fsync=DEFAULT_FSYNC,
+                  workers=None):
+    """Encrypt or decrypt one file with Vigenère, returning (bytes read, bytes written)"""
+    with stage("parse"):
+        vigenere = cached_cipher("vigenere", table_content, key)
+    
+    # Huge inputs are sharded across processes through shared memory, or
+    # streamed in chunks when the caller has no workers to spare
+    from ciphers.vigenere_cipher import PARALLEL_MIN_SIZE
+    if os.path.getsize(input_file) >= PARALLEL_MIN_SIZE:
+        if workers == 1:
+            with open(input_file, 'rb') as src, atomic_output(output_file, fsync) as dst:
+                return vigenere_stream(table_content, key, operation, src, dst)
+        if operation == "encrypt":
+            return vigenere.encrypt_file_parallel(input_file, output_file, workers, fsync=fsync)
+        return vigenere.decrypt_file_parallel(input_file, output_file, workers, fsync=fsync)
+    
+    # Read message as raw bytes: no decode, uppercase copy or re-encode
+    with stage("read") as timer, open(input_file, 'rb') as f:
+        message = f.read()
+        timer.size = len(message)
+    
+    with stage("cipher", len(message)):
+        if operation == "encrypt":
+            result = vigenere.encrypt_bytes(message)
+        else:
+            result = vigenere.decrypt_bytes(message)
+    
+    with stage("write", len(result)), atomic_output(output_file, fsync) as f:
+        f.write(result)
+    return len(message), len(result)
@@ -0,0 +1,153 @@
+"""
+Instrumentation
+Opt-in per-stage timers and byte counters for cipher operations
+"""
+
+import json
+import threading
+import time
+
+# Stages reported by the front ends, in pipeline order
+STAGES = ("read", "parse", "pad", "cipher", "encode", "write")
+
+
+class _Stage:
+    """Context manager timing one stage; set .size to the bytes it handled"""
+
+    __slots__ = ("recorder", "name", "size", "start", "nested")
+
+    def __init__(self, recorder, name, size):
+        self.recorder = recorder
+        self.name = name
+        self.size = size
+        self.nested = 0.0
+
+    def __enter__(self):
+        self.recorder._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.recorder._stack()
+        stack.pop()
+        # Time spent in nested stages belongs to them, not to this one
+        if stack:
+            stack[-1].nested += elapsed
+        self.recorder.add(self.name, elapsed - self.nested, self.size)
+        return False
+
+
+class _NullStage:
+    """Shared no-op stage used while recording is disabled"""
+
+    size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Recorder:
+    """Thread-safe accumulator of calls, seconds and bytes per stage
+
+    Stages nest: the time of an inner stage is subtracted from the stage
+    around it on the same thread. Work done on pool threads is summed, so
+    stage seconds can exceed the wall-clock elapsed time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def stage(self, name, size=0):
+        """Return a context manager timing one occurrence of stage name"""
+        return _Stage(self, name, size)
+
+    def add(self, name, seconds, size=0):
+        """Record one occurrence of a stage measured elsewhere"""
+        with self._lock:
+            entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "bytes": 0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["bytes"] += size
+
+    def summary(self):
+        """Return the recorded stages as a JSON-serialisable dict"""
+        with self._lock:
+            stages = {name: dict(entry) for name, entry in self.stages.items()}
+        order = {name: i for i, name in enumerate(STAGES)}
+        return {
+            "elapsed": time.perf_counter() - self.started,
+            "stages": dict(sorted(stages.items(), key=lambda item: order.get(item[0], len(order)))),
+        }
+
+    def to_json(self):
+        """JSON summary of every stage"""
+        return json.dumps(self.summary(), indent=2)
+
+    def log_lines(self):
+        """One structured key=value log line per stage"""
+        summary = self.summary()
+        lines = []
+        for name, entry in summary["stages"].items():
+            lines.append(f"stage={name} calls={entry['calls']} seconds={entry['seconds']:.6f} "
+                         f"bytes={entry['bytes']}")
+        lines.append(f"stage=total seconds={summary['elapsed']:.6f}")
+        return lines
+
+    def format(self):
+        """Human-readable breakdown, one line per stage with its share of the elapsed time"""
+        summary = self.summary()
+        elapsed = max(summary["elapsed"], 1e-9)
+        lines = []
+        for name, entry in summary["stages"].items():
+            rate = ""
+            if entry["bytes"] and entry["seconds"] > 0:
+                rate = f", {entry['bytes'] / (1024 * 1024) / entry['seconds']:.2f} MB/s"
+            lines.append(f"{name:<7} {entry['seconds'] * 1000:9.2f} ms "
+                         f"({entry['seconds'] / elapsed:6.1%}) {entry['calls']} call(s), "
+                         f"{entry['bytes']} bytes{rate}")
+        lines.append(f"total   {summary['elapsed'] * 1000:9.2f} ms")
+        return lines
+
+
+_recorder = None
+
+
+def enable():
+    """Start recording into a fresh Recorder and return it"""
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def disable():
+    """Stop recording, returning the Recorder that was active (or None)"""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def active():
+    """Return the active Recorder, or None while instrumentation is off"""
+    return _recorder
+
+
+def stage(name, size=0):
+    """Time a stage on the active Recorder; a shared no-op while recording is off"""
+    recorder = _recorder
+    return recorder.stage(name, size) if recorder is not None else _NULL_STAGE
@@ -0,0 +1,212 @@
+"""
+Key Schedule Cache
+Bounded LRU of expanded block-cipher keys, and batched CBC built on top of them
+"""
+
+import base64
+
+from Crypto.Random import get_random_bytes
+from Crypto.Util.Padding import pad
+
+from ciphers.instrumentation import stage
+from ciphers.lru_cache import BoundedLRU
+
+# Number of (algorithm, key) schedules kept before the least recently used is evicted
+SCHEDULE_CACHE_SIZE = 64
+
+# Messages longer than this many blocks are encrypted with their own CBC object;
+# below it, stepping all messages block by block through one ECB call is cheaper
+LANE_MAX_BLOCKS = 16
+
+# Setting up a CBC object costs about as much as this many lane steps, so lanes
+# are only used while they save more setups than the steps they add
+CBC_SETUP_STEPS = 3
+
+
+class KeyScheduleCache(BoundedLRU):
+    """Thread-safe LRU of ECB cipher objects keyed by (algorithm, key)
+
+    An ECB object holds nothing but the expanded key schedule, so a single
+    instance can be shared by every cipher object (and thread) using that key.
+    """
+
+    def __init__(self, maxsize=SCHEDULE_CACHE_SIZE):
+        super().__init__(maxsize)
+
+    def get(self, module, key):
+        """Return the cached ECB cipher for key, expanding the key on a miss"""
+        return self.get_or_build((module.__name__, bytes(key)),
+                                 lambda: module.new(key, module.MODE_ECB))
+
+
+# Shared by all AESCipher and DESCipher instances
+schedules = KeyScheduleCache()
+
+
+def xor_bytes(a, b):
+    """XOR two equal-length byte strings"""
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+
+def cbc_encrypt_many(module, key, payloads, ivs):
+    """CBC-encrypt already padded payloads, each with its own IV, returning ciphertexts in order
+
+    Short messages are processed as lanes: block j of every message still
+    that long is chained and encrypted in a single ECB call, so the cost of
+    each call is spread over the whole batch.
+    """
+    block_size = module.block_size
+    results = [None] * len(payloads)
+    lanes = [i for i, payload in enumerate(payloads)
+             if len(payload) <= LANE_MAX_BLOCKS * block_size]
+    steps = max((len(payloads[i]) // block_size for i in lanes), default=0)
+    if len(lanes) * CBC_SETUP_STEPS <= steps:
+        lanes = []
+
+    lane_set = set(lanes)
+    for i, payload in enumerate(payloads):
+        if i not in lane_set:
+            results[i] = module.new(key, module.MODE_CBC, ivs[i]).encrypt(payload)
+    if not lanes:
+        return results
+
+    # Longest first, so the messages still active at each block form a prefix
+    lanes.sort(key=lambda i: -len(payloads[i]))
+    ecb = schedules.get(module, key)
+    chain = b''.join(ivs[i] for i in lanes)
+    outputs = []
+    active = len(lanes)
+    for offset in range(0, steps * block_size, block_size):
+        while len(payloads[lanes[active - 1]]) <= offset:
+            active -= 1
+        blocks = b''.join(payloads[i][offset:offset + block_size] for i in lanes[:active])
+        chain = ecb.encrypt(xor_bytes(chain[:active * block_size], blocks))
+        outputs.append(chain)
+
+    for lane, i in enumerate(lanes):
+        start = lane * block_size
+        count = len(payloads[i]) // block_size
+        results[i] = b''.join(output[start:start + block_size] for output in outputs[:count])
+    return results
+
+
+def cbc_decrypt_many(module, key, items):
+    """CBC-decrypt (iv, ciphertext) pairs, returning padded plaintexts in order
+
+    Every plaintext block is D(C[i]) XOR C[i-1], so the whole batch is
+    decrypted in one ECB call and one XOR against the shifted ciphertext.
+    Callers must check IV and ciphertext lengths beforehand.
+    """
+    data = b''.join(ct for _, ct in items)
+    if not data:
+        return [b''] * len(items)
+
+    # The previous ciphertext block of every block: the IV, then the ciphertext shifted by one
+    previous = b''.join((iv + ct)[:len(ct)] for iv, ct in items)
+    plain = xor_bytes(schedules.get(module, key).decrypt(data), previous)
+
+    results = []
+    start = 0
+    for _, ct in items:
+        results.append(plain[start:start + len(ct)])
+        start += len(ct)
+    return results
+
+
+# PKCS#7 padding strings indexed by their length
+_PADDINGS = [bytes([length]) * length for length in range(256)]
+
+
+def strip_pkcs7(data, block_size):
+    """Remove PKCS#7 padding from a decrypted message, raising ValueError if it is malformed"""
+    pad_len = data[-1] if data else 0
+    if not 0 < pad_len <= block_size or not data.endswith(_PADDINGS[pad_len]):
+        raise ValueError("Padding is incorrect.")
+    return data[:-pad_len]
+
+
+def check_cbc_lengths(module, iv, ciphertext):
+    """Raise ValueError, as PyCryptodome's CBC mode would, for a bad IV or ciphertext length"""
+    if len(iv) != module.block_size:
+        raise ValueError(f"Incorrect IV length (it must be {module.block_size} bytes long)")
+    if len(ciphertext) % module.block_size:
+        raise ValueError(f"Data must be padded to {module.block_size} byte boundary in CBC mode")
+
+
+def random_ivs(block_size, count):
+    """Return count random IVs, drawn from the RNG in a single call"""
+    random = get_random_bytes(block_size * count)
+    return [random[i:i + block_size] for i in range(0, len(random), block_size)]
+
+
+def encode_message(iv, ciphertext):
+    """Format an IV and ciphertext as the base64 "iv:ct" string of the text API"""
+    return base64.b64encode(iv).decode('utf-8') + ':' + base64.b64encode(ciphertext).decode('utf-8')
+
+
+def encrypt_many(module, key, plaintexts):
+    """Encrypt text messages in CBC mode, returning "iv:ct" strings in order
+
+    Short messages are encrypted together on the cached key schedule, so
+    per-message setup is paid once per batch. Longer ones gain nothing
+    from batching and each get their own CBC object.
+    """
+    block_size = module.block_size
+    results = [None] * len(plaintexts)
+    short, payloads = [], []
+    with stage("pad"):
+        for i, plaintext in enumerate(plaintexts):
+            if len(plaintext) < LANE_MAX_BLOCKS * block_size:
+                short.append(i)
+                payloads.append(pad(plaintext.encode(), block_size))
+    with stage("cipher", sum(map(len, payloads))):
+        ivs = random_ivs(block_size, len(payloads))
+        cts = cbc_encrypt_many(module, key, payloads, ivs)
+    with stage("encode"):
+        for i, iv, ct in zip(short, ivs, cts):
+            results[i] = encode_message(iv, ct)
+
+    long = [i for i, result in enumerate(results) if result is None]
+    with stage("cipher", sum(len(plaintexts[i]) for i in long)):
+        for i in long:
+            cipher = module.new(key, module.MODE_CBC)
+            results[i] = encode_message(cipher.iv, cipher.encrypt(pad(plaintexts[i].encode(), block_size)))
+    return results
+
+
+def decrypt_many(module, key, ciphertexts):
+    """Decrypt "iv:ct" strings in CBC mode, returning text messages in order
+
+    A message that cannot be decrypted yields a "Decryption failed: ..."
+    string instead of stopping the batch, as the single-message decrypt does.
+    """
+    results = [None] * len(ciphertexts)
+    indices, items = [], []
+    with stage("encode"):
+        for i, ciphertext in enumerate(ciphertexts):
+            try:
+                iv, ct = ciphertext.split(':')
+                iv = base64.b64decode(iv)
+                ct = base64.b64decode(ct)
+                check_cbc_lengths(module, iv, ct)
+            except Exception as e:
+                results[i] = f"Decryption failed: {str(e)}"
+                continue
+            indices.append(i)
+            items.append((iv, ct))
+
+    try:
+        with stage("cipher", sum(len(ct) for _, ct in items)):
+            padded = cbc_decrypt_many(module, key, items)
+    except Exception as e:
+        for i in indices:
+            results[i] = f"Decryption failed: {str(e)}"
+        return results
+
+    with stage("pad"):
+        for i, data in zip(indices, padded):
+            try:
+                results[i] = strip_pkcs7(data, module.block_size).decode('utf-8')
+            except Exception as e:
+                results[i] = f"Decryption failed: {str(e)}"
+    return results
@@ -0,0 +1,50 @@
+"""
+Bounded LRU Cache
+Thread-safe least-recently-used cache behind the key schedule and table caches
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class BoundedLRU:
+    """Thread-safe LRU of values built on demand, holding at most maxsize entries
+
+    Values are built outside the lock, so a slow build never blocks hits; a
+    concurrent miss on the same key just builds it twice. A build that
+    raises caches nothing.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Return the value cached under key, calling build() to create it on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every cached value and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
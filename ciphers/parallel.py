@@ -0,0 +1,46 @@
+"""
+Parallel Execution Helpers
+Ordered, bounded fan-out of independent cipher work across a worker pool
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def default_workers():
+    """Return the default worker count (one per CPU core)"""
+    return os.cpu_count() or 1
+
+
+def worker_budget(pool_workers):
+    """Return the workers each of pool_workers concurrent jobs may use without oversubscribing the CPUs"""
+    return max(1, default_workers() // max(1, pool_workers))
+
+
+def map_ordered(func, items, workers=None, executor=None):
+    """Apply func to each argument tuple in items on a pool, yielding results in order
+    
+    At most 2 * workers items are in flight at any time, so the input is
+    consumed lazily and memory stays bounded for arbitrarily long streams.
+    PyCryptodome releases the GIL inside its C primitives, so a thread pool
+    is enough to keep every core busy.
+    """
+    workers = workers or default_workers()
+    owned = executor is None
+    if owned:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    
+    pending = deque()
+    try:
+        for args in items:
+            pending.append(executor.submit(func, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown(wait=True)
@@ -2,27 +2,69 @@
 Playfair Cipher Implementation
 Classical digraph substitution cipher using a 5x5 matrix
 """
+import re
+import string
+import sys
+from array import array
+
+# A doubled letter starting a digraph is where the filler 'X' is inserted,
+# after which the letters split into plain consecutive pairs
+_BYTE_DOUBLES = re.compile(rb'(?=(.)\1)', re.DOTALL)
+
+# Cell index of bytes that are not in the matrix
+_NO_CELL = 255
+_NO_CELL_BYTE = bytes([_NO_CELL])
+
+# Entries of a flat digraph table: two cell indexes (0-24) read as one native 16-bit word
+_PAIR_SPAN = 24 * 256 + 24 + 1
+
+# ASCII normalization in one pass: uppercase, J merged into I, non-letters deleted
+_ASCII_LETTERS = str.maketrans(
+    string.ascii_lowercase + string.ascii_uppercase,
+    string.ascii_uppercase.replace('J', 'I') * 2,
+    ''.join(chr(c) for c in range(128) if not chr(c).isalpha()))
+
+# The same normalization as a 256-entry byte table plus the bytes it deletes
+_BYTE_LETTERS = bytes.maketrans(
+    (string.ascii_lowercase + string.ascii_uppercase).encode(),
+    string.ascii_uppercase.replace('J', 'I').encode() * 2)
+_BYTE_NON_LETTERS = bytes(c for c in range(256) if not chr(c).isascii() or not chr(c).isalpha())
+
+
 class PlayfairCipher:
+    # The matrix is 25 ASCII bytes and the digraph tables are flat arrays, with
+    # no per-instance __dict__: thousands of keyed instances stay small
+    __slots__ = ("key", "_cells", "_index", "_encrypt_pairs", "_decrypt_pairs", "_views")
+
     def __init__(self, key=None, matrix=None):
-        """Initialize cipher either from a key or an explicit 5x5 matrix."""
+        """Initialize cipher either from a key or an explicit 5x5 matrix (rows or 25 letters)."""
         if matrix is not None:
             # If given a matrix, skip key processing
-            self.matrix = matrix
+            cells = ''.join(''.join(row) for row in matrix)
             self.key = ""
         else:
             # Normalize key: ensure uppercase and merge J->I
             self.key = (key or "").upper().replace("J", "I")
-            self.matrix = self._create_matrix()
+            cells = self._create_matrix()
+        if len(cells) != 25 or not (cells.isascii() and cells.isalpha()):
+            raise ValueError("Matrix must contain exactly 25 letters A-Z")
+        
+        self._cells = cells.upper().encode('ascii')
+        self._index = self._create_index()
+        # Digraph tables are built on first use of each direction
+        self._encrypt_pairs = None
+        self._decrypt_pairs = None
+        self._views = None
 
     def _create_matrix(self):
-        """Construct the 5x5 key matrix using the processed key."""
+        """Construct the 25 cells of the key matrix, row by row, using the processed key."""
         # Playfair uses a 25-letter alphabet: J removed, merged with I
         alphabet = "ABCDEFGHIKLMNOPQRSTUVWXYZ"
         used = []  # ordered list of characters to form the matrix
 
         # Insert key letters first, ignoring duplicates and non-letters
         for c in self.key:
-            if c.isalpha() and c not in used:
+            if c.isascii() and c.isalpha() and c not in used:
                 used.append(c)
 
         # Append remaining alphabet letters not already included by the key
@@ -30,88 +72,201 @@ class PlayfairCipher:
             if c not in used:
                 used.append(c)
 
-        # Split into 5 rows of 5 columns each
-        matrix = []
-        for i in range(5):
-            row = used[i*5 : (i+1)*5]
-            matrix.append(row)
+        return ''.join(used[:25])
+
+    def _create_index(self):
+        """256-entry table from each byte to its cell (first occurrence), _NO_CELL elsewhere."""
+        index = bytearray([_NO_CELL]) * 256
+        for i, c in enumerate(self._cells):
+            if index[c] == _NO_CELL:
+                index[c] = i
+        return bytes(index)
 
-        return matrix
+    def _create_pair_table(self, shift):
+        """Flat digraph table (shift=1 encrypts, shift=-1 decrypts).
+
+        Entry [cell pair] is the translated letter pair, both read as native
+        16-bit words, so a buffer of cell indexes translates with one map().
+        """
+        cells = self._cells
+        table = array('H', bytes(2 * _PAIR_SPAN))
+        for a in range(25):
+            row1, col1 = divmod(a, 5)
+            for b in range(25):
+                row2, col2 = divmod(b, 5)
+                if row1 == row2:  # Same row
+                    out = (row1 * 5 + (col1 + shift) % 5, row2 * 5 + (col2 + shift) % 5)
+                elif col1 == col2:  # Same column
+                    out = (((row1 + shift) % 5) * 5 + col1, ((row2 + shift) % 5) * 5 + col2)
+                else:  # Rectangle
+                    out = (row1 * 5 + col2, row2 * 5 + col1)
+                pair = int.from_bytes(bytes((a, b)), sys.byteorder)
+                table[pair] = int.from_bytes(bytes((cells[out[0]], cells[out[1]])), sys.byteorder)
+        return table
+
+    def _pair_table(self, decrypt):
+        """Digraph table for one direction, built on first use"""
+        if decrypt:
+            if self._decrypt_pairs is None:
+                self._decrypt_pairs = self._create_pair_table(-1)
+            return self._decrypt_pairs
+        if self._encrypt_pairs is None:
+            self._encrypt_pairs = self._create_pair_table(1)
+        return self._encrypt_pairs
+
+    def _view(self, name, build):
+        """Lazily built compatibility view, kept once requested"""
+        if self._views is None:
+            self._views = {}
+        if name not in self._views:
+            self._views[name] = build()
+        return self._views[name]
+
+    @property
+    def matrix(self):
+        """The matrix as 5 lists of 5 letters (compatibility view)."""
+        cells = self._cells.decode('ascii')
+        return self._view("matrix", lambda: [list(cells[i:i + 5]) for i in range(0, 25, 5)])
+
+    @property
+    def positions(self):
+        """Dict from each matrix letter to its (row, col) (compatibility view)."""
+        return self._view("positions", lambda: {chr(c): divmod(i, 5) for c, i in enumerate(self._index)
+                                                 if i != _NO_CELL})
+
+    @property
+    def encrypt_table(self):
+        """Dict from every digraph to its encryption (compatibility view)."""
+        return self._view("encrypt_table", lambda: self._pair_dict(decrypt=False))
+
+    @property
+    def decrypt_table(self):
+        """Dict from every digraph to its decryption (compatibility view)."""
+        return self._view("decrypt_table", lambda: self._pair_dict(decrypt=True))
+
+    def _pair_dict(self, decrypt):
+        """Expand a flat digraph table into a dict keyed by letter pairs."""
+        letters = [chr(c) for c, i in enumerate(self._index) if i != _NO_CELL]
+        pairs = [a + b for a in letters for b in letters]
+        out = self._translate_pairs(''.join(pairs).encode('ascii'), decrypt).decode('ascii')
+        return {pair: out[2 * i:2 * i + 2] for i, pair in enumerate(pairs)}
 
     def _find_position(self, char):
         """Return (row, col) for the given character inside the matrix."""
-        for i, row in enumerate(self.matrix):
-            for j, c in enumerate(row):
-                if c == char:
-                    return i, j
-        return None
+        return self.positions.get(char)
+
+    def _letters(self, text):
+        """Uppercase text, merge J into I and drop everything that is not a letter."""
+        if text.isascii():
+            return text.translate(_ASCII_LETTERS)
+        return ''.join(c for c in text.upper().replace('J', 'I') if c.isalpha())
+
+    def _encode(self, text):
+        """ASCII bytes of text; any other character cannot be in the matrix."""
+        try:
+            return text.encode('ascii')
+        except UnicodeEncodeError as e:
+            raise ValueError(f"Character {e.object[e.start]!r} is outside the Playfair matrix")
+
+    def _translate_pairs(self, letters, decrypt):
+        """Translate an even-length byte string pair by pair through the flat digraph table."""
+        indexes = letters.translate(self._index)
+        if _NO_CELL_BYTE in indexes:
+            start = indexes.index(_NO_CELL_BYTE) // 2 * 2
+            raise ValueError(f"Digraph {letters[start:start + 2].decode('latin-1')!r} contains "
+                             f"characters outside the Playfair matrix")
+        table = self._pair_table(decrypt)
+        return array('H', [table[pair] for pair in memoryview(indexes).cast('H')]).tobytes()
+
+    def _fill_bytes(self, data):
+        """Normalize bytes through the 256-entry table and insert the 'X' fillers.
+
+        Only a doubled letter at the start of a digraph changes the pairing,
+        so fillers go in there and the rest splits two by two. A final
+        unpaired letter is left for the caller to pad or carry.
+        """
+        letters = bytes(data).translate(_BYTE_LETTERS, _BYTE_NON_LETTERS)
+        parts = []
+        start = 0
+        for match in _BYTE_DOUBLES.finditer(letters):
+            i = match.start()
+            if i >= start and (i - start) % 2 == 0:
+                parts.append(letters[start:i + 1])
+                start = i + 1
+        if not parts:
+            return letters
+        parts.append(letters[start:])
+        return b'X'.join(parts)
 
     def _prepare_text(self, text):
-        """Normalize and split text into digraphs according to Playfair rules."""
-        text = text.upper().replace('J', 'I').replace(' ', '')
-        prepared = ""
-        
-        i = 0
-        while i < len(text):
-            if not text[i].isalpha():
-                i += 1
-                continue
-            
-            prepared += text[i]
-            
-            if i + 1 < len(text):
-                if text[i] == text[i + 1]:
-                    prepared += 'X'
-                else:
-                    prepared += text[i + 1]
-                    i += 1
-            else:
-                prepared += 'X'
-            
-            i += 1
-        
-        return prepared
+        """Normalize text and insert fillers, giving the digraphs as one string."""
+        filled = self._fill_bytes(self._encode(self._letters(text)))
+        return (filled + b'X' * (len(filled) % 2)).decode('ascii')
 
     def encrypt(self, plaintext):
         """Encrypt digraphs according to Playfair transformation rules."""
-        plaintext = self._prepare_text(plaintext)
-        ciphertext = ""
-        
-        for i in range(0, len(plaintext), 2):
-            row1, col1 = self._find_position(plaintext[i])
-            row2, col2 = self._find_position(plaintext[i + 1])
-            
-            if row1 == row2:  # Same row
-                ciphertext += self.matrix[row1][(col1 + 1) % 5]
-                ciphertext += self.matrix[row2][(col2 + 1) % 5]
-            elif col1 == col2:  # Same column
-                ciphertext += self.matrix[(row1 + 1) % 5][col1]
-                ciphertext += self.matrix[(row2 + 1) % 5][col2]
-            else:  # Rectangle
-                ciphertext += self.matrix[row1][col2]
-                ciphertext += self.matrix[row2][col1]
-        
-        return ciphertext
+        return self.encrypt_bytes(self._encode(self._letters(plaintext))).decode('ascii')
 
     def decrypt(self, ciphertext):
         """Decrypt digraphs according to reversed Playfair rules."""
-        plaintext = ""
-        
-        for i in range(0, len(ciphertext), 2):
-            row1, col1 = self._find_position(ciphertext[i])
-            row2, col2 = self._find_position(ciphertext[i + 1])
-            
-            if row1 == row2:  # Same row
-                plaintext += self.matrix[row1][(col1 - 1) % 5]
-                plaintext += self.matrix[row2][(col2 - 1) % 5]
-            elif col1 == col2:  # Same column
-                plaintext += self.matrix[(row1 - 1) % 5][col1]
-                plaintext += self.matrix[(row2 - 1) % 5][col2]
-            else:  # Rectangle
-                plaintext += self.matrix[row1][col2]
-                plaintext += self.matrix[row2][col1]
-        
-        return plaintext
+        return self.decrypt_bytes(self._encode(ciphertext)).decode('ascii')
+
+    def encrypt_bytes(self, data):
+        """Encrypt bytes, bytearray or memoryview input without decoding it, returning bytes.
+
+        ASCII letters of either case are used (J merged into I); every other
+        byte is dropped, exactly as encrypt() does for ASCII text.
+        """
+        filled = self._fill_bytes(data)
+        if len(filled) % 2:
+            filled += b'X'
+        return self._translate_pairs(filled, decrypt=False)
+
+    def decrypt_bytes(self, data):
+        """Decrypt bytes, bytearray or memoryview input without decoding it, returning bytes."""
+        if len(data) % 2:
+            raise ValueError("Ciphertext must contain an even number of characters")
+        return self._translate_pairs(bytes(data), decrypt=True)
+
+    def encrypt_stream(self, chunks):
+        """Encrypt an iterable of text chunks, yielding ciphertext as it is produced.
+
+        A trailing unpaired letter is carried into the next chunk, so doubled
+        letters and the 'X' filler are handled exactly as by encrypt().
+        """
+        letters = (self._encode(self._letters(chunk)) for chunk in chunks)
+        for piece in self.encrypt_bytes_stream(letters):
+            yield piece.decode('ascii')
+
+    def decrypt_stream(self, chunks):
+        """Decrypt an iterable of ciphertext chunks, carrying half digraphs across chunks."""
+        for piece in self.decrypt_bytes_stream(self._encode(chunk) for chunk in chunks):
+            yield piece.decode('ascii')
+
+    def encrypt_bytes_stream(self, chunks):
+        """Encrypt an iterable of byte chunks, carrying a trailing unpaired letter across chunks."""
+        carry = b''
+        for chunk in chunks:
+            filled = self._fill_bytes(carry + bytes(chunk))
+            # A single letter at the very end may still pair with the next chunk
+            cut = len(filled) - len(filled) % 2
+            carry = filled[cut:]
+            if cut:
+                yield self._translate_pairs(filled[:cut], decrypt=False)
+        if carry:
+            yield self._translate_pairs(carry + b'X', decrypt=False)
+
+    def decrypt_bytes_stream(self, chunks):
+        """Decrypt an iterable of byte chunks, carrying half digraphs across chunks."""
+        carry = b''
+        for chunk in chunks:
+            data = carry + bytes(chunk)
+            cut = len(data) - len(data) % 2
+            carry = data[cut:]
+            if cut:
+                yield self.decrypt_bytes(data[:cut])
+        if carry:
+            raise ValueError("Ciphertext must contain an even number of characters")
 
     @classmethod
     def from_matrix(cls, table_content):
@@ -123,9 +278,5 @@ class PlayfairCipher:
         if len(chars) != 25:
             raise ValueError(f"Table must contain exactly 25 alphabetic characters, got {len(chars)}")
         
-        # Create 5x5 matrix
-        matrix = []
-        for i in range(5):
-            matrix.append(list(chars[i*5:(i+1)*5]))
-        
-        return cls(matrix=matrix)
+        # The 25 cells are stored flat, row by row
+        return cls(matrix=chars)
@@ -0,0 +1,136 @@
+"""
+Cipher Registry
+Maps cipher names to their backends, handlers, capabilities and key requirements.
+Backends are imported on first use, so front ends only pay for the ciphers they run.
+"""
+
+import importlib
+
+
+def _resolve(spec):
+    """Import a "module:attribute" reference and return the attribute"""
+    module, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+class CipherInfo:
+    """Registry entry describing one cipher backend
+
+    Handlers are "module:function" references, imported on first use:
+    file_handler(*settings, operation, input_file, output_file, fsync=..., **options)
+    and, for streaming ciphers, stream_handler(*settings, operation, src, dst, **options),
+    where (settings, options) come from main.load_settings. The file handler
+    of a "parallel" cipher also takes workers=, its budget of CPU workers
+    (1: no extra workers), so callers already running in a pool do not nest
+    another full-size one. factory names the class method building an
+    instance from the same settings (the class itself when None).
+    """
+
+    def __init__(self, name, title, module, class_name, capabilities, file_handler,
+                 stream_handler=None, factory=None, key_sizes=None, needs_key=True,
+                 needs_table=False, modes=(), hint=""):
+        self.name = name
+        self.title = title
+        self.module = module
+        self.class_name = class_name
+        self.capabilities = frozenset(capabilities)
+        if self.streaming and stream_handler is None:
+            raise ValueError(f"Streaming cipher '{name}' needs a stream handler")
+        self.file_handler = file_handler
+        self.stream_handler = stream_handler
+        self.factory = factory
+        self.key_sizes = tuple(key_sizes) if key_sizes else None  # None: any length
+        self.needs_key = needs_key
+        self.needs_table = needs_table
+        self.modes = tuple(modes)
+        self.hint = hint
+        self._cls = None
+
+    @property
+    def binary(self):
+        """True if the cipher processes arbitrary bytes rather than ASCII text"""
+        return "binary" in self.capabilities
+
+    @property
+    def streaming(self):
+        """True if the cipher can process a stream (such as a pipe) in chunks"""
+        return "streaming" in self.capabilities
+
+    @property
+    def parallel(self):
+        """True if the cipher's file handler can spread one file across several workers"""
+        return "parallel" in self.capabilities
+
+    def load(self):
+        """Import the backend module on first use and return the cipher class"""
+        if self._cls is None:
+            self._cls = getattr(importlib.import_module(self.module), self.class_name)
+        return self._cls
+
+    def load_file_handler(self):
+        """Return the function processing one input file into one output file"""
+        return _resolve(self.file_handler)
+
+    def load_stream_handler(self):
+        """Return the function processing a binary stream, or None if the cipher cannot stream"""
+        return _resolve(self.stream_handler) if self.stream_handler else None
+
+    def create(self, *settings):
+        """Build a cipher instance from the settings returned by main.load_settings"""
+        cls = self.load()
+        return getattr(cls, self.factory)(*settings) if self.factory else cls(*settings)
+
+    def validate_key(self, key_bytes):
+        """Raise ValueError if key_bytes has a length this cipher does not accept"""
+        if self.key_sizes and len(key_bytes) not in self.key_sizes:
+            sizes = ", ".join(str(size) for size in self.key_sizes[:-1])
+            expected = f"{sizes}, or {self.key_sizes[-1]}" if sizes else f"exactly {self.key_sizes[0]}"
+            raise ValueError(f"{self.name.upper()} key must be {expected} bytes. "
+                             f"Current: {len(key_bytes)} bytes")
+
+
+_REGISTRY = {}
+
+
+def register(info):
+    """Add (or replace) a cipher in the registry"""
+    _REGISTRY[info.name] = info
+    return info
+
+
+def get_cipher(name):
+    """Return the registry entry for name, raising ValueError if it is unknown"""
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown cipher '{name}'")
+
+
+def available_ciphers():
+    """Return every registered cipher in registration order"""
+    return list(_REGISTRY.values())
+
+
+register(CipherInfo(
+    "aes", "AES (Advanced Encryption Standard)", "ciphers.aes_cipher", "AESCipher",
+    {"binary", "streaming", "parallel"}, "ciphers.handlers:aes_file",
+    stream_handler="ciphers.handlers:aes_stream", key_sizes=(16, 24, 32),
+    modes=("CBC", "CTR", "GCM"), hint="Key must be 16, 24, or 32 bytes"))
+
+register(CipherInfo(
+    "des", "DES (Data Encryption Standard)", "ciphers.des_cipher", "DESCipher",
+    {"binary", "streaming"}, "ciphers.handlers:des_file",
+    stream_handler="ciphers.handlers:des_stream", key_sizes=(8,),
+    modes=("CBC",), hint="Key must be exactly 8 bytes"))
+
+register(CipherInfo(
+    "playfair", "Playfair Cipher", "ciphers.playfair_cipher", "PlayfairCipher",
+    {"text", "streaming"}, "ciphers.handlers:playfair_file",
+    stream_handler="ciphers.handlers:playfair_stream", factory="from_matrix",
+    needs_key=False, needs_table=True, hint="Table file required (5x5 matrix)"))
+
+register(CipherInfo(
+    "vigenere", "Vigenère Cipher", "ciphers.vigenere_cipher", "VigenereCipher",
+    {"text", "streaming", "parallel"}, "ciphers.handlers:vigenere_file",
+    stream_handler="ciphers.handlers:vigenere_stream", factory="from_settings",
+    needs_table=True, hint="Table file (26x26) and key file required"))
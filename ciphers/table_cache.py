@@ -0,0 +1,57 @@
+"""
+Table Cache
+Bounded LRU of parsed Playfair and Vigenère ciphers, keyed by a hash of their table and key
+"""
+
+import hashlib
+
+from ciphers.lru_cache import BoundedLRU
+from ciphers.registry import get_cipher
+
+# Number of prepared (cipher, table, key) instances kept before the least recently used is evicted
+TABLE_CACHE_SIZE = 32
+
+
+def _digest(name, table_content, key):
+    """Content hash identifying one cipher/table/key combination, wherever the files live"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (name, table_content, key or ""):
+        data = part.encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.digest()
+
+
+def _build(name, table_content, key):
+    """Parse a table (and key) into a new cipher instance"""
+    info = get_cipher(name)
+    return info.create(table_content, key) if info.needs_key else info.create(table_content)
+
+
+class TableCache(BoundedLRU):
+    """Thread-safe LRU of fully prepared table ciphers keyed by content hash
+
+    Instances are only read while encrypting, so one instance (and the
+    lookup tables it builds lazily) is shared by every caller and thread
+    using the same table and key.
+    """
+
+    def __init__(self, maxsize=TABLE_CACHE_SIZE):
+        super().__init__(maxsize)
+
+    def get(self, name, table_content, key=None):
+        """Return the cached cipher for this table and key, parsing them on a miss
+
+        Invalid tables raise ValueError and are not cached.
+        """
+        return self.get_or_build(_digest(name, table_content, key),
+                                 lambda: _build(name, table_content, key))
+
+
+# Shared by the CLI, batch mode and GUI
+tables = TableCache()
+
+
+def cached_cipher(name, table_content, key=None):
+    """Return a prepared Playfair (table only) or Vigenère (table and key) cipher from the shared cache"""
+    return tables.get(name, table_content, key)
@@ -3,30 +3,142 @@ Vigenère Cipher Implementation
 Classical polyalphabetic substitution cipher
 """
 
-class VigenereCipher:
-    def __init__(self, key, table=None):
-        """Initialize Vigenère cipher with a key and optional custom table"""
-        self.key = key.upper()
-        self.table = table if table is not None else self._create_standard_table()
+import importlib.util
+import os
+import re
+import string
+from itertools import accumulate
+
+from ciphers.atomic_io import DEFAULT_FSYNC, atomic_output
+from ciphers.instrumentation import stage
+
+# NumPy is optional and only imported the first time the vectorized engine runs
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
+
+
+def _load_numpy():
+    """Import NumPy on first use of the vectorized engine"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+# Engines accepted by VigenereCipher: "auto" picks NumPy for large ASCII inputs
+ENGINES = ("auto", "python", "numpy")
+
+# Minimum text length for which "auto" switches to the NumPy engine
+NUMPY_MIN_LENGTH = 4096
+
+# 256-entry byte tables: ASCII case folding (everything else unchanged), and the
+# bytes deleted to keep only letters. Bytes outside A-Z/a-z pass through the cipher.
+_ASCII_UPPER = bytes.maketrans(string.ascii_lowercase.encode(), string.ascii_uppercase.encode())
+_NON_LETTERS = bytes(c for c in range(256) if not chr(c).isascii() or not chr(c).isalpha())
+
+# Splits upper-cased bytes into alternating letter runs and non-letter separators
+_SEPARATORS = re.compile(rb'([^A-Z]+)')
+
+# Bytes per shard of the multiprocess engine, and the input size from which the
+# file helpers use it (below that, process start-up costs more than it saves)
+SHARD_SIZE = 16 * 1024 * 1024
+PARALLEL_MIN_SIZE = 64 * 1024 * 1024
+
+
+def count_letters(data):
+    """Number of ASCII letters in a bytes-like object, i.e. the key positions it consumes"""
+    return len(bytes(data).translate(None, _NON_LETTERS))
+
+
+# Tables are stored as 676 ASCII bytes, row-major: cell [row * 26 + col]
+ALPHABET = string.ascii_uppercase.encode()
+_STANDARD_CELLS = b''.join(ALPHABET[i:] + ALPHABET[:i] for i in range(26))
+
+
+def _pack_table(table):
+    """Flatten a table given as 26 rows or 676 cells into bytes, validating every row"""
+    if isinstance(table, (str, bytes, bytearray, memoryview)):
+        cells = table.encode('ascii', 'replace') if isinstance(table, str) else bytes(table)
+        if len(cells) != 676:
+            raise ValueError(f"Table must contain exactly 676 cells (26x26), got {len(cells)}")
+        rows = [cells[i * 26:(i + 1) * 26] for i in range(26)]
+    else:
+        rows = [''.join(row).encode('ascii', 'replace') for row in table]
+        if len(rows) != 26:
+            raise ValueError(f"Table must have 26 rows, got {len(rows)}")
     
-    def _create_standard_table(self):
-          """Create standard Vigenère table (26x26)"""
+    for i, row in enumerate(rows):
+        # Decryption is only well defined if each row is a permutation of A-Z
+        if bytes(sorted(row)) != ALPHABET:
+            raise ValueError(f"Table row {i + 1} must contain each letter A-Z exactly once")
+    return b''.join(rows)
+
+
+def _invert_table(cells):
+    """Inverse table in the same layout: cell [row * 26 + ciphertext letter] is the plaintext letter"""
+    return b''.join(ALPHABET.translate(bytes.maketrans(cells[i:i + 26], ALPHABET))
+                    for i in range(0, 676, 26))
+
 
-          table = []
+_STANDARD_INVERSE = _invert_table(_STANDARD_CELLS)
 
-          for i in range(26):
-                    row = []
-                    for j in range(26):
-                        row.append(chr((i + j) % 26 + ord('A')))
-                    table.append(row)
-          return table
+
+class VigenereCipher:
+    # Flat bytes tables and no per-instance __dict__: thousands of keyed
+    # instances stay small, and a lookup is a single index into bytes
+    __slots__ = ("key", "engine", "_cells", "_inverse", "_table_view", "_inverse_view",
+                 "_np_tables", "_byte_tables")
     
+    def __init__(self, key, table=None, engine="auto"):
+        """Initialize Vigenère cipher with a key, optional custom table and engine
+        
+        table may be 26 rows of 26 letters, or the 676 cells as str or bytes.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+        if engine == "numpy" and not HAS_NUMPY:
+            raise ImportError("The numpy engine requires NumPy to be installed")
         
+        self.key = key.upper()
+        if table is None:
+            # Every instance with the standard table shares the same two objects
+            self._cells, self._inverse = _STANDARD_CELLS, _STANDARD_INVERSE
+        else:
+            self._cells = _pack_table(table)
+            self._inverse = _invert_table(self._cells)
+        self.engine = engine
+        self._table_view = None
+        self._inverse_view = None
+        self._np_tables = None
+        self._byte_tables = None
+    
+    @property
+    def table(self):
+        """The table as 26 lists of 26 letters, built on first access (compatibility view)"""
+        if self._table_view is None:
+            cells = self._cells.decode('ascii')
+            self._table_view = [list(cells[i:i + 26]) for i in range(0, 676, 26)]
+        return self._table_view
     
-    def _extend_key(self, text):
-         """Extend key to match text length"""
+    @property
+    def inverse_table(self):
+        """Per-row dicts from ciphertext to plaintext letter, built on first access (compatibility view)"""
+        if self._inverse_view is None:
+            inverse = self._inverse.decode('ascii')
+            self._inverse_view = [{chr(ord('A') + c): inverse[i + c] for c in range(26)}
+                                  for i in range(0, 676, 26)]
+        return self._inverse_view
+    
+    def _row(self, key_char):
+        """Table row offset (row * 26) of a key letter"""
+        row = ord(key_char) - ord('A')
+        if not 0 <= row < 26:
+            raise ValueError(f"Key character '{key_char}' is not a letter A-Z")
+        return row * 26
+    
+    def _extend_key(self, text, key_index=0):
+         """Extend key to match text length, starting at key position key_index"""
          key = ""
-         key_index = 0
          
          for char in text:
             if char.isalpha():
@@ -37,46 +149,279 @@ class VigenereCipher:
         
          return key
     
-    def encrypt(self, plaintext):
-        """Encrypt plaintext using Vigenère cipher"""
+    def _use_numpy(self, text):
+        """Decide whether the NumPy engine can and should process text"""
+        if self.engine == "python" or not HAS_NUMPY:
+            return False
+        if self.engine == "auto" and len(text) < NUMPY_MIN_LENGTH:
+            return False
+        # The vectorized path covers ASCII text with an A-Z key and an ASCII table
+        return text.isascii() and self._numpy_tables() is not None
+    
+    def _use_translate(self, text):
+        """ASCII text with an A-Z key goes through the byte translate tables instead of the char loop"""
+        key = self.key
+        return text.isascii() and key.isascii() and key.isalpha()
+    
+    def _numpy_tables(self):
+        """Build (key offsets, encrypt table, inverse table) arrays once, or None if unsupported"""
+        if self._np_tables is None:
+            _load_numpy()
+            key = self.key
+            if not (key and key.isascii() and key.isalpha()):
+                self._np_tables = False
+                return None
+            
+            # The flat tables are plain ASCII, so they view directly as 26x26 arrays
+            offsets = np.frombuffer(key.encode('ascii'), dtype=np.uint8) - ord('A')
+            table = np.frombuffer(self._cells, dtype=np.uint8).reshape(26, 26)
+            inverse = np.frombuffer(self._inverse, dtype=np.uint8).reshape(26, 26)
+            self._np_tables = (offsets, table, inverse)
+        return self._np_tables or None
+    
+    def _numpy_transform(self, text, key_offset, decrypt):
+        """Vectorized encrypt/decrypt of ASCII text via array indexing into the table"""
+        return self._numpy_bytes(text.encode('ascii'), key_offset, decrypt).decode('ascii')
+    
+    def _numpy_bytes(self, data, key_offset, decrypt):
+        """Vectorized encrypt/decrypt of a bytes-like object, returning bytes"""
+        offsets, table, inverse = self._numpy_tables()
+        data = np.frombuffer(bytes(data).translate(_ASCII_UPPER), dtype=np.uint8)
+        positions = np.flatnonzero((data >= ord('A')) & (data <= ord('Z')))
+        
+        # Key row for the n-th letter is key[(key_offset + n) % len(key)]
+        rows = offsets[(np.arange(len(positions)) + key_offset) % len(offsets)]
+        result = data.copy()
+        
+        lookup = inverse if decrypt else table
+        result[positions] = lookup[rows, data[positions] - ord('A')]
+        return result.tobytes()
+    
+    def _key_tables(self, decrypt):
+        """256-entry translate table for every key position, built once per direction
+        
+        Table k maps both cases of each letter through the row of key letter k
+        (upper-case output) and leaves every other byte unchanged.
+        """
+        if self._byte_tables is None:
+            key = self.key
+            if not (key and key.isascii() and key.isalpha()):
+                raise ValueError("Byte input requires a non-empty key of letters A-Z")
+            both_cases = string.ascii_lowercase.encode() + ALPHABET
+            
+            # Only the rows the key actually uses are expanded to 256-entry tables
+            encrypt_rows, decrypt_rows = {}, {}
+            for k in set(key):
+                row = self._row(k)
+                encrypt_rows[k] = bytes.maketrans(both_cases, self._cells[row:row + 26] * 2)
+                decrypt_rows[k] = bytes.maketrans(both_cases, self._inverse[row:row + 26] * 2)
+            self._byte_tables = ([encrypt_rows[k] for k in key], [decrypt_rows[k] for k in key])
+        return self._byte_tables[decrypt]
+    
+    def _translate_bytes(self, data, key_offset, decrypt):
+        """Encrypt/decrypt bytes with one C-level translate per key position
+        
+        The letters are gathered into one buffer, so the n-th letter always
+        sits at index n: every len(key)-th letter shares a key row and is
+        translated as a single extended slice, then the letter runs are put
+        back between the untouched separators.
+        """
+        tables = self._key_tables(decrypt)
+        period = len(tables)
+        folded = bytes(data).translate(_ASCII_UPPER)
+        letters = folded.translate(None, _NON_LETTERS)
+        
+        result = bytearray(letters)
+        for phase in range(min(period, len(letters))):
+            result[phase::period] = letters[phase::period].translate(tables[(key_offset + phase) % period])
+        if len(letters) == len(folded):
+            return bytes(result)
+        
+        parts = _SEPARATORS.split(folded)
+        start = 0
+        for i in range(0, len(parts), 2):
+            end = start + len(parts[i])
+            parts[i] = result[start:end]
+            start = end
+        return b''.join(parts)
+    
+    def _transform_bytes(self, data, key_offset, decrypt):
+        """Pick the NumPy or translate engine for a bytes-like input"""
+        if self.engine != "python" and HAS_NUMPY and \
+                (self.engine == "numpy" or len(data) >= NUMPY_MIN_LENGTH) and \
+                self._numpy_tables() is not None:
+            return self._numpy_bytes(data, key_offset, decrypt)
+        return self._translate_bytes(data, key_offset, decrypt)
+    
+    def encrypt_bytes(self, data, key_offset=0):
+        """Encrypt bytes, bytearray or memoryview input without decoding it, returning bytes
+        
+        ASCII letters of either case are encrypted to upper case; every other
+        byte is copied through and does not advance the key.
+        """
+        return self._transform_bytes(data, key_offset, decrypt=False)
+    
+    def decrypt_bytes(self, data, key_offset=0):
+        """Decrypt bytes, bytearray or memoryview input without decoding it, returning bytes"""
+        return self._transform_bytes(data, key_offset, decrypt=True)
+    
+    def encrypt(self, plaintext, key_offset=0):
+        """Encrypt plaintext using Vigenère cipher (key_offset letters of key already consumed)"""
+        if self._use_numpy(plaintext):
+            return self._numpy_transform(plaintext, key_offset, decrypt=False)
+        if self._use_translate(plaintext):
+            return self._translate_bytes(plaintext.encode('ascii'), key_offset, False).decode('ascii')
         plaintext = plaintext.upper()
-        key = self._extend_key(plaintext)
+        key = self._extend_key(plaintext, key_offset)
+        cells = self._cells
         ciphertext = ""
         
         for i, char in enumerate(plaintext):
             if char.isalpha():
                 # Use table for encryption
-                row = ord(key[i]) - ord('A')
                 col = ord(char) - ord('A')
-                encrypted_char = self.table[row][col]
-                ciphertext += encrypted_char
+                if not 0 <= col < 26:
+                    raise ValueError(f"Character '{char}' is not in the table alphabet")
+                ciphertext += chr(cells[self._row(key[i]) + col])
             else:
                 ciphertext += char
         
         return ciphertext
     
-    def decrypt(self, ciphertext):
-        """Decrypt ciphertext using Vigenère cipher"""
+    def decrypt(self, ciphertext, key_offset=0):
+        """Decrypt ciphertext using Vigenère cipher (key_offset letters of key already consumed)"""
+        if self._use_numpy(ciphertext):
+            return self._numpy_transform(ciphertext, key_offset, decrypt=True)
+        if self._use_translate(ciphertext):
+            return self._translate_bytes(ciphertext.encode('ascii'), key_offset, True).decode('ascii')
         ciphertext = ciphertext.upper()
-        key = self._extend_key(ciphertext)
+        key = self._extend_key(ciphertext, key_offset)
+        inverse = self._inverse
         plaintext = ""
         
         for i, char in enumerate(ciphertext):
             if char.isalpha():
-                # Use table for decryption - find column in row
-                row = ord(key[i]) - ord('A')
-                # Find which column gives us the ciphertext character
-                for col in range(26):
-                    if self.table[row][col] == char:
-                        plaintext += chr(col + ord('A'))
-                        break
+                # Direct lookup in the inverse table built at construction time
+                col = ord(char) - ord('A')
+                if not 0 <= col < 26:
+                    raise ValueError(f"Character '{char}' is not in the table alphabet")
+                plaintext += chr(inverse[self._row(key[i]) + col])
             else:
                 plaintext += char
         
         return plaintext
     
+    def encrypt_stream(self, chunks):
+        """Encrypt an iterable of text chunks, carrying the key phase across chunks"""
+        key_offset = 0
+        for chunk in chunks:
+            yield self.encrypt(chunk, key_offset)
+            key_offset += sum(1 for c in chunk if c.isalpha())
+    
+    def decrypt_stream(self, chunks):
+        """Decrypt an iterable of text chunks, carrying the key phase across chunks"""
+        key_offset = 0
+        for chunk in chunks:
+            yield self.decrypt(chunk, key_offset)
+            key_offset += sum(1 for c in chunk if c.isalpha())
+    
+    def encrypt_bytes_stream(self, chunks):
+        """Encrypt an iterable of byte chunks, carrying the key phase across chunks"""
+        key_offset = 0
+        for chunk in chunks:
+            yield self.encrypt_bytes(chunk, key_offset)
+            key_offset += count_letters(chunk)
+    
+    def decrypt_bytes_stream(self, chunks):
+        """Decrypt an iterable of byte chunks, carrying the key phase across chunks"""
+        key_offset = 0
+        for chunk in chunks:
+            yield self.decrypt_bytes(chunk, key_offset)
+            key_offset += count_letters(chunk)
+    
+    def _spec(self):
+        """Picklable (key, table cells, engine) from which workers rebuild this cipher"""
+        return self.key, self._cells, self.engine
+    
+    def _run_shards(self, src, dst, size, decrypt, workers, shard_size):
+        """Transform size bytes of shared memory src into dst across a process pool
+        
+        The key phase only advances on letters, so a first pass counts the
+        letters of every shard in parallel; their prefix sums are the key
+        offsets each shard starts at, and the second pass transforms all
+        shards independently.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        
+        starts = list(range(0, size, shard_size))
+        ends = [min(start + shard_size, size) for start in starts]
+        names = [src.name] * len(starts)
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            # The counting pass is cipher work too, but its bytes are only counted once
+            with stage("cipher"):
+                counts = list(pool.map(_count_shard, names, starts, ends))
+            offsets = accumulate(counts[:-1], initial=0)
+            jobs = [(self._spec(), src.name, dst.name, start, end, offset, decrypt)
+                    for start, end, offset in zip(starts, ends, offsets)]
+            with stage("cipher", size):
+                list(pool.map(_transform_shard, *zip(*jobs)))
+    
+    def _transform_parallel(self, data, decrypt, workers, shard_size):
+        """Shard a bytes-like input across processes; output matches the serial engine"""
+        size = len(data)
+        if size <= shard_size or workers == 1:
+            return self._transform_bytes(data, 0, decrypt)
+        with _SharedBuffers(size) as (src, dst):
+            src.buf[:size] = data
+            self._run_shards(src, dst, size, decrypt, workers, shard_size)
+            return bytes(dst.buf[:size])
+    
+    def encrypt_parallel(self, data, workers=None, shard_size=SHARD_SIZE):
+        """Encrypt a large bytes-like input across a process pool, returning bytes
+        
+        Input and output live in shared memory, so shards are never pickled.
+        The result is identical to encrypt_bytes(data).
+        """
+        return self._transform_parallel(data, False, workers, shard_size)
+    
+    def decrypt_parallel(self, data, workers=None, shard_size=SHARD_SIZE):
+        """Decrypt a large bytes-like input across a process pool, returning bytes"""
+        return self._transform_parallel(data, True, workers, shard_size)
+    
+    def _file_parallel(self, input_file, output_file, decrypt, workers, shard_size, fsync):
+        """Read a file straight into shared memory, transform it in shards and write it out"""
+        size = os.path.getsize(input_file)
+        with _SharedBuffers(size) as (src, dst):
+            with stage("read", size), open(input_file, 'rb', buffering=0) as f, \
+                    src.buf[:size] as view:
+                done = 0
+                while done < size:
+                    n = f.readinto(view[done:])
+                    if not n:
+                        raise ValueError(f"'{input_file}' shrank while it was being read")
+                    done += n
+            if size <= shard_size or workers == 1:
+                with stage("cipher", size), dst.buf[:size] as out:
+                    out[:] = self._transform_bytes(src.buf[:size], 0, decrypt)
+            else:
+                self._run_shards(src, dst, size, decrypt, workers, shard_size)
+            with stage("write", size), atomic_output(output_file, fsync) as f, \
+                    dst.buf[:size] as out:
+                f.write(out)
+        return size, size
+    
+    def encrypt_file_parallel(self, input_file, output_file, workers=None, shard_size=SHARD_SIZE,
+                              fsync=DEFAULT_FSYNC):
+        """Encrypt a file across a process pool, returning (bytes read, bytes written)"""
+        return self._file_parallel(input_file, output_file, False, workers, shard_size, fsync)
+    
+    def decrypt_file_parallel(self, input_file, output_file, workers=None, shard_size=SHARD_SIZE,
+                              fsync=DEFAULT_FSYNC):
+        """Decrypt a file across a process pool, returning (bytes read, bytes written)"""
+        return self._file_parallel(input_file, output_file, True, workers, shard_size, fsync)
+    
     @classmethod
-    def from_table(cls, key, table_content):
+    def from_table(cls, key, table_content, engine="auto"):
         """Create VigenereCipher from a table file content"""
         # Parse the table - expecting 26x26 characters
         chars = ''.join(c.upper() for c in table_content if c.isalpha())
@@ -84,9 +429,64 @@ class VigenereCipher:
         if len(chars) != 676:  # 26x26
             raise ValueError(f"Table must contain exactly 676 alphabetic characters (26x26), got {len(chars)}")
         
-        # Create 26x26 table
-        table = []
-        for i in range(26):
-            table.append(list(chars[i*26:(i+1)*26]))
-        
-        return cls(key, table)
+        # The 676 cells are stored flat, row by row
+        return cls(key, chars, engine)
+    
+    @classmethod
+    def from_settings(cls, table_content, key):
+        """Create VigenereCipher from table file content and key, in main.load_settings order"""
+        return cls.from_table(key, table_content)
+
+
+class _SharedBuffers:
+    """Context manager creating an input and an output shared memory block of size bytes"""
+    
+    def __init__(self, size):
+        from multiprocessing import shared_memory
+        self.blocks = []
+        # Zero-size blocks are not allowed; the extra byte is never used
+        for _ in range(2):
+            self.blocks.append(shared_memory.SharedMemory(create=True, size=max(size, 1)))
+    
+    def __enter__(self):
+        return self.blocks
+    
+    def __exit__(self, *exc_info):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        return False
+
+
+# Ciphers rebuilt in pool workers, keyed by VigenereCipher._spec()
+_worker_ciphers = {}
+
+
+def _attach(name):
+    """Attach to a shared memory block created by the parent process"""
+    from multiprocessing import shared_memory
+    return shared_memory.SharedMemory(name=name)
+
+
+def _count_shard(name, start, end):
+    """Pool worker: number of letters in bytes [start, end) of a shared block"""
+    block = _attach(name)
+    try:
+        return count_letters(block.buf[start:end])
+    finally:
+        block.close()
+
+
+def _transform_shard(spec, src_name, dst_name, start, end, key_offset, decrypt):
+    """Pool worker: transform one shard of the input block into the output block"""
+    cipher = _worker_ciphers.get(spec)
+    if cipher is None:
+        key, cells, engine = spec
+        cipher = _worker_ciphers[spec] = VigenereCipher(key, cells, engine)
+    
+    src, dst = _attach(src_name), _attach(dst_name)
+    try:
+        dst.buf[start:end] = cipher._transform_bytes(src.buf[start:end], key_offset, decrypt)
+    finally:
+        src.close()
+        dst.close()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Benchmark AES, DES, Playfair, and Vigenère across modes, APIs and input sizes.
+Reports throughput, per-call latency and peak RSS growth as JSON, and can compare
+a run against a saved baseline, exiting non-zero on regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, memory is not measured
+    resource = None
+
+# Ensure project root is on sys.path so we can import cipher modules when running this file
+THIS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = THIS_DIR.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from ciphers.registry import available_ciphers, get_cipher
+from main import load_settings
+
+# Key and table fixtures used for every benchmark
+SETTINGS_FILES = {
+    "aes": {"key_file": THIS_DIR / "aes_key.txt"},
+    "des": {"key_file": THIS_DIR / "des_key.txt"},
+    "playfair": {"table_file": THIS_DIR / "playfair_table.txt"},
+    "vigenere": {"key_file": THIS_DIR / "vigenere_key.txt",
+                 "table_file": THIS_DIR / "vigenere_table.txt"},
+}
+
+APIS = ("string", "file")
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+DEFAULT_SIZES = "1K,64K,1M,16M"
+
+# Peak memory growth below this many bytes is treated as noise when comparing
+MEMORY_SLACK = 256 * 1024
+
+# Input size of the warm-up run that loads modules and tables before memory is measured
+WARMUP_SIZE = 64 * 1024
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as 512, 64K, 16M or 1G into bytes"""
+    text = text.strip().upper()
+    unit = SIZE_UNITS.get(text[-1:], 1)
+    number = text[:-1] if text[-1:] in SIZE_UNITS else text
+    size = int(float(number) * unit)
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"Invalid size '{text}'")
+    return size
+
+
+def format_size(size: int) -> str:
+    """Format a byte count with the largest exact unit (1K, 16M, 1G)"""
+    for suffix, unit in sorted(SIZE_UNITS.items(), key=lambda item: -item[1]):
+        if size % unit == 0:
+            return f"{size // unit}{suffix}"
+    return str(size)
+
+
+def make_input(binary: bool, size: int) -> bytes:
+    """Build size bytes of input: random bytes, or English-like ASCII text"""
+    if binary:
+        return os.urandom(size)
+    sample = (THIS_DIR / "plaintext.txt").read_bytes().upper() + b" "
+    return (sample * (size // len(sample) + 1))[:size]
+
+
+def time_calls(func, repeat: int, min_time: float):
+    """Time func, looping small inputs until min_time elapses per round
+
+    Returns (best seconds per call, mean seconds per call).
+    """
+    timings = []
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        timings.append(elapsed / calls)
+    return min(timings), sum(timings) / len(timings)
+
+
+def reset_peak_rss():
+    """Lower the recorded peak RSS to the current RSS where the OS allows it (Linux)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process, in bytes"""
+    try:
+        # Unlike ru_maxrss, VmHWM is neither inherited across exec nor immune to reset_peak_rss
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure_rss(name, api, operation, mode, input_path):
+    """Peak RSS growth (bytes) of one call of a case, measured in a fresh interpreter
+
+    Unlike a Python heap tracer this includes memory maps, C buffers and
+    NumPy arrays. Memory used by worker processes (the multiprocess
+    Vigenère engine) is not included. Returns None where getrusage is
+    unavailable.
+    """
+    if resource is None:
+        return None
+    command = [sys.executable, __file__, "--rss-case", name, api, operation, mode or "-",
+               str(input_path)]
+    result = subprocess.run(command, check=True, capture_output=True, text=True)
+    return int(result.stdout)
+
+
+def rss_case(name, api, operation, mode, input_path) -> int:
+    """Child side of measure_rss: warm up, then run the case once and report its RSS growth"""
+    info = get_cipher(name)
+    args, kwargs = load_settings(name, mode=None if mode == "-" else mode, **SETTINGS_FILES[name])
+    workdir = Path(input_path).parent
+
+    if api == "file":
+        handler = info.load_file_handler()
+        sample = workdir / f"{name}.warmup"
+        sample.write_bytes(make_input(info.binary, WARMUP_SIZE))
+        handler(*args, "encrypt", sample, workdir / f"{name}.warmup.enc", **kwargs)
+        handler(*args, "decrypt", workdir / f"{name}.warmup.enc", workdir / f"{name}.warmup.dec",
+                **kwargs)
+        call = lambda: handler(*args, operation, input_path, workdir / f"{name}.rss.out", **kwargs)
+    else:
+        cipher = info.create(*args)
+        cipher.decrypt(cipher.encrypt(make_input(False, WARMUP_SIZE).decode("ascii")))
+        text = Path(input_path).read_text(encoding="ascii")
+        call = lambda: getattr(cipher, operation)(text)
+
+    reset_peak_rss()
+    before = peak_rss()
+    call()
+    return max(peak_rss() - before, 0)
+
+
+def build_cipher(info, settings):
+    """Create the cipher object for info from (args, kwargs) returned by load_settings"""
+    args, _ = settings
+    return info.create(*args)
+
+
+def string_cases(info, settings, data: bytes, workdir: Path):
+    """Yield (mode, operation, func, input path) for the in-memory string API of a cipher
+
+    The input path holds the same input as text, for measure_rss.
+    """
+    cipher = build_cipher(info, settings)
+    message = data.decode("ascii")
+    encrypted = cipher.encrypt(message)
+    plain = workdir / f"{info.name}.txt"
+    encrypted_path = workdir / f"{info.name}.enc.txt"
+    plain.write_text(message, encoding="ascii")
+    encrypted_path.write_text(encrypted, encoding="ascii")
+    mode = info.modes[0] if info.modes else None
+    yield mode, "encrypt", lambda: cipher.encrypt(message), plain
+    yield mode, "decrypt", lambda: cipher.decrypt(encrypted), encrypted_path
+
+
+def file_cases(info, settings, data: bytes, workdir: Path):
+    """Yield (mode, operation, func, input path) for the file API of a cipher, once per block mode"""
+    args, _ = settings
+    handler = info.load_file_handler()
+    plain = workdir / f"{info.name}.plain"
+    encrypted = workdir / f"{info.name}.enc"
+    decrypted = workdir / f"{info.name}.dec"
+    plain.write_bytes(data)
+
+    for mode in info.modes or (None,):
+        kwargs = {"mode": mode} if len(info.modes) > 1 else {}
+        handler(*args, "encrypt", plain, encrypted, **kwargs)
+        yield mode, "encrypt", lambda kw=kwargs: handler(*args, "encrypt", plain, encrypted, **kw), plain
+        yield (mode, "decrypt", lambda kw=kwargs: handler(*args, "decrypt", encrypted, decrypted, **kw),
+               encrypted)
+
+
+CASE_BUILDERS = {
+    "string": string_cases,
+    "file": file_cases,
+}
+
+
+def run_benchmarks(ciphers, apis, sizes, repeat=3, min_time=0.2, memory=True, log=print):
+    """Run every (cipher, api, mode, operation, size) combination and return result dicts"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="cipher-bench-") as tmp:
+        workdir = Path(tmp)
+        for name in ciphers:
+            info = get_cipher(name)
+            settings = load_settings(name, **SETTINGS_FILES[name])
+            for api in apis:
+                for size in sizes:
+                    # Only the binary file API gets random bytes; text APIs need ASCII
+                    data = make_input(info.binary and api == "file", size)
+                    for mode, operation, func, input_path in CASE_BUILDERS[api](info, settings,
+                                                                                data, workdir):
+                        best, mean = time_calls(func, repeat, min_time)
+                        rss = measure_rss(name, api, operation, mode, input_path) if memory else None
+                        result = {
+                            "name": "/".join(part for part in (name, mode and mode.lower(), api,
+                                                               operation, format_size(size)) if part),
+                            "cipher": name,
+                            "mode": mode,
+                            "api": api,
+                            "operation": operation,
+                            "size": size,
+                            "unit": "MB/s" if info.binary else "chars/s",
+                            "throughput": size / (1024 * 1024) / best if info.binary else size / best,
+                            "latency_ms": best * 1000,
+                            "mean_latency_ms": mean * 1000,
+                            "peak_rss_growth_bytes": rss,
+                        }
+                        results.append(result)
+                        log(format_result(result))
+                    del data
+    return results
+
+
+def format_result(result: dict) -> str:
+    """One human-readable line for a result"""
+    memory = result["peak_rss_growth_bytes"]
+    memory = "n/a" if memory is None else f"+{memory / (1024 * 1024):.2f} MiB"
+    return (f"{result['name']:<36} {result['throughput']:>14,.2f} {result['unit']:<8} "
+            f"{result['latency_ms']:>12.3f} ms  peak RSS {memory}")
+
+
+def compare(results, baseline, threshold: float):
+    """Compare results with a baseline run, returning a list of regression messages
+
+    A case regresses if its throughput drops, or its peak memory grows, by
+    more than threshold (a fraction) relative to the baseline. Cases missing
+    from either run are ignored.
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        if result["throughput"] < old["throughput"] * (1 - threshold):
+            regressions.append(f"{result['name']}: throughput {result['throughput']:,.2f} "
+                               f"< baseline {old['throughput']:,.2f} {result['unit']}")
+        # Reports from before RSS was measured have no comparable memory figure
+        new_peak, old_peak = result["peak_rss_growth_bytes"], old.get("peak_rss_growth_bytes")
+        if new_peak is not None and old_peak is not None and \
+                new_peak > old_peak * (1 + threshold) + MEMORY_SLACK:
+            regressions.append(f"{result['name']}: peak RSS growth {new_peak} "
+                               f"> baseline {old_peak} bytes")
+    return regressions
+
+
+def environment() -> dict:
+    """Describe the machine and interpreter the benchmark ran on"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def build_parser():
+    """Build the benchmark command-line parser"""
+    names = [info.name for info in available_ciphers()]
+    parser = argparse.ArgumentParser(
+        description="Benchmark every cipher, mode and API over a range of input sizes")
+    parser.add_argument("--ciphers", nargs="+", choices=names, default=names)
+    parser.add_argument("--apis", nargs="+", choices=APIS, default=list(APIS))
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated input sizes, 1K to 1G (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timing rounds per case; the best round is reported (default: 3)")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum seconds per round, looping small inputs (default: 0.2)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the extra call per case, in a child process, that measures "
+                             "peak RSS growth")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed regression as a fraction of the baseline (default: 0.10)")
+    # Internal: run one case in this process for measure_rss
+    parser.add_argument("--rss-case", nargs=5, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.rss_case:
+        print(rss_case(*args.rss_case))
+        return 0
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(",")]
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        print(f"Error: invalid --sizes: {e}", file=sys.stderr)
+        return 2
+
+    # Progress goes to stderr so stdout stays valid JSON
+    results = run_benchmarks(args.ciphers, args.apis, sizes, args.repeat, args.min_time,
+                             memory=not args.no_memory,
+                             log=lambda line: print(line, file=sys.stderr))
+    report = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="ascii")
+    else:
+        print(report)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="ascii"))
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,11 +5,19 @@ Professional interface for AES, DES, Playfair, and Vigenère ciphers
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
+import multiprocessing
 import os
-from ciphers.aes_cipher import AESCipher
-from ciphers.des_cipher import DESCipher
-from ciphers.playfair_cipher import PlayfairCipher
-from ciphers.vigenere_cipher import VigenereCipher
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ciphers import instrumentation
+from ciphers.atomic_io import atomic_output
+from ciphers.registry import available_ciphers, get_cipher
+from ciphers.file_io import ProgressReader
+from ciphers.parallel import worker_budget
+from batch import format_rate, process_file, walk_inputs
+from main import load_settings
 
 
 class ToolTip:
@@ -42,11 +50,43 @@ class ToolTip:
             self.tooltip = None
 
 
+# Concurrent jobs in the GUI batch queue
+BATCH_WORKERS = min(4, os.cpu_count() or 1)
+
+# How often the Tk thread drains worker events, and how often progress is posted/logged
+POLL_INTERVAL_MS = 100
+PROGRESS_INTERVAL_S = 0.1
+REPORT_INTERVAL_S = 1.0
+
+
+class OperationCancelled(Exception):
+    """Raised inside the worker thread when the user presses Cancel"""
+
+
+# Labels for the additional block modes offered in the cipher selection
+MODE_LABELS = {
+    "CTR": "Parallel",
+    "GCM": "Parallel, Authenticated"
+}
+
+
+def cipher_selections():
+    """List (label, value, cipher name, mode) for every registered cipher and extra mode"""
+    ciphers = available_ciphers()
+    selections = [(info.title, info.name.upper(), info.name, info.modes[0] if info.modes else None)
+                  for info in ciphers]
+    for info in ciphers:
+        for mode in info.modes[1:]:
+            selections.append((f"{info.name.upper()}-{mode} ({MODE_LABELS.get(mode, mode)})",
+                               f"{info.name.upper()}_{mode}", info.name, mode))
+    return selections
+
+
 class CryptographyApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Cryptography Suite - AES, DES, Playfair & Vigenère")
-        self.root.geometry("900x700")
+        self.root.geometry("900x900")
         self.root.resizable(True, True)
         
         # Variables (must be set before setup_style)
@@ -58,12 +98,34 @@ class CryptographyApp:
         self.operation_type = tk.StringVar(value="encrypt")
         self.theme_mode = tk.StringVar(value="dark")
         
+        # Cipher selection values -> (registry name, block mode)
+        self.selections = {value: (name, mode) for _, value, name, mode in cipher_selections()}
+        
+        # Batch queue state: tree item id -> job dict, bounded pool created on first run
+        self.batch_jobs = {}
+        self.batch_outputs = {}  # normalised relative output path -> tree item id
+        self.batch_cancel = threading.Event()
+        self.batch_output_dir = tk.StringVar(value="Output folder: (not selected)")
+        self.batch_output_path = ""
+        self.batch_pool = None
+        self.batch_events = queue.Queue()
+        self.batch_active = 0
+        
+        # Background worker state
+        self.worker = None
+        self.job = None
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        
         # Configure style
         self.setup_style()
         
         # Build UI
         self.create_widgets()
         
+        # Stop background work when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
     def setup_style(self):
         """Configure styling based on theme"""
         self.apply_theme()
@@ -146,6 +208,16 @@ class CryptographyApp:
                  background=[("active", bg_main)],
                  foreground=[("active", accent_color)])
         
+        # Batch queue styles
+        style.configure("Treeview", background=bg_input, fieldbackground=bg_input,
+                       foreground=fg_primary, bordercolor=border_color,
+                       font=("Segoe UI", 9))
+        style.configure("Treeview.Heading", background=bg_secondary,
+                       foreground=fg_primary, font=("Segoe UI", 9, "bold"))
+        style.map("Treeview",
+                 background=[("selected", accent_color)],
+                 foreground=[("selected", "#ffffff")])
+        
         # Store colors for later use
         self.current_colors = {
             'log_bg': log_bg,
@@ -181,7 +253,7 @@ class CryptographyApp:
         theme_btn.grid(row=0, column=1, sticky=tk.E, padx=5)
         
         # Status/Log Area (create first so log() can be called)
-        self.create_status_area(main_frame, row=6)
+        self.create_status_area(main_frame, row=7)
         
         # Cipher Selection
         self.create_cipher_selection(main_frame, row=2)
@@ -195,6 +267,9 @@ class CryptographyApp:
         # Action Buttons
         self.create_action_buttons(main_frame, row=5)
         
+        # Batch Queue
+        self.create_batch_panel(main_frame, row=6)
+        
     def create_cipher_selection(self, parent, row):
         """Create cipher selection section"""
         frame = ttk.LabelFrame(parent, text="Select Cipher Algorithm", padding="15")
@@ -204,17 +279,10 @@ class CryptographyApp:
         frame.columnconfigure(2, weight=1)
         frame.columnconfigure(3, weight=1)
         
-        ciphers = [
-            ("AES (Advanced Encryption Standard)", "AES"),
-            ("DES (Data Encryption Standard)", "DES"),
-            ("Playfair Cipher", "PLAYFAIR"),
-            ("Vigenère Cipher", "VIGENERE")
-        ]
-        
-        for i, (text, value) in enumerate(ciphers):
+        for i, (text, value, _, _) in enumerate(cipher_selections()):
             rb = ttk.Radiobutton(frame, text=text, variable=self.cipher_type, 
                                 value=value, command=self.on_cipher_change)
-            rb.grid(row=0, column=i, padx=10, pady=5, sticky=tk.W)
+            rb.grid(row=i // 4, column=i % 4, padx=10, pady=5, sticky=tk.W)
             
     def create_operation_selection(self, parent, row):
         """Create operation selection section"""
@@ -305,8 +373,57 @@ class CryptographyApp:
                                       style="Accent.TButton")
         self.execute_btn.grid(row=0, column=0, padx=10)
         
+        self.cancel_btn = ttk.Button(frame, text="■ Cancel", 
+                                     command=self.cancel_operation)
+        self.cancel_btn.grid(row=0, column=1, padx=10)
+        self.cancel_btn.state(["disabled"])
+        
         ttk.Button(frame, text="🗑 Clear All", command=self.clear_all).grid(
-            row=0, column=1, padx=10)
+            row=0, column=2, padx=10)
+        
+        # Opt-in: per-stage timings are logged to the status area when the job ends
+        self.record_stats = tk.BooleanVar(value=False)
+        stats_check = ttk.Checkbutton(frame, text="Stage timings", variable=self.record_stats)
+        stats_check.grid(row=0, column=3, padx=10)
+        ToolTip(stats_check, "Log time and bytes spent reading, parsing, padding, "
+                             "encrypting and writing")
+        
+        self.progress_bar = ttk.Progressbar(frame, mode="determinate", 
+                                            maximum=100, length=420)
+        self.progress_bar.grid(row=1, column=0, columnspan=4, pady=(12, 0))
+        
+    def create_batch_panel(self, parent, row):
+        """Create the batch job queue section"""
+        frame = ttk.LabelFrame(parent, text="Batch Queue (uses the cipher, operation, key and table above)",
+                               padding="10")
+        frame.grid(row=row, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
+        frame.columnconfigure(0, weight=1)
+        
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=0, column=0, sticky=tk.W, pady=(0, 8))
+        for i, (text, command) in enumerate([
+                ("Add Files...", self.batch_add_files),
+                ("Add Folder...", self.batch_add_folder),
+                ("Output Folder...", self.browse_batch_output),
+                ("▶ Run Queue", self.run_batch_queue),
+                ("■ Cancel Batch", self.cancel_batch),
+                ("↻ Retry Failed", self.retry_failed_jobs),
+                ("Clear Queue", self.clear_batch_queue)]):
+            ttk.Button(buttons, text=text, command=command).grid(row=0, column=i, padx=(0, 6))
+        
+        ttk.Label(frame, textvariable=self.batch_output_dir).grid(row=1, column=0, sticky=tk.W)
+        
+        columns = ("file", "status", "size", "rate")
+        self.batch_tree = ttk.Treeview(frame, columns=columns, show="headings", height=6)
+        for column, title, width in [("file", "File", 380), ("status", "Status", 220),
+                                     ("size", "Size", 90), ("rate", "Throughput", 100)]:
+            self.batch_tree.heading(column, text=title)
+            self.batch_tree.column(column, width=width, anchor=tk.W)
+        self.batch_tree.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+        
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.batch_tree.yview)
+        scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S), pady=(5, 0))
+        self.batch_tree.configure(yscrollcommand=scrollbar.set)
         
     def create_status_area(self, parent, row):
         """Create status/log area"""
@@ -379,28 +496,21 @@ class CryptographyApp:
 
     def on_cipher_change(self):
         """Handle cipher type change by showing/hiding relevant file choosers"""
-        cipher = self.cipher_type.get()
+        name, mode = self.selections[self.cipher_type.get()]
+        info = get_cipher(name)
         
-        # AES and DES: Show key, hide table
-        if cipher in ["AES", "DES"]:
+        # Show only the files the registry says this cipher needs
+        if info.needs_key:
             self.show_key_row()
-            self.hide_table_row(clear=True)
-            if cipher == "AES":
-                self.log("AES selected: Key must be 16, 24, or 32 bytes")
-            else:
-                self.log("DES selected: Key must be exactly 8 bytes")
-        
-        # Playfair: Show table, hide key
-        elif cipher == "PLAYFAIR":
+        else:
             self.hide_key_row(clear=True)
+        if info.needs_table:
             self.show_table_row()
-            self.log("Playfair selected: Table file required (5x5 matrix)")
+        else:
+            self.hide_table_row(clear=True)
         
-        # Vigenere: Show both key and table
-        elif cipher == "VIGENERE":
-            self.show_key_row()
-            self.show_table_row()
-            self.log("Vigenère selected: Table file (26x26) and key file required")
+        label = f"{name.upper()}-{mode}" if len(info.modes) > 1 else info.title.split()[0]
+        self.log(f"{label} selected: {info.hint}")
                 
     def browse_key_file(self):
         """Browse for key file"""
@@ -460,160 +570,364 @@ class CryptographyApp:
         self.output_file_path.set("")
         self.log("All fields cleared")
         
-    def execute_operation(self):
-        """Execute the selected cryptographic operation"""
-        cipher = self.cipher_type.get()
-        operation = self.operation_type.get()
-        
-        # Validate inputs
-        if not self.input_file_path.get():
-            messagebox.showerror("Error", "Please select an input file")
+    def batch_add_files(self):
+        """Add one or more files to the batch queue"""
+        filenames = filedialog.askopenfilenames(title="Select Files to Queue",
+                                                filetypes=[("All files", "*.*")])
+        count = sum(self.queue_batch_job(filename, os.path.basename(filename))
+                    for filename in filenames)
+        if filenames:
+            self.log(f"Queued {count} file(s)")
+    
+    def batch_add_folder(self):
+        """Add every file under a folder to the batch queue, mirrored under the folder's name"""
+        folder = filedialog.askdirectory(title="Select Folder to Queue")
+        if not folder:
             return
-            
-        if not self.output_file_path.get():
-            messagebox.showerror("Error", "Please select an output file")
+        name = os.path.basename(os.path.normpath(folder))
+        count = sum(self.queue_batch_job(input_file, os.path.join(name, relative))
+                    for input_file, relative in walk_inputs(folder))
+        self.log(f"Queued {count} file(s) from {name}")
+    
+    def browse_batch_output(self):
+        """Browse for the folder receiving batch outputs"""
+        folder = filedialog.askdirectory(title="Select Output Folder")
+        if folder:
+            self.batch_output_dir.set(f"Output folder: {folder}")
+            self.batch_output_path = folder
+            self.log(f"Batch output folder selected: {folder}")
+    
+    def queue_batch_job(self, input_file, relative):
+        """Add one pending job row, returning False if its output path is already taken
+        
+        Two jobs never share an output path, so one can't overwrite the other.
+        """
+        key = os.path.normcase(os.path.normpath(relative))
+        existing = self.batch_outputs.get(key)
+        if existing is not None:
+            if os.path.samefile(self.batch_jobs[existing]["input_file"], input_file):
+                return False
+            self.log(f"Not queued: {input_file} would overwrite the output of "
+                     f"{self.batch_jobs[existing]['input_file']} ({relative})")
+            return False
+        
+        size = os.path.getsize(input_file)
+        item = self.batch_tree.insert("", tk.END, values=(relative, "Pending", f"{size} B", ""))
+        self.batch_jobs[item] = {"input_file": input_file, "relative": relative, "status": "Pending"}
+        self.batch_outputs[key] = item
+        return True
+    
+    def clear_batch_queue(self):
+        """Remove every job from the queue (only while nothing is running)"""
+        if self.batch_active:
+            messagebox.showerror("Error", "Wait for the running batch jobs to finish")
+            return
+        self.batch_tree.delete(*self.batch_tree.get_children())
+        self.batch_jobs.clear()
+        self.batch_outputs.clear()
+        self.log("Batch queue cleared")
+    
+    def cancel_batch(self):
+        """Stop the running batch: files in progress finish, queued ones return to Pending"""
+        if not self.batch_active:
+            messagebox.showinfo("Batch Queue", "No batch is running")
+            return
+        if not self.batch_cancel.is_set():
+            self.batch_cancel.set()
+            self.log("Cancelling batch: files in progress finish, the rest stay pending")
+    
+    def retry_failed_jobs(self):
+        """Requeue failed jobs and run them again"""
+        failed = [item for item, job in self.batch_jobs.items() if job["status"] == "Failed"]
+        for item in failed:
+            self.set_batch_status(item, "Pending")
+        if failed:
+            self.log(f"Retrying {len(failed)} failed job(s)")
+        self.run_batch_queue()
+    
+    def run_batch_queue(self):
+        """Submit every pending job to the bounded worker pool with the current settings"""
+        pending = [item for item, job in self.batch_jobs.items() if job["status"] == "Pending"]
+        if not pending:
+            messagebox.showinfo("Batch Queue", "No pending jobs in the queue")
+            return
+        if not self.batch_output_path:
+            messagebox.showerror("Error", "Please select a batch output folder")
             return
         
-        self.log(f"Starting {operation} operation with {cipher}...")
+        # Cipher, operation, key and table are read once and shared across the batch
+        cipher, mode = self.selections[self.cipher_type.get()]
+        operation = self.operation_type.get()
+        try:
+            settings = load_settings(cipher, self.key_file_path.get() or None,
+                                     self.table_file_path.get() or None, mode)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Invalid batch settings:\n{e}")
+            return
         
+        if self.batch_pool is None:
+            self.batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS)
+        # A cancelled run keeps its own flag; jobs submitted now get a fresh one
+        if self.batch_cancel.is_set():
+            self.batch_cancel = threading.Event()
+        if not self.batch_active:
+            self.batch_started = time.monotonic()
+            self.batch_bytes = 0
+            self.root.after(POLL_INTERVAL_MS, self.poll_batch)
+        
+        for item in pending:
+            job = self.batch_jobs[item]
+            output_file = os.path.join(self.batch_output_path, job["relative"])
+            self.set_batch_status(item, "Queued")
+            self.batch_active += 1
+            self.batch_pool.submit(self.run_batch_job, item, self.batch_cancel, cipher, settings,
+                                   operation, job["input_file"], output_file)
+        self.log(f"Batch: {len(pending)} job(s) submitted to {BATCH_WORKERS} worker(s)")
+    
+    def run_batch_job(self, item, cancel, cipher, settings, operation, input_file, output_file):
+        """Pool worker body: process one file and report back through the batch queue"""
+        if cancel.is_set():
+            self.batch_events.put((item, "cancelled", None))
+            return
+        self.batch_events.put((item, "running", None))
         try:
-            if cipher == "AES":
-                self.execute_aes()
-            elif cipher == "DES":
-                self.execute_des()
-            elif cipher == "PLAYFAIR":
-                self.execute_playfair()
-            elif cipher == "VIGENERE":
-                self.execute_vigenere()
-                
-            self.log("Operation completed successfully!")
-            messagebox.showinfo("Success", 
-                              f"File {operation}ed successfully!\n\nOutput: {os.path.basename(self.output_file_path.get())}")
-            
+            result = process_file(cipher, settings, operation, input_file, output_file,
+                                  workers=worker_budget(BATCH_WORKERS))
         except Exception as e:
-            self.log(f"Error: {str(e)}")
-            messagebox.showerror("Error", f"Operation failed:\n{str(e)}")
+            self.batch_events.put((item, "failed", str(e)))
+        else:
+            self.batch_events.put((item, "done", result))
+    
+    def poll_batch(self):
+        """Apply batch job events to the queue view on the Tk thread"""
+        while True:
+            try:
+                item, kind, value = self.batch_events.get_nowait()
+            except queue.Empty:
+                break
             
-    def execute_aes(self):
-        """Execute AES encryption/decryption"""
-        if not self.key_file_path.get():
-            raise ValueError("Please select a key file")
+            if kind == "running":
+                self.set_batch_status(item, "Running")
+                continue
             
-        # Read key
-        with open(self.key_file_path.get(), 'r', encoding='ascii') as f:
-            key = f.read().strip()
+            self.batch_active -= 1
+            if kind == "cancelled":
+                self.set_batch_status(item, "Pending", detail="cancelled")
+            elif kind == "done":
+                read, written, seconds = value
+                self.batch_bytes += read
+                self.set_batch_status(item, "Done", format_rate(read, seconds))
+            else:
+                self.set_batch_status(item, "Failed", detail=value)
+                self.log(f"Batch job failed: {self.batch_jobs[item]['relative']}: {value}")
         
-        key_bytes = key.encode('ascii')
-        if len(key_bytes) not in [16, 24, 32]:
-            raise ValueError(f"AES key must be 16, 24, or 32 bytes. Current: {len(key_bytes)} bytes")
+        if self.batch_active:
+            self.root.after(POLL_INTERVAL_MS, self.poll_batch)
+            return
         
-        # Read input file
-        with open(self.input_file_path.get(), 'rb') as f:
-            data = f.read()
+        elapsed = time.monotonic() - self.batch_started
+        statuses = [job["status"] for job in self.batch_jobs.values()]
+        self.log(f"Batch finished: {statuses.count('Done')} done, {statuses.count('Failed')} failed, "
+                 f"{statuses.count('Pending')} pending, "
+                 f"{self.batch_bytes} bytes in {elapsed:.2f}s ({format_rate(self.batch_bytes, elapsed)})")
+    
+    def set_batch_status(self, item, status, rate="", detail=None):
+        """Update a job's status (and throughput) in the queue view"""
+        if item not in self.batch_jobs:
+            return
+        self.batch_jobs[item]["status"] = status
+        self.batch_tree.set(item, "status", f"{status}: {detail}" if detail else status)
+        self.batch_tree.set(item, "rate", rate)
         
-        aes = AESCipher(key_bytes)
+    def execute_operation(self):
+        """Validate the form and start the selected operation on a worker thread"""
+        if self.worker is not None:
+            return
         
-        if self.operation_type.get() == "encrypt":
-            result = aes.encrypt_file(data)
-            self.log(f"Encrypted {len(data)} bytes -> {len(result)} bytes")
-        else:
-            result = aes.decrypt_file(data)
-            self.log(f"Decrypted {len(data)} bytes -> {len(result)} bytes")
+        cipher = self.cipher_type.get()
+        operation = self.operation_type.get()
         
-        # Write output
-        with open(self.output_file_path.get(), 'wb') as f:
-            f.write(result)
-            
-    def execute_des(self):
-        """Execute DES encryption/decryption"""
-        if not self.key_file_path.get():
-            raise ValueError("Please select a key file")
+        # Validate inputs
+        if not self.input_file_path.get():
+            messagebox.showerror("Error", "Please select an input file")
+            return
             
-        # Read key
-        with open(self.key_file_path.get(), 'r', encoding='ascii') as f:
-            key = f.read().strip()
-        
-        key_bytes = key.encode('ascii')
-        if len(key_bytes) != 8:
-            raise ValueError(f"DES key must be exactly 8 bytes. Current: {len(key_bytes)} bytes")
-        
-        # Read input file
-        with open(self.input_file_path.get(), 'rb') as f:
-            data = f.read()
+        if not self.output_file_path.get():
+            messagebox.showerror("Error", "Please select an output file")
+            return
         
-        des = DESCipher(key_bytes)
+        # Snapshot the form: the worker thread must not touch Tk variables
+        job = {
+            "cipher": cipher,
+            "name": self.selections[cipher][0],
+            "mode": self.selections[cipher][1],
+            "operation": operation,
+            "key_file": self.key_file_path.get(),
+            "table_file": self.table_file_path.get(),
+            "input_file": self.input_file_path.get(),
+            "output_file": self.output_file_path.get(),
+            "stats": self.record_stats.get()
+        }
+        try:
+            job["total"] = os.path.getsize(job["input_file"])
+        except OSError as e:
+            messagebox.showerror("Error", f"Cannot read input file:\n{e}")
+            return
         
-        if self.operation_type.get() == "encrypt":
-            result = des.encrypt_file(data)
-            self.log(f"Encrypted {len(data)} bytes -> {len(result)} bytes")
-        else:
-            result = des.decrypt_file(data)
-            self.log(f"Decrypted {len(data)} bytes -> {len(result)} bytes")
+        self.log(f"Starting {operation} operation with {cipher}...")
         
-        # Write output
-        with open(self.output_file_path.get(), 'wb') as f:
-            f.write(result)
-            
-    def execute_playfair(self):
-        """Execute Playfair encryption/decryption"""
-        if not self.table_file_path.get():
-            raise ValueError("Please select a table file")
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.job = job
+        self.job_started = self.last_report = time.monotonic()
+        self.progress_bar["value"] = 0
+        self.execute_btn.state(["disabled"])
+        self.cancel_btn.state(["!disabled"])
+        
+        self.worker = threading.Thread(target=self.run_job, args=(job,), daemon=True)
+        self.worker.start()
+        self.root.after(POLL_INTERVAL_MS, self.poll_worker)
+    
+    def cancel_operation(self):
+        """Ask the running worker to stop at its next read"""
+        if self.worker is not None and not self.cancel_event.is_set():
+            self.cancel_event.set()
+            self.cancel_btn.state(["disabled"])
+            self.log("Cancelling...")
+
+    def on_close(self):
+        """Window close handler: cancel background work, shut the batch pool down and exit"""
+        self.cancel_event.set()
+        self.batch_cancel.set()
+        if self.batch_pool is not None:
+            # Queued jobs are dropped; outputs in progress are only renamed into place if they finish
+            self.batch_pool.shutdown(wait=False, cancel_futures=True)
+            self.batch_pool = None
+        self.root.destroy()
+
+    def run_job(self, job):
+        """Worker thread body: run the cipher and report the outcome through the queue"""
+        recorder = instrumentation.enable() if job["stats"] else None
+        try:
+            self.execute_job(job)
+            outcome = ("done", None)
+        except OperationCancelled:
+            outcome = ("cancelled", None)
+        except Exception as e:
+            outcome = ("error", str(e))
+        finally:
+            if recorder is not None:
+                instrumentation.disable()
+        
+        # poll_worker stops draining at the final event, so the timing lines must be queued first
+        if recorder is not None:
+            self.report_stats(recorder)
+        self.events.put(outcome)
+    
+    def poll_worker(self):
+        """Drain worker events on the Tk thread; reschedules itself until the job ends"""
+        while True:
+            try:
+                kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
             
-        # Read table
-        with open(self.table_file_path.get(), 'r', encoding='ascii') as f:
-            table_content = f.read().strip()
-        
-        # Read input
-        with open(self.input_file_path.get(), 'r', encoding='ascii') as f:
-            message = f.read()
-        
-        playfair = PlayfairCipher.from_matrix(table_content)
+            if kind == "progress":
+                self.update_progress(value)
+            elif kind == "log":
+                self.log(value)
+            else:
+                self.finish_job(kind, value)
+                return
         
-        if self.operation_type.get() == "encrypt":
-            result = playfair.encrypt(message)
-            self.log(f"Encrypted {len(message)} characters -> {len(result)} characters")
+        self.root.after(POLL_INTERVAL_MS, self.poll_worker)
+    
+    def update_progress(self, done):
+        """Move the progress bar and periodically log throughput and ETA"""
+        total = self.job["total"]
+        self.progress_bar["value"] = 100.0 * done / total if total else 100.0
+        
+        now = time.monotonic()
+        if now - self.last_report >= REPORT_INTERVAL_S:
+            self.last_report = now
+            rate = done / max(now - self.job_started, 1e-9)
+            eta = (total - done) / rate if rate else 0.0
+            self.log(f"Progress: {self.progress_bar['value']:.0f}% "
+                     f"({rate / (1024 * 1024):.1f} MB/s, ETA {eta:.0f}s)")
+    
+    def finish_job(self, kind, error):
+        """Restore the controls and report how the worker finished"""
+        operation = self.job["operation"]
+        output_file = self.job["output_file"]
+        elapsed = time.monotonic() - self.job_started
+        
+        self.worker = None
+        self.execute_btn.state(["!disabled"])
+        self.cancel_btn.state(["disabled"])
+        
+        if kind == "done":
+            self.progress_bar["value"] = 100
+            self.log(f"Operation completed successfully in {elapsed:.2f}s!")
+            messagebox.showinfo("Success", 
+                              f"File {operation}ed successfully!\n\nOutput: {os.path.basename(output_file)}")
+        elif kind == "cancelled":
+            self.progress_bar["value"] = 0
+            self.log("Operation cancelled, output file left unchanged")
         else:
-            result = playfair.decrypt(message)
-            self.log(f"Decrypted {len(message)} characters -> {len(result)} characters")
-        
-        # Write output
-        with open(self.output_file_path.get(), 'w', encoding='ascii') as f:
-            f.write(result)
-            
-    def execute_vigenere(self):
-        """Execute Vigenère encryption/decryption"""
-        if not self.table_file_path.get():
-            raise ValueError("Please select a table file")
-        if not self.key_file_path.get():
-            raise ValueError("Please select a key file")
+            self.progress_bar["value"] = 0
+            self.log(f"Error: {error}")
+            messagebox.showerror("Error", f"Operation failed:\n{error}")
+    
+    def report(self, message):
+        """Log from the worker thread (delivered through the event queue)"""
+        self.events.put(("log", message))
+    
+    def report_stats(self, recorder):
+        """Log a Recorder's per-stage breakdown from the worker thread"""
+        self.report("Stage timings:")
+        for line in recorder.format():
+            self.report(f"  {line}")
+    
+    def track_progress(self, done):
+        """Progress callback invoked by the worker after every read"""
+        if self.cancel_event.is_set():
+            raise OperationCancelled()
+        now = time.monotonic()
+        if now - self.last_progress >= PROGRESS_INTERVAL_S:
+            self.last_progress = now
+            self.events.put(("progress", done))
+    
+    def open_input(self, job):
+        """Open the job's input through a ProgressReader"""
+        self.last_progress = 0.0
+        return ProgressReader(open(job["input_file"], 'rb', buffering=0), self.track_progress)
             
-        # Read table
-        with open(self.table_file_path.get(), 'r', encoding='ascii') as f:
-            table_content = f.read().strip()
-        
-        # Read key
-        with open(self.key_file_path.get(), 'r', encoding='ascii') as f:
-            key = f.read().strip()
-        
-        # Read input
-        with open(self.input_file_path.get(), 'r', encoding='ascii') as f:
-            message = f.read()
-        
-        vigenere = VigenereCipher.from_table(key, table_content)
-        
-        if self.operation_type.get() == "encrypt":
-            result = vigenere.encrypt(message)
-            self.log(f"Encrypted {len(message)} characters -> {len(result)} characters")
+    def execute_job(self, job):
+        """Run the job's cipher over its input file, like the CLI does for -i/-o
+        
+        Key and table files are read and validated by main.load_settings and
+        the work is done by the handlers the registry names for the cipher.
+        """
+        info = get_cipher(job["name"])
+        settings, options = load_settings(job["name"], job["key_file"] or None,
+                                          job["table_file"] or None, job["mode"])
+        
+        if not info.streaming:
+            # Without a stream there is nothing to report progress on or cancel
+            read, written = info.load_file_handler()(*settings, job["operation"], job["input_file"],
+                                                     job["output_file"], **options)
         else:
-            result = vigenere.decrypt(message)
-            self.log(f"Decrypted {len(message)} characters -> {len(result)} characters")
-        
-        # Write output
-        with open(self.output_file_path.get(), 'w', encoding='ascii') as f:
-            f.write(result)
+            # Stream input to output so progress can be reported and cancelled; the
+            # output file is only replaced once the whole operation succeeded
+            handler = info.load_stream_handler()
+            with self.open_input(job) as src, atomic_output(job["output_file"]) as dst:
+                read, written = handler(*settings, job["operation"], src, dst, **options)
+        self.report(f"{job['operation'].capitalize()}ed {read} bytes -> {written} bytes")
 
 
 def main():
+    # Large Vigenère files start a process pool, which frozen builds must be able to spawn
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = CryptographyApp(root)
     root.mainloop()
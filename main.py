@@ -3,37 +3,107 @@ Cryptography Project - Main Entry Point
 Implements AES, DES, Playfair, and Vigenère ciphers
 """
 
+import argparse
+import multiprocessing
 import os
-from ciphers.aes_cipher import AESCipher
-from ciphers.des_cipher import DESCipher
-from ciphers.playfair_cipher import PlayfairCipher
-from ciphers.vigenere_cipher import VigenereCipher
+import sys
+from ciphers import instrumentation
+from ciphers.atomic_io import DEFAULT_FSYNC, FSYNC_POLICIES, atomic_output
+from ciphers.instrumentation import stage
+from ciphers.registry import available_ciphers, get_cipher
+from ciphers.table_cache import cached_cipher
 
+# Menu choices for the operation prompt
+OPERATIONS = {"1": "encrypt", "2": "decrypt"}
 
-def run_aes():
-    """Run AES cipher with file-based operations"""
-    print("\n=== AES Cipher ===")
+# Exit codes of the command-line interface
+EXIT_OK = 0
+EXIT_FAILURE = 1  # the operation itself failed (bad ciphertext, I/O error, ...)
+EXIT_USAGE = 2    # invalid arguments, key or table; nothing was processed
+
+# Output formats of --stats
+STATS_FORMATS = ("json", "log")
+
+
+def read_text_file(path):
+    """Read and strip an ASCII key or table file"""
+    with open(path, 'r', encoding='ascii') as f:
+        return f.read().strip()
+
+
+def load_settings(cipher, key_file=None, table_file=None, mode=None):
+    """Read and validate key/table files for a cipher
+
+    Returns (args, kwargs) that precede the per-file or per-stream arguments
+    of the cipher's file and stream handlers. Every invalid key or table
+    raises ValueError here, before any input is opened.
+    """
+    info = get_cipher(cipher)
+    if info.needs_key and not key_file:
+        raise ValueError(f"{info.title} requires a key file")
+    if info.needs_table and not table_file:
+        raise ValueError(f"{info.title} requires a table file")
+    if info.modes:
+        mode = mode or info.modes[0]
+        if mode not in info.modes:
+            raise ValueError(f"{info.title} does not support mode {mode}")
+
+    args = []
+    with stage("parse"):
+        if info.needs_table:
+            args.append(read_text_file(table_file))
+        if info.needs_key:
+            key = read_text_file(key_file)
+            if info.binary:
+                key = key.encode('ascii')
+                info.validate_key(key)
+            elif not (key.isascii() and key.isalpha()):
+                raise ValueError(f"{info.title} key must contain only letters A-Z")
+            args.append(key)
+        if info.needs_table:
+            # Parse the table now, so a bad one is rejected before any input is opened
+            cached_cipher(info.name, *args)
+    kwargs = {"mode": mode} if len(info.modes) > 1 else {}
+    return tuple(args), kwargs
+
+
+def choose_mode(info):
+    """Prompt for one of the cipher's block modes, returning None for an invalid choice"""
+    if len(info.modes) < 2:
+        return info.modes[0] if info.modes else None
+    choices = " / ".join(f"{i}-{mode}" for i, mode in enumerate(info.modes, 1))
+    choice = input(f"Choose mode ({choices}) [1]: ").strip() or "1"
+    if choice.isdigit() and 1 <= int(choice) <= len(info.modes):
+        return info.modes[int(choice) - 1]
+    return None
+
+
+def run_cipher(info):
+    """Run one registered cipher with file-based operations"""
+    print(f"\n=== {info.title} ===")
     
-    # Read key from file
-    key_file = input("Enter key file path: ")
+    # Read and validate the table and key files this cipher needs
+    table_file = input("Enter table file path: ") if info.needs_table else None
+    key_file = input("Enter key file path: ") if info.needs_key else None
     try:
-        with open(key_file, 'r', encoding='ascii') as f:
-            key = f.read().strip()
-        
-        # Validate key length (16, 24, or 32 bytes for AES-128, AES-192, AES-256)
-        key_bytes = key.encode('ascii')
-        if len(key_bytes) not in [16, 24, 32]:
-            print(f"Error: Key must be 16, 24, or 32 bytes (128, 192, or 256 bits). Current length: {len(key_bytes)} bytes")
-            return
-    except FileNotFoundError:
-        print(f"Error: Key file '{key_file}' not found")
+        settings, options = load_settings(info.name, key_file, table_file)
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found")
         return
-    except Exception as e:
-        print(f"Error reading key file: {e}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return
+    
+    # Choose block mode (AES CTR/GCM run in parallel across all cores)
+    mode = choose_mode(info)
+    if info.modes and mode is None:
+        print("Invalid mode")
         return
+    if "mode" in options:
+        options["mode"] = mode
     
     # Choose operation
-    operation = input("Choose operation (1-Encrypt / 2-Decrypt): ")
+    operation = OPERATIONS.get(input("Choose operation (1-Encrypt / 2-Decrypt): "))
     
     # Get input file
     input_file = input("Enter input file path: ")
@@ -44,251 +114,157 @@ def run_aes():
     # Get output file
     output_file = input("Enter output file path: ")
     
+    if operation is None:
+        print("Invalid operation")
+        return
+    
     try:
-        aes = AESCipher(key_bytes)
-        
-        if operation == "1":
-            # Encrypt - read binary, write binary
-            with open(input_file, 'rb') as f:
-                data = f.read()
-            
-            encrypted = aes.encrypt_file(data)
-            
-            with open(output_file, 'wb') as f:
-                f.write(encrypted)
-            
-            print(f"File encrypted successfully to '{output_file}'")
-        
-        elif operation == "2":
-            # Decrypt - read binary, write binary
-            with open(input_file, 'rb') as f:
-                data = f.read()
-            
-            decrypted = aes.decrypt_file(data)
-            
-            with open(output_file, 'wb') as f:
-                f.write(decrypted)
-            
-            print(f"File decrypted successfully to '{output_file}'")
-        else:
-            print("Invalid operation")
+        info.load_file_handler()(*settings, operation, input_file, output_file, **options)
+        print(f"File {operation}ed successfully to '{output_file}'")
     
     except Exception as e:
         print(f"Error: {e}")
 
 
-def run_des():
-    """Run DES cipher with file-based operations"""
-    print("\n=== DES Cipher ===")
-    
-    # Read key from file
-    key_file = input("Enter key file path: ")
-    try:
-        with open(key_file, 'r', encoding='ascii') as f:
-            key = f.read().strip()
-        
-        # Validate key length (8 bytes for DES)
-        key_bytes = key.encode('ascii')
-        if len(key_bytes) != 8:
-            print(f"Error: DES key must be exactly 8 bytes. Current length: {len(key_bytes)} bytes")
-            return
-    except FileNotFoundError:
-        print(f"Error: Key file '{key_file}' not found")
-        return
-    except Exception as e:
-        print(f"Error reading key file: {e}")
-        return
-    
-    # Choose operation
-    operation = input("Choose operation (1-Encrypt / 2-Decrypt): ")
+def interactive():
+    """Run the interactive menu"""
+    ciphers = available_ciphers()
+    print("=== Cryptography Project ===")
+    print("\nAvailable Ciphers:")
+    for i, info in enumerate(ciphers, 1):
+        print(f"{i}. {info.title}")
     
-    # Get input file
-    input_file = input("Enter input file path: ")
-    if not os.path.exists(input_file):
-        print(f"Error: Input file '{input_file}' not found")
-        return
+    choice = input(f"\nSelect cipher (1-{len(ciphers)}): ")
     
-    # Get output file
-    output_file = input("Enter output file path: ")
+    if choice.isdigit() and 1 <= int(choice) <= len(ciphers):
+        run_cipher(ciphers[int(choice) - 1])
+    else:
+        print("Invalid choice!")
+
+
+def build_parser():
+    """Build the non-interactive command-line parser"""
+    parser = argparse.ArgumentParser(
+        description="Encrypt or decrypt with AES, DES, Playfair, or Vigenère. "
+                    "Run without arguments for the interactive menu.",
+        epilog=f"Exit codes: {EXIT_OK} success, {EXIT_FAILURE} operation failed, "
+               f"{EXIT_USAGE} invalid arguments, key or table.")
+    subparsers = parser.add_subparsers(dest="cipher", required=True, metavar="COMMAND")
     
-    try:
-        des = DESCipher(key_bytes)
-        
-        if operation == "1":
-            # Encrypt - read binary, write binary
-            with open(input_file, 'rb') as f:
-                data = f.read()
-            
-            encrypted = des.encrypt_file(data)
-            
-            with open(output_file, 'wb') as f:
-                f.write(encrypted)
-            
-            print(f"File encrypted successfully to '{output_file}'")
-        
-        elif operation == "2":
-            # Decrypt - read binary, write binary
-            with open(input_file, 'rb') as f:
-                data = f.read()
-            
-            decrypted = des.decrypt_file(data)
-            
-            with open(output_file, 'wb') as f:
-                f.write(decrypted)
-            
-            print(f"File decrypted successfully to '{output_file}'")
+    for info in available_ciphers():
+        sub = subparsers.add_parser(info.name, help=info.title)
+        group = sub.add_mutually_exclusive_group(required=True)
+        group.add_argument("-e", "--encrypt", dest="operation", action="store_const", const="encrypt")
+        group.add_argument("-d", "--decrypt", dest="operation", action="store_const", const="decrypt")
+        if info.needs_key:
+            sub.add_argument("-k", "--key", required=True, help="key file")
+        if info.needs_table:
+            sub.add_argument("-t", "--table", required=True, help="table file")
+        if len(info.modes) > 1:
+            sub.add_argument("-m", "--mode", choices=info.modes, default=info.modes[0],
+                             help=f"block mode (default: {info.modes[0]})")
+        if info.streaming:
+            sub.add_argument("-i", "--input", default="-", help="input file (default: stdin)")
+            sub.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
         else:
-            print("Invalid operation")
+            sub.add_argument("-i", "--input", required=True, help="input file")
+            sub.add_argument("-o", "--output", required=True, help="output file")
+        sub.add_argument("--fsync", choices=FSYNC_POLICIES, default=DEFAULT_FSYNC,
+                         help="when the output file is synced to disk: never, once complete, or also "
+                              f"periodically while writing (default: {DEFAULT_FSYNC})")
+        sub.add_argument("--stats", choices=STATS_FORMATS,
+                         help="print per-stage timings to stderr as a JSON summary or log lines")
     
-    except Exception as e:
-        print(f"Error: {e}")
+    subparsers.add_parser("batch", add_help=False,
+                          help="process a directory tree (see 'batch -h')")
+    return parser
 
 
-def run_playfair():
-    """Run Playfair cipher with file-based operations"""
-    print("\n=== Playfair Cipher ===")
-    
-    # Read table/matrix from file
-    table_file = input("Enter table file path (5x5 matrix): ")
-    try:
-        with open(table_file, 'r', encoding='ascii') as f:
-            table_content = f.read().strip()
-    except FileNotFoundError:
-        print(f"Error: Table file '{table_file}' not found")
-        return
-    except Exception as e:
-        print(f"Error reading table file: {e}")
-        return
-    
-    # Choose operation
-    operation = input("Choose operation (1-Encrypt / 2-Decrypt): ")
-    
-    # Get input file
-    input_file = input("Enter input file path: ")
-    if not os.path.exists(input_file):
-        print(f"Error: Input file '{input_file}' not found")
-        return
-    
-    # Get output file
-    output_file = input("Enter output file path: ")
+def print_stats(recorder, fmt):
+    """Write a Recorder's per-stage timings to stderr in the --stats format"""
+    if fmt == "json":
+        print(recorder.to_json(), file=sys.stderr)
+    else:
+        for line in recorder.log_lines():
+            print(line, file=sys.stderr)
+
+
+def run_command(args):
+    """Run one parsed command, streaming input to output, and return an exit code"""
+    stats = getattr(args, "stats", None)
+    if not stats:
+        return _run_command(args)
     
+    recorder = instrumentation.enable()
     try:
-        # Read message from file (ASCII only)
-        with open(input_file, 'r', encoding='ascii') as f:
-            message = f.read()
-        
-        playfair = PlayfairCipher.from_matrix(table_content)
-        
-        if operation == "1":
-            # Encrypt
-            result = playfair.encrypt(message)
-        elif operation == "2":
-            # Decrypt
-            result = playfair.decrypt(message)
-        else:
-            print("Invalid operation")
-            return
-        
-        # Write result to file (ASCII only)
-        with open(output_file, 'w', encoding='ascii') as f:
-            f.write(result)
-        
-        operation_name = "encrypted" if operation == "1" else "decrypted"
-        print(f"File {operation_name} successfully to '{output_file}'")
-    
-    except Exception as e:
-        print(f"Error: {e}")
+        return _run_command(args)
+    finally:
+        instrumentation.disable()
+        print_stats(recorder, stats)
 
 
-def run_vigenere():
-    """Run Vigenère cipher with file-based operations"""
-    print("\n=== Vigenère Cipher ===")
-    
-    # Read table from file
-    table_file = input("Enter table file path: ")
+def _run_command(args):
+    """Body of run_command, with instrumentation already set up"""
+    info = get_cipher(args.cipher)
     try:
-        with open(table_file, 'r', encoding='ascii') as f:
-            table_content = f.read().strip()
-    except FileNotFoundError:
-        print(f"Error: Table file '{table_file}' not found")
-        return
-    except Exception as e:
-        print(f"Error reading table file: {e}")
-        return
+        settings, options = load_settings(args.cipher, getattr(args, "key", None),
+                                          getattr(args, "table", None),
+                                          getattr(args, "mode", None))
+        if not info.streaming:
+            return _run_files(info, args, settings, options)
+        src = sys.stdin.buffer if args.input == "-" else open(args.input, 'rb')
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_USAGE
     
-    # Read key from file
-    key_file = input("Enter key file path: ")
+    handler = info.load_stream_handler()
     try:
-        with open(key_file, 'r', encoding='ascii') as f:
-            key = f.read().strip()
-    except FileNotFoundError:
-        print(f"Error: Key file '{key_file}' not found")
-        return
+        with src:
+            if args.output == "-":
+                try:
+                    handler(*settings, args.operation, src, sys.stdout.buffer, **options)
+                finally:
+                    sys.stdout.buffer.flush()
+            else:
+                # A failed run leaves any existing output file untouched
+                with atomic_output(args.output, args.fsync) as dst:
+                    handler(*settings, args.operation, src, dst, **options)
+    except BrokenPipeError:
+        # Downstream reader went away; silence the flush at interpreter exit
+        sys.stdout = open(os.devnull, 'w')
+        return EXIT_FAILURE
     except Exception as e:
-        print(f"Error reading key file: {e}")
-        return
-    
-    # Choose operation
-    operation = input("Choose operation (1-Encrypt / 2-Decrypt): ")
-    
-    # Get input file
-    input_file = input("Enter input file path: ")
-    if not os.path.exists(input_file):
-        print(f"Error: Input file '{input_file}' not found")
-        return
-    
-    # Get output file
-    output_file = input("Enter output file path: ")
-    
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK
+
+
+def _run_files(info, args, settings, options):
+    """Run a cipher that cannot stream through its file handler"""
+    if not os.path.isfile(args.input):
+        raise ValueError(f"Input file '{args.input}' not found")
     try:
-        # Read message from file (ASCII only)
-        with open(input_file, 'r', encoding='ascii') as f:
-            message = f.read()
-        
-        vigenere = VigenereCipher.from_table(key, table_content)
-        
-        if operation == "1":
-            # Encrypt
-            result = vigenere.encrypt(message)
-        elif operation == "2":
-            # Decrypt
-            result = vigenere.decrypt(message)
-        else:
-            print("Invalid operation")
-            return
-        
-        # Write result to file (ASCII only)
-        with open(output_file, 'w', encoding='ascii') as f:
-            f.write(result)
-        
-        operation_name = "encrypted" if operation == "1" else "decrypted"
-        print(f"File {operation_name} successfully to '{output_file}'")
-    
+        info.load_file_handler()(*settings, args.operation, args.input, args.output,
+                                 fsync=args.fsync, **options)
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK
 
 
-def main():
-    print("=== Cryptography Project ===")
-    print("\nAvailable Ciphers:")
-    print("1. AES (Advanced Encryption Standard)")
-    print("2. DES (Data Encryption Standard)")
-    print("3. Playfair Cipher")
-    print("4. Vigenère Cipher")
-    
-    choice = input("\nSelect cipher (1-4): ")
+def main(argv=None):
+    # Large Vigenère files start a process pool, which frozen builds must be able to spawn
+    multiprocessing.freeze_support()
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        interactive()
+        return EXIT_OK
     
-    if choice == "1":
-        run_aes()
-    elif choice == "2":
-        run_des()
-    elif choice == "3":
-        run_playfair()
-    elif choice == "4":
-        run_vigenere()
-    else:
-        print("Invalid choice!")
+    if argv[0] == "batch":
+        from batch import main as batch_main
+        return batch_main(argv[1:], prog=f"{os.path.basename(sys.argv[0])} batch")
+    return run_command(build_parser().parse_args(argv))
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+"""
+Test Helpers
+Temporary directories and example keys shared by the test modules
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+
+AES_KEY = b"0123456789abcdef0123456789abcdef"
+DES_KEY = b"8bytekey"
+
+
+class TempDirTestCase(unittest.TestCase):
+    """TestCase with a fresh temporary directory in self.dir"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def write(self, name, data):
+        path = self.path(name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read(self, name):
+        with open(self.path(name), 'rb') as f:
+            return f.read()
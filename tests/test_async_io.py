@@ -0,0 +1,82 @@
+"""
+Asyncio Helper Tests
+Async stream/file round trips and CipherExecutor bookkeeping
+"""
+
+import asyncio
+import gc
+import io
+import os
+import unittest
+
+from ciphers.aes_cipher import AESCipher
+from ciphers.async_io import (CipherExecutor, decrypt_file_async, decrypt_stream_async,
+                              encrypt_file_async, encrypt_stream_async)
+from tests.helpers import AES_KEY, TempDirTestCase
+
+
+class _Reader:
+    """Minimal async reader over bytes"""
+
+    def __init__(self, data):
+        self.buffer = io.BytesIO(data)
+
+    async def read(self, size):
+        return self.buffer.read(size)
+
+
+class _Writer:
+    """Minimal async writer collecting bytes"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    async def write(self, data):
+        self.buffer.write(data)
+
+
+class AsyncIOTests(TempDirTestCase):
+
+    def test_stream_round_trip(self):
+        cipher = AESCipher(AES_KEY)
+        data = os.urandom(100003)
+
+        async def run(executor):
+            encrypted = _Writer()
+            await encrypt_stream_async(cipher, _Reader(data), encrypted, executor, chunk_size=4096)
+            decrypted = _Writer()
+            read, written = await decrypt_stream_async(
+                cipher, _Reader(encrypted.buffer.getvalue()), decrypted, executor, chunk_size=4096)
+            return decrypted.buffer.getvalue(), read, written
+
+        executor = CipherExecutor(workers=2)
+        self.addCleanup(executor.shutdown)
+        plain, read, written = asyncio.run(run(executor))
+        self.assertEqual(plain, data)
+        self.assertEqual(written, len(data))
+
+    def test_file_round_trip_and_failed_decrypt(self):
+        cipher = AESCipher(AES_KEY)
+        data = os.urandom(5000)
+        source = self.write("plain", data)
+        asyncio.run(encrypt_file_async(cipher, source, self.path("enc")))
+        asyncio.run(decrypt_file_async(cipher, self.path("enc"), self.path("dec")))
+        self.assertEqual(self.read("dec"), data)
+
+        # A failed decrypt leaves the previous output as it was and no temporary file behind
+        with self.assertRaises(ValueError):
+            asyncio.run(decrypt_file_async(cipher, source, self.path("dec")))
+        self.assertEqual(self.read("dec"), data)
+        self.assertEqual(sorted(os.listdir(self.dir)), ["dec", "enc", "plain"])
+
+    def test_finished_loops_are_not_kept_alive(self):
+        executor = CipherExecutor(workers=1)
+        self.addCleanup(executor.shutdown)
+        for _ in range(3):
+            asyncio.run(executor.run(len, b"abc"))
+        gc.collect()
+        self.assertEqual(len(executor._slots), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Atomic Output Tests
+Buffered writes, commit/discard behaviour, permissions and cleanup of AtomicWriter
+"""
+
+import os
+import stat
+import unittest
+
+from ciphers.atomic_io import FSYNC_POLICIES, PARTIAL_SUFFIX, AtomicWriter, atomic_output
+from tests.helpers import TempDirTestCase
+
+
+class AtomicWriterTests(TempDirTestCase):
+
+    def assertNoPartials(self):
+        self.assertEqual([f for f in os.listdir(self.dir) if f.endswith(PARTIAL_SUFFIX)], [])
+
+    def test_buffered_writes(self):
+        data = os.urandom(10_000)
+        for buffer_size in (1, 7, 4096, 100_000):
+            for piece in (1, 333, 4096, len(data)):
+                with self.subTest(buffer_size=buffer_size, piece=piece):
+                    with AtomicWriter(self.path("out"), fsync="none", buffer_size=buffer_size) as out:
+                        for start in range(0, len(data), piece):
+                            self.assertEqual(out.write(data[start:start + piece]),
+                                             len(data[start:start + piece]))
+                    self.assertEqual(self.read("out"), data)
+        self.assertNoPartials()
+
+    def test_fsync_policies(self):
+        for policy in FSYNC_POLICIES:
+            with self.subTest(policy=policy):
+                with atomic_output(self.path(policy), policy) as out:
+                    out.write(policy.encode())
+                self.assertEqual(self.read(policy), policy.encode())
+        with self.assertRaises(ValueError):
+            AtomicWriter(self.path("bad"), fsync="always")
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted(FSYNC_POLICIES))
+
+    def test_nothing_appears_before_commit(self):
+        out = AtomicWriter(self.path("out"))
+        out.write(b"data")
+        out.flush()
+        self.assertFalse(os.path.exists(self.path("out")))
+        out.commit()
+        out.commit()
+        self.assertEqual(self.read("out"), b"data")
+        self.assertNoPartials()
+
+    def test_exception_keeps_previous_file(self):
+        self.write("out", b"old")
+        with self.assertRaises(RuntimeError):
+            with atomic_output(self.path("out")) as out:
+                out.write(b"new" * 1000)
+                raise RuntimeError("interrupted")
+        self.assertEqual(self.read("out"), b"old")
+        self.assertNoPartials()
+
+    def test_failed_commit_cleans_up(self):
+        # A directory cannot be replaced by a file
+        os.mkdir(self.path("out"))
+        out = AtomicWriter(self.path("out"))
+        out.write(b"data")
+        with self.assertRaises(OSError):
+            out.commit()
+        self.assertTrue(out.closed)
+        self.assertTrue(os.path.isdir(self.path("out")))
+        self.assertNoPartials()
+
+    def test_missing_directory_names_the_path(self):
+        path = self.path(os.path.join("missing", "out"))
+        with self.assertRaises(FileNotFoundError) as raised:
+            AtomicWriter(path)
+        self.assertEqual(raised.exception.filename, path)
+
+    @unittest.skipUnless(hasattr(os, 'symlink') and os.name == 'posix', "POSIX symlinks")
+    def test_symlink_target_is_written_through(self):
+        os.mkdir(self.path("real"))
+        self.write(os.path.join("real", "out"), b"old")
+        os.symlink(os.path.join("real", "out"), self.path("link"))
+        os.symlink(os.path.join("real", "new"), self.path("dangling"))
+        for name, target in (("link", "out"), ("dangling", "new")):
+            with self.subTest(name):
+                with atomic_output(self.path(name)) as out:
+                    out.write(b"new")
+                self.assertTrue(os.path.islink(self.path(name)))
+                self.assertEqual(self.read(os.path.join("real", target)), b"new")
+        # The temporary file was made next to the real target, and renamed away
+        self.assertEqual(sorted(os.listdir(self.path("real"))), ["new", "out"])
+
+    def test_device_is_written_directly(self):
+        for policy in FSYNC_POLICIES:
+            with self.subTest(policy=policy):
+                with atomic_output(os.devnull, policy) as out:
+                    self.assertFalse(out.mappable)
+                    out.write(b"data" * 1000)
+                with self.assertRaises(RuntimeError):
+                    with atomic_output(os.devnull, policy) as out:
+                        out.write(b"data")
+                        raise RuntimeError("interrupted")
+        self.assertTrue(os.path.exists(os.devnull))
+        self.assertFalse(os.path.isfile(os.devnull))
+
+    @unittest.skipUnless(os.name == 'posix', "POSIX permissions")
+    def test_new_file_follows_umask(self):
+        for umask in (0o022, 0o077):
+            with self.subTest(umask=oct(umask)):
+                previous = os.umask(umask)
+                try:
+                    with atomic_output(self.path(f"out{umask}")) as out:
+                        out.write(b"data")
+                finally:
+                    os.umask(previous)
+                self.assertEqual(stat.S_IMODE(os.stat(self.path(f"out{umask}")).st_mode),
+                                 0o666 & ~umask)
+
+    @unittest.skipUnless(os.name == 'posix', "POSIX permissions")
+    def test_replaced_file_keeps_its_mode(self):
+        self.write("out", b"old")
+        os.chmod(self.path("out"), 0o640)
+        with atomic_output(self.path("out")) as out:
+            out.write(b"new")
+        self.assertEqual(self.read("out"), b"new")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path("out")).st_mode), 0o640)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Batch Mode Tests
+Directory round trips, resuming and argument validation of batch.py
+"""
+
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+import batch
+from ciphers import vigenere_cipher
+from ciphers.parallel import worker_budget
+from main import EXIT_OK, EXIT_USAGE, load_settings
+from tests.helpers import EXAMPLES_DIR, TempDirTestCase
+
+AES_KEY_FILE = str(EXAMPLES_DIR / "aes_key.txt")
+VIGENERE_TABLE = str(EXAMPLES_DIR / "vigenere_table.txt")
+VIGENERE_KEY = str(EXAMPLES_DIR / "vigenere_key.txt")
+
+FILES = {"a.txt": b"first file", os.path.join("sub", "b.bin"): os.urandom(1000), "empty": b""}
+
+
+def quiet(line):
+    pass
+
+
+class BatchTests(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.path(os.path.join("in", "sub")))
+        for name, data in FILES.items():
+            self.write(os.path.join("in", name), data)
+
+    def run_main(self, *argv):
+        """Run batch.main quietly, returning its exit code"""
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            return batch.main(list(argv))
+
+    def test_round_trip_and_resume(self):
+        summary = batch.run_batch("aes", "encrypt", self.path("in"), self.path("enc"),
+                                  key_file=AES_KEY_FILE, workers=2, log=quiet)
+        self.assertEqual((summary["processed"], summary["failed"]), (len(FILES), 0))
+
+        again = batch.run_batch("aes", "encrypt", self.path("in"), self.path("enc"),
+                                key_file=AES_KEY_FILE, workers=2, log=quiet)
+        self.assertEqual((again["processed"], again["skipped"]), (0, len(FILES)))
+
+        batch.run_batch("aes", "decrypt", self.path("enc"), self.path("dec"),
+                        key_file=AES_KEY_FILE, workers=2, log=quiet)
+        for name, data in FILES.items():
+            self.assertEqual(self.read(os.path.join("dec", name)), data)
+
+    def test_output_inside_input_is_not_an_input(self):
+        output = self.path(os.path.join("in", "out"))
+        self.assertEqual(self.run_main("aes", "encrypt", self.path("in"), output,
+                                       "--key", AES_KEY_FILE), EXIT_OK)
+        self.assertEqual(self.run_main("aes", "encrypt", self.path("in"), output,
+                                       "--key", AES_KEY_FILE, "--force"), EXIT_OK)
+        self.assertEqual(sorted(os.listdir(output)), sorted(["a.txt", "sub", "empty"]))
+
+    def test_invalid_arguments_process_nothing(self):
+        bad_table = self.write("bad_table", b"NOT A TABLE")
+        runs = {
+            "bad table": ["playfair", "encrypt", self.path("in"), self.path("out"), "--table", bad_table],
+            "missing input": ["aes", "encrypt", self.path("missing"), self.path("out"),
+                              "--key", AES_KEY_FILE],
+            "output is input": ["aes", "encrypt", self.path("in"), self.path("in"),
+                                "--key", AES_KEY_FILE, "--force"],
+            "output is input, spelled differently": ["aes", "encrypt", self.path("in"),
+                                                     self.path(os.path.join("in", "sub", "..")),
+                                                     "--key", AES_KEY_FILE],
+        }
+        for name, argv in runs.items():
+            with self.subTest(name):
+                self.assertEqual(self.run_main(*argv), EXIT_USAGE)
+                self.assertFalse(os.path.exists(self.path("out")))
+                self.assertEqual(self.read(os.path.join("in", "a.txt")), FILES["a.txt"])
+
+
+class WorkerBudgetTests(TempDirTestCase):
+
+    def test_budget_splits_the_cpus(self):
+        with mock.patch("ciphers.parallel.default_workers", return_value=8):
+            self.assertEqual([worker_budget(n) for n in (0, 1, 3, 8, 16)], [8, 8, 2, 1, 1])
+
+    def test_pool_jobs_do_not_start_their_own_pool(self):
+        # Every file counts as huge, yet with a budget of one worker nothing is sharded
+        settings = load_settings("vigenere", VIGENERE_KEY, VIGENERE_TABLE)
+        source = self.write("plain", b"Attack at dawn! " * 100)
+        nested = AssertionError("nested process pool")
+        cipher = vigenere_cipher.VigenereCipher
+        with mock.patch.object(vigenere_cipher, "PARALLEL_MIN_SIZE", 1), \
+                mock.patch.object(cipher, "encrypt_file_parallel", side_effect=nested), \
+                mock.patch.object(cipher, "decrypt_file_parallel", side_effect=nested):
+            batch.process_file("vigenere", settings, "encrypt", source, self.path("enc"), workers=1)
+            batch.process_file("vigenere", settings, "decrypt", self.path("enc"), self.path("dec"),
+                               workers=1)
+        self.assertEqual(self.read("dec"), self.read("plain").upper())
+
+
+if __name__ == "__main__":
+    unittest.main()
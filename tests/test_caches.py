@@ -0,0 +1,82 @@
+"""
+Cache Tests
+Eviction, statistics and sharing of the bounded LRU behind the key schedule and table caches
+"""
+
+import unittest
+
+from Crypto.Cipher import AES, DES
+
+from ciphers.key_cache import KeyScheduleCache
+from ciphers.lru_cache import BoundedLRU
+from ciphers.table_cache import TableCache
+from tests.helpers import AES_KEY, DES_KEY, EXAMPLES_DIR
+
+
+class BoundedLRUTests(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = BoundedLRU(2)
+        built = []
+
+        def build(key):
+            built.append(key)
+            return key.upper()
+
+        for key in ("a", "b", "a", "c", "a", "b"):
+            self.assertEqual(cache.get_or_build(key, lambda: build(key)), key.upper())
+        # "b" was evicted by "c" since "a" had just been used, so it is built twice
+        self.assertEqual(built, ["a", "b", "c", "b"])
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (2, 4, 2))
+
+        cache.clear()
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 0, 0))
+
+    def test_failed_build_is_not_cached(self):
+        cache = BoundedLRU(4)
+
+        def fail():
+            raise ValueError("bad")
+
+        with self.assertRaises(ValueError):
+            cache.get_or_build("k", fail)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_or_build("k", lambda: 1), 1)
+
+
+class KeyScheduleCacheTests(unittest.TestCase):
+
+    def test_schedules_are_shared_per_algorithm_and_key(self):
+        cache = KeyScheduleCache(maxsize=4)
+        aes = cache.get(AES, AES_KEY)
+        self.assertIs(cache.get(AES, bytearray(AES_KEY)), aes)
+        self.assertIsNot(cache.get(DES, DES_KEY), aes)
+        self.assertEqual(aes.encrypt(bytes(16)), AES.new(AES_KEY, AES.MODE_ECB).encrypt(bytes(16)))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+
+class TableCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.playfair = (EXAMPLES_DIR / "playfair_table.txt").read_text(encoding='utf-8')
+        self.vigenere = (EXAMPLES_DIR / "vigenere_table.txt").read_text(encoding='utf-8')
+
+    def test_tables_are_shared_by_content(self):
+        cache = TableCache(maxsize=4)
+        playfair = cache.get("playfair", self.playfair)
+        self.assertIs(cache.get("playfair", str(self.playfair)), playfair)
+
+        vigenere = cache.get("vigenere", self.vigenere, "KEY")
+        self.assertIsNot(cache.get("vigenere", self.vigenere, "OTHER"), vigenere)
+        self.assertIs(cache.get("vigenere", self.vigenere, "KEY"), vigenere)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (2, 3, 3))
+
+    def test_invalid_table_is_not_cached(self):
+        cache = TableCache()
+        with self.assertRaises(ValueError):
+            cache.get("playfair", "too short")
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Classical Cipher Tests
+Known answers and chunked-stream equivalence of the Playfair and Vigenère engines
+"""
+
+import random
+import unittest
+
+from ciphers.playfair_cipher import PlayfairCipher
+from ciphers.vigenere_cipher import ENGINES, HAS_NUMPY, NUMPY_MIN_LENGTH, VigenereCipher
+from tests.helpers import EXAMPLES_DIR
+
+PLAYFAIR_TABLE = (EXAMPLES_DIR / "playfair_table.txt").read_text(encoding='utf-8')
+VIGENERE_TABLE = (EXAMPLES_DIR / "vigenere_table.txt").read_text(encoding='utf-8')
+
+# Letters and spaces only, so the original implementations accept them too
+WORDS = ["attack", "at", "dawn", "BALLOON", "jazz", "Hello", "ee", "x", "queen", "Bookkeeper"]
+
+
+def sample_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def reference_playfair(matrix, text, decrypt=False):
+    """The original character-by-character Playfair, kept as an oracle"""
+    if not decrypt:
+        text = text.upper().replace('J', 'I').replace(' ', '')
+        prepared = ""
+        i = 0
+        while i < len(text):
+            prepared += text[i]
+            if i + 1 < len(text) and text[i] != text[i + 1]:
+                prepared += text[i + 1]
+                i += 1
+            else:
+                prepared += 'X'
+            i += 1
+        text = prepared
+    shift = -1 if decrypt else 1
+    position = {c: (r, k) for r, row in enumerate(matrix) for k, c in enumerate(row)}
+    result = ""
+    for i in range(0, len(text), 2):
+        (r1, c1), (r2, c2) = position[text[i]], position[text[i + 1]]
+        if r1 == r2:
+            result += matrix[r1][(c1 + shift) % 5] + matrix[r2][(c2 + shift) % 5]
+        elif c1 == c2:
+            result += matrix[(r1 + shift) % 5][c1] + matrix[(r2 + shift) % 5][c2]
+        else:
+            result += matrix[r1][c2] + matrix[r2][c1]
+    return result
+
+
+def reference_vigenere(table, key, text, decrypt=False):
+    """The original character-by-character Vigenère, kept as an oracle"""
+    result = ""
+    n = 0
+    for char in text.upper():
+        if char.isalpha():
+            row = table[ord(key[n % len(key)]) - ord('A')]
+            result += chr(row.index(char) + ord('A')) if decrypt else row[ord(char) - ord('A')]
+            n += 1
+        else:
+            result += char
+    return result
+
+
+def split(data, rng):
+    """Cut data into random chunks, including empty ones and single characters"""
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = start + rng.choice((0, 1, 2, 3, 17, 256))
+        chunks.append(data[start:end])
+        start = end
+    return chunks
+
+
+class PlayfairTests(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(1)
+        self.cipher = PlayfairCipher.from_matrix(PLAYFAIR_TABLE)
+
+    def test_known_answers(self):
+        # Textbook examples with the keys "playfair example" and "monarchy"
+        cipher = PlayfairCipher("playfair example")
+        self.assertEqual(cipher.encrypt("Hide the gold in the tree stump"), "BMODZBXDNABEKUDMUIXMMOUVIF")
+        self.assertEqual(cipher.decrypt("BMODZBXDNABEKUDMUIXMMOUVIF"), "HIDETHEGOLDINTHETREXESTUMP")
+        self.assertEqual(PlayfairCipher("monarchy").encrypt("balloon"), "IBSUPMNA")
+
+    def test_matches_reference(self):
+        for words in (1, 2, 5, 50, 500):
+            text = sample_text(self.rng, words)
+            with self.subTest(words=words):
+                expected = reference_playfair(self.cipher.matrix, text)
+                self.assertEqual(self.cipher.encrypt(text), expected)
+                self.assertEqual(self.cipher.encrypt_bytes(text.encode()), expected.encode())
+                self.assertEqual(self.cipher.decrypt(expected),
+                                 reference_playfair(self.cipher.matrix, expected, decrypt=True))
+                self.assertEqual(self.cipher.decrypt_bytes(expected.encode()),
+                                 self.cipher.decrypt(expected).encode())
+
+    def test_streams_match_whole_input(self):
+        for trial in range(20):
+            text = sample_text(self.rng, self.rng.randrange(1, 200))
+            ciphertext = self.cipher.encrypt(text)
+            with self.subTest(trial=trial):
+                self.assertEqual("".join(self.cipher.encrypt_stream(split(text, self.rng))), ciphertext)
+                self.assertEqual(b"".join(self.cipher.encrypt_bytes_stream(split(text.encode(), self.rng))),
+                                 ciphertext.encode())
+                self.assertEqual("".join(self.cipher.decrypt_stream(split(ciphertext, self.rng))),
+                                 self.cipher.decrypt(ciphertext))
+                self.assertEqual(b"".join(self.cipher.decrypt_bytes_stream(
+                    split(ciphertext.encode(), self.rng))), self.cipher.decrypt(ciphertext).encode())
+
+    def test_odd_ciphertext_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.cipher.decrypt("ABC")
+        with self.assertRaises(ValueError):
+            list(self.cipher.decrypt_bytes_stream([b"AB", b"C"]))
+
+
+class VigenereTests(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(2)
+        self.engines = [engine for engine in ENGINES if engine != "numpy" or HAS_NUMPY]
+
+    def ciphers(self, key="LEMON"):
+        """Yield (name, cipher) for every engine, with the built-in and the example table"""
+        for engine in self.engines:
+            yield f"{engine}/built-in", VigenereCipher(key, engine=engine)
+            yield f"{engine}/example", VigenereCipher.from_table(key, VIGENERE_TABLE, engine)
+
+    def test_known_answers(self):
+        for name, cipher in self.ciphers():
+            with self.subTest(cipher=name):
+                self.assertEqual(cipher.encrypt("attack at dawn"), "LXFOPV EF RNHR")
+                self.assertEqual(cipher.decrypt("LXFOPV EF RNHR"), "ATTACK AT DAWN")
+                self.assertEqual(cipher.encrypt_bytes(b"Attack, at dawn!"), b"LXFOPV, EF RNHR!")
+
+    def test_matches_reference(self):
+        for words in (1, 10, NUMPY_MIN_LENGTH // 4):
+            text = sample_text(self.rng, words) + ", the end."
+            for name, cipher in self.ciphers("KEYWORD"):
+                with self.subTest(words=words, cipher=name):
+                    expected = reference_vigenere(cipher.table, "KEYWORD", text)
+                    self.assertEqual(cipher.encrypt(text), expected)
+                    self.assertEqual(cipher.encrypt_bytes(text.encode()), expected.encode())
+                    self.assertEqual(cipher.decrypt(expected),
+                                     reference_vigenere(cipher.table, "KEYWORD", expected, decrypt=True))
+                    self.assertEqual(cipher.decrypt_bytes(expected.encode()), text.upper().encode())
+
+    def test_streams_match_whole_input(self):
+        for name, cipher in self.ciphers("KEY"):
+            text = sample_text(self.rng, 2000) + "!"
+            ciphertext = cipher.encrypt(text)
+            with self.subTest(cipher=name):
+                self.assertEqual("".join(cipher.encrypt_stream(split(text, self.rng))), ciphertext)
+                self.assertEqual(b"".join(cipher.encrypt_bytes_stream(split(text.encode(), self.rng))),
+                                 ciphertext.encode())
+                self.assertEqual("".join(cipher.decrypt_stream(split(ciphertext, self.rng))), text.upper())
+                self.assertEqual(b"".join(cipher.decrypt_bytes_stream(split(ciphertext.encode(), self.rng))),
+                                 text.upper().encode())
+
+    def test_parallel_matches_serial(self):
+        cipher = VigenereCipher.from_table("KEYWORD", VIGENERE_TABLE)
+        # Shards end mid-word and mid-key, so the key offsets of every shard matter
+        data = (sample_text(self.rng, 3000) + "\n").encode()
+        ciphertext = cipher.encrypt_parallel(data, workers=2, shard_size=1001)
+        self.assertEqual(ciphertext, cipher.encrypt_bytes(data))
+        self.assertEqual(cipher.decrypt_parallel(ciphertext, workers=2, shard_size=777),
+                         data.upper())
+        self.assertEqual(cipher.encrypt_parallel(data, workers=1, shard_size=1001), ciphertext)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Command-Line Tests
+Exit codes and file round trips of the non-interactive main.py commands
+"""
+
+import contextlib
+import io
+import unittest
+
+import main
+from tests.helpers import EXAMPLES_DIR, TempDirTestCase
+
+PLAYFAIR_TABLE = str(EXAMPLES_DIR / "playfair_table.txt")
+VIGENERE_TABLE = str(EXAMPLES_DIR / "vigenere_table.txt")
+VIGENERE_KEY = str(EXAMPLES_DIR / "vigenere_key.txt")
+AES_KEY_FILE = str(EXAMPLES_DIR / "aes_key.txt")
+
+
+class CommandTests(TempDirTestCase):
+
+    def run_main(self, *argv):
+        """Run main.main quietly, returning its exit code"""
+        with contextlib.redirect_stderr(io.StringIO()):
+            return main.main(list(argv))
+
+    def test_round_trips(self):
+        source = self.write("plain", b"Attack at dawn, hold the bridge!\n")
+        for command in (["aes", "-k", AES_KEY_FILE], ["aes", "-k", AES_KEY_FILE, "-m", "GCM"],
+                        ["vigenere", "-t", VIGENERE_TABLE, "-k", VIGENERE_KEY]):
+            with self.subTest(command=command):
+                self.assertEqual(self.run_main(*command, "-e", "-i", source, "-o", self.path("enc")),
+                                 main.EXIT_OK)
+                self.assertEqual(self.run_main(*command, "-d", "-i", self.path("enc"),
+                                               "-o", self.path("dec")), main.EXIT_OK)
+                self.assertEqual(self.read("dec").upper(), self.read("plain").upper())
+
+    def test_invalid_keys_and_tables_are_usage_errors(self):
+        source = self.write("plain", b"hello")
+        bad_key = self.write("bad_key", b"MY KEY")
+        bad_table = self.write("bad_table", b"ABCDEFG")
+        short_key = self.write("short_key", b"tooshort")
+        commands = {
+            "vigenere key with a space": ["vigenere", "-t", VIGENERE_TABLE, "-k", bad_key],
+            "bad vigenere table": ["vigenere", "-t", bad_table, "-k", VIGENERE_KEY],
+            "bad playfair table": ["playfair", "-t", bad_table],
+            "short aes key": ["aes", "-k", short_key],
+            "missing key file": ["aes", "-k", self.path("missing")],
+        }
+        for name, command in commands.items():
+            with self.subTest(name):
+                self.assertEqual(self.run_main(*command, "-e", "-i", source, "-o", self.path("out")),
+                                 main.EXIT_USAGE)
+
+    def test_bad_ciphertext_is_a_failure(self):
+        source = self.write("garbage", b"not a ciphertext at all")
+        self.assertEqual(self.run_main("aes", "-k", AES_KEY_FILE, "-d", "-i", source,
+                                       "-o", self.path("out")), main.EXIT_FAILURE)
+
+
+if __name__ == "__main__":
+    unittest.main()
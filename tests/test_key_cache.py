@@ -0,0 +1,103 @@
+"""
+Batched CBC Tests
+Known-answer and cross-checks of the cached-schedule CBC helpers against PyCryptodome's CBC mode
+"""
+
+import os
+import random
+import unittest
+
+from Crypto.Cipher import AES, DES
+from Crypto.Util.Padding import pad
+
+from ciphers.aes_cipher import AESCipher
+from ciphers.des_cipher import DESCipher
+from ciphers.key_cache import (LANE_MAX_BLOCKS, cbc_decrypt_many, cbc_encrypt_many,
+                               strip_pkcs7)
+from tests.helpers import AES_KEY, DES_KEY
+
+# NIST SP 800-38A, F.2.1 CBC-AES128.Encrypt
+NIST_KEY = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+NIST_IV = bytes.fromhex("000102030405060708090a0b0c0d0e0f")
+NIST_PLAINTEXT = bytes.fromhex(
+    "6bc1bee22e409f96e93d7e117393172a" "ae2d8a571e03ac9c9eb76fac45af8e51"
+    "30c81c46a35ce411e5fbc1191a0a52ef" "f69f2445df4f9b17ad2b417be66c3710")
+NIST_CIPHERTEXT = bytes.fromhex(
+    "7649abac8119b246cee98e9b12e9197d" "5086cb9b507219ee95db113a917678b2"
+    "73bed6b8e3c1743b7116e69e22229516" "3ff1caa1681fac09120eca307586e1a7")
+
+MODULES = ((AES, AES_KEY), (DES, DES_KEY))
+
+
+def reference_encrypt(module, key, payload, iv):
+    return module.new(key, module.MODE_CBC, iv).encrypt(payload)
+
+
+class CBCManyTests(unittest.TestCase):
+
+    def test_nist_vector(self):
+        # Prefixes of the vector are valid CBC messages too, so the lanes get several lengths
+        payloads = [NIST_PLAINTEXT[:16 * blocks] for blocks in (4, 1, 3, 2)] * 3
+        cts = cbc_encrypt_many(AES, NIST_KEY, payloads, [NIST_IV] * len(payloads))
+        for payload, ct in zip(payloads, cts):
+            self.assertEqual(ct, NIST_CIPHERTEXT[:len(payload)])
+
+        plain = cbc_decrypt_many(AES, NIST_KEY, [(NIST_IV, ct) for ct in cts])
+        self.assertEqual(plain, payloads)
+
+    def test_matches_pycryptodome(self):
+        rng = random.Random(15)
+        for module, key in MODULES:
+            block_size = module.block_size
+            # Lane-sized and longer messages, in random order
+            lengths = [rng.randrange(0, (LANE_MAX_BLOCKS + 4) * block_size) for _ in range(200)]
+            for count in (1, 2, 50, 200):
+                with self.subTest(module=module.__name__, count=count):
+                    payloads = [pad(os.urandom(n), block_size) for n in lengths[:count]]
+                    ivs = [os.urandom(block_size) for _ in payloads]
+                    cts = cbc_encrypt_many(module, key, payloads, ivs)
+                    self.assertEqual(cts, [reference_encrypt(module, key, payload, iv)
+                                           for payload, iv in zip(payloads, ivs)])
+                    self.assertEqual(cbc_decrypt_many(module, key, list(zip(ivs, cts))), payloads)
+
+    def test_empty_batches(self):
+        self.assertEqual(cbc_encrypt_many(AES, AES_KEY, [], []), [])
+        self.assertEqual(cbc_decrypt_many(AES, AES_KEY, []), [])
+        self.assertEqual(cbc_decrypt_many(AES, AES_KEY, [(NIST_IV, b'')]), [b''])
+
+    def test_strip_pkcs7(self):
+        self.assertEqual(strip_pkcs7(b"abc" + bytes([13]) * 13, 16), b"abc")
+        self.assertEqual(strip_pkcs7(bytes([16]) * 16, 16), b"")
+        for bad in (b"", b"abc\x00", b"abc\x11", b"ab\x01\x03\x03"):
+            with self.subTest(data=bad):
+                with self.assertRaises(ValueError):
+                    strip_pkcs7(bad, 16)
+
+
+class TextMessageTests(unittest.TestCase):
+
+    MESSAGES = ["", "a", "attack at dawn", "é" * 40, "x" * 15, "x" * 16,
+                "long " * 100, "ünïcödé " * 30, "y" * (LANE_MAX_BLOCKS * 16)]
+
+    def test_batched_and_single_paths_interoperate(self):
+        for cls, key in ((AESCipher, AES_KEY), (DESCipher, DES_KEY)):
+            with self.subTest(cipher=cls.__name__):
+                cipher = cls(key)
+                batched = cipher.encrypt_many(self.MESSAGES)
+                self.assertEqual([cipher.decrypt(ct) for ct in batched], self.MESSAGES)
+                single = [cipher.encrypt(message) for message in self.MESSAGES]
+                self.assertEqual(cipher.decrypt_many(single), self.MESSAGES)
+
+    def test_bad_messages_do_not_stop_the_batch(self):
+        cipher = AESCipher(AES_KEY)
+        good = cipher.encrypt("fine")
+        iv, _ = good.split(':')
+        results = cipher.decrypt_many([good, "no separator", iv + ":AAAA", good])
+        self.assertEqual(results[0], "fine")
+        self.assertEqual(results[3], "fine")
+        self.assertTrue(results[1].startswith("Decryption failed"))
+        self.assertTrue(results[2].startswith("Decryption failed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
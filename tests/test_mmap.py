@@ -0,0 +1,67 @@
+"""
+Memory-Mapped File Tests
+Round trips and error paths of AESCipher/DESCipher *_file_mmap
+"""
+
+import os
+import unittest
+
+from ciphers.aes_cipher import AESCipher
+from ciphers.des_cipher import DESCipher
+from tests.helpers import AES_KEY, DES_KEY, TempDirTestCase
+
+CIPHERS = ((AESCipher, AES_KEY, 16), (DESCipher, DES_KEY, 8))
+
+
+class MmapFileTests(TempDirTestCase):
+
+    def test_round_trip(self):
+        for cls, key, block_size in CIPHERS:
+            for size in (0, 1, block_size, 3 * block_size + 5, 100000):
+                with self.subTest(cipher=cls.__name__, size=size):
+                    data = os.urandom(size)
+                    source = self.write("plain", data)
+                    cipher = cls(key)
+                    cipher.encrypt_file_mmap(source, self.path("enc"))
+                    self.assertEqual(cipher.decrypt_file(self.read("enc")), data)
+                    cipher.decrypt_file_mmap(self.path("enc"), self.path("dec"))
+                    self.assertEqual(self.read("dec"), data)
+
+    def test_unmappable_output(self):
+        # A device cannot be memory-mapped, so the output is ciphered in memory and written to it
+        for cls, key, block_size in CIPHERS:
+            with self.subTest(cipher=cls.__name__):
+                cipher = cls(key)
+                source = self.write("plain", b"x" * 100)
+                size = 100 + block_size - 100 % block_size
+                self.assertEqual(cipher.encrypt_file_mmap(source, os.devnull), (100, block_size + size))
+                encrypted = self.write("enc", cipher.encrypt_file(b"x" * 100))
+                self.assertEqual(cipher.decrypt_file_mmap(encrypted, os.devnull), (block_size + size, 100))
+
+    def test_bad_ciphertext_raises_value_error(self):
+        # Misaligned input and wrong-key padding errors must not turn into
+        # "BufferError: cannot close exported pointers exist"
+        for cls, key, block_size in CIPHERS:
+            for size in (2 * block_size + 1, 2 * block_size + block_size // 2, 3 * block_size):
+                with self.subTest(cipher=cls.__name__, size=size):
+                    source = self.write("bad", os.urandom(size))
+                    with self.assertRaises(ValueError):
+                        cls(key).decrypt_file_mmap(source, self.path("out"))
+                    self.assertEqual(os.listdir(self.dir), ["bad"])
+
+    def test_wrong_key_raises_value_error(self):
+        for cls, key, block_size in CIPHERS:
+            with self.subTest(cipher=cls.__name__):
+                source = self.write("plain", b"attack at dawn" * 10)
+                cls(key).encrypt_file_mmap(source, self.path("enc"))
+                # Bit 0 of every DES key byte is parity, so flip a key bit instead
+                wrong = cls(bytes(b ^ 0x10 for b in key))
+                with self.assertRaises(ValueError):
+                    # Wrong keys fail the padding check in all but ~1/256 of cases
+                    for _ in range(3):
+                        cls(key).encrypt_file_mmap(source, self.path("enc"))
+                        wrong.decrypt_file_mmap(self.path("enc"), self.path("dec"))
+
+
+if __name__ == "__main__":
+    unittest.main()
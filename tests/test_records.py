@@ -0,0 +1,107 @@
+"""
+Record Format Tests
+Round trips, legacy "iv:ct" input and malformed framing of the binary record API
+"""
+
+import struct
+import unittest
+
+from Crypto.Cipher import AES, DES
+
+from ciphers.aes_cipher import AESCipher
+from ciphers.des_cipher import DESCipher
+from ciphers.records import (GCM_NONCE_SIZE, GCM_TAG_SIZE, RECORD_HEADER, RECORD_VERSION, Record,
+                             iter_records, pack_record)
+from tests.helpers import AES_KEY, DES_KEY
+
+MESSAGES = ["", "a", "exactly 16 bytes", "Grüße aus Köln " * 20, "x" * 1000]
+
+
+class RecordRoundTripTests(unittest.TestCase):
+
+    def test_round_trips(self):
+        for cipher, mode in ((AESCipher(AES_KEY), 'CBC'), (AESCipher(AES_KEY), 'GCM'),
+                             (DESCipher(DES_KEY), 'CBC')):
+            with self.subTest(cipher=type(cipher).__name__, mode=mode):
+                data = cipher.encrypt_records(MESSAGES, mode)
+                records = list(iter_records(data))
+                self.assertEqual([record.mode for record in records], [mode] * len(MESSAGES))
+                self.assertEqual(cipher.decrypt_records(data), MESSAGES)
+                # A list of individually framed records decrypts the same
+                self.assertEqual(cipher.decrypt_records([pack_record(r) for r in records]), MESSAGES)
+                self.assertEqual(cipher.decrypt_records(records), MESSAGES)
+
+    def test_gcm_framing(self):
+        data = AESCipher(AES_KEY).encrypt_records(["hello"], 'GCM')
+        (record,) = iter_records(data)
+        self.assertEqual((len(record.iv), len(record.tag), len(record.ciphertext)),
+                         (GCM_NONCE_SIZE, GCM_TAG_SIZE, 5))
+        self.assertEqual(len(data), RECORD_HEADER.size + GCM_NONCE_SIZE + 5 + GCM_TAG_SIZE)
+
+    def test_des_rejects_gcm(self):
+        des = DESCipher(DES_KEY)
+        with self.assertRaisesRegex(ValueError, "128-bit"):
+            des.encrypt_records(["hello"], 'GCM')
+        record = Record('GCM', bytes(GCM_NONCE_SIZE), b"hello", bytes(GCM_TAG_SIZE))
+        with self.assertRaisesRegex(ValueError, "128-bit"):
+            des.decrypt_records([pack_record(record)])
+
+    def test_mixed_legacy_and_framed(self):
+        for cipher, module in ((AESCipher(AES_KEY), AES), (DESCipher(DES_KEY), DES)):
+            with self.subTest(module=module.__name__):
+                legacy = [cipher.encrypt(message) for message in MESSAGES]
+                framed = cipher.encrypt_records(MESSAGES)
+                mixed = [legacy[0], framed, legacy[1].encode('ascii'), legacy[3]]
+                expected = [MESSAGES[0], *MESSAGES, MESSAGES[1], MESSAGES[3]]
+                self.assertEqual(cipher.decrypt_records(mixed), expected)
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "Unsupported record mode"):
+            AESCipher(AES_KEY).encrypt_records(["hello"], 'ECB')
+
+
+class MalformedRecordTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cipher = AESCipher(AES_KEY)
+        self.data = self.cipher.encrypt_records(["first", "second"], 'GCM')
+
+    def assertRejected(self, data, message):
+        with self.assertRaisesRegex(ValueError, message):
+            self.cipher.decrypt_records(data)
+
+    def test_truncated_header(self):
+        first = len(pack_record(next(iter_records(self.data))))
+        for cut in (1, RECORD_HEADER.size - 1):
+            with self.subTest(cut=cut):
+                self.assertRejected(self.data[:first + cut], "Truncated record header")
+
+    def test_truncated_body(self):
+        for cut in (1, GCM_TAG_SIZE, GCM_TAG_SIZE + 3):
+            with self.subTest(cut=cut):
+                self.assertRejected(self.data[:-cut], "Truncated record")
+
+    def test_unknown_version_and_mode(self):
+        header = RECORD_HEADER.unpack_from(self.data)
+        for field, value, message in ((0, RECORD_VERSION + 1, "Unsupported record version"),
+                                      (1, 99, "Unknown record mode")):
+            with self.subTest(message):
+                fields = list(header)
+                fields[field] = value
+                self.assertRejected(RECORD_HEADER.pack(*fields) + self.data[RECORD_HEADER.size:],
+                                    message)
+
+    def test_tampered_gcm_record(self):
+        tampered = bytearray(self.data)
+        tampered[RECORD_HEADER.size + GCM_NONCE_SIZE] ^= 1
+        self.assertRejected(bytes(tampered), "Record 0 failed authentication")
+
+    def test_bad_cbc_lengths(self):
+        record = Record('CBC', bytes(AES.block_size), b"not a block", b'')
+        self.assertRejected(pack_record(record), "Record 0")
+        header = struct.pack('>BBBBI', RECORD_VERSION, 1, 3, 0, 0) + b"abc"
+        self.assertRejected(header, "Record 0")
+
+
+if __name__ == "__main__":
+    unittest.main()
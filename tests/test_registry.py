@@ -0,0 +1,75 @@
+"""
+Cipher Registry Tests
+Handlers, factories and capabilities declared for every registered cipher
+"""
+
+import contextlib
+import io
+import unittest
+
+import main
+from ciphers import registry
+from ciphers.registry import CipherInfo, available_ciphers
+from tests.helpers import EXAMPLES_DIR, TempDirTestCase
+
+SETTINGS_FILES = {
+    "aes": {"key_file": EXAMPLES_DIR / "aes_key.txt"},
+    "des": {"key_file": EXAMPLES_DIR / "des_key.txt"},
+    "playfair": {"table_file": EXAMPLES_DIR / "playfair_table.txt"},
+    "vigenere": {"key_file": EXAMPLES_DIR / "vigenere_key.txt",
+                 "table_file": EXAMPLES_DIR / "vigenere_table.txt"},
+}
+
+
+class RegistryTests(unittest.TestCase):
+
+    def test_every_cipher_resolves(self):
+        for info in available_ciphers():
+            with self.subTest(cipher=info.name):
+                self.assertTrue(callable(info.load_file_handler()))
+                self.assertEqual(info.load_stream_handler() is not None, info.streaming)
+
+                settings, _ = main.load_settings(info.name, **SETTINGS_FILES[info.name])
+                cipher = info.create(*settings)
+                self.assertIsInstance(cipher, info.load())
+                message = "ATTACK AT DAWN"
+                self.assertIn(cipher.decrypt(cipher.encrypt(message)).rstrip("X"),
+                              (message, message.replace(" ", "")))
+
+    def test_streaming_cipher_needs_a_stream_handler(self):
+        with self.assertRaises(ValueError):
+            CipherInfo("broken", "Broken", "ciphers.des_cipher", "DESCipher", {"binary", "streaming"},
+                       "ciphers.handlers:des_file")
+
+
+class FileOnlyCipherTests(TempDirTestCase):
+    """A cipher registered without the streaming capability is run through its file handler"""
+
+    def setUp(self):
+        super().setUp()
+        registry.register(CipherInfo(
+            "des-files", "DES without streaming", "ciphers.des_cipher", "DESCipher",
+            {"binary"}, "ciphers.handlers:des_file", key_sizes=(8,), modes=("CBC",)))
+        self.addCleanup(registry._REGISTRY.pop, "des-files")
+
+    def run_main(self, *argv):
+        with contextlib.redirect_stderr(io.StringIO()):
+            return main.main(list(argv))
+
+    def test_files_are_required_and_processed(self):
+        key = str(SETTINGS_FILES["des"]["key_file"])
+        source = self.write("plain", b"no pipes here")
+        with self.assertRaises(SystemExit):
+            self.run_main("des-files", "-e", "-k", key)
+
+        self.assertEqual(self.run_main("des-files", "-e", "-k", key, "-i", source,
+                                       "-o", self.path("enc")), main.EXIT_OK)
+        self.assertEqual(self.run_main("des", "-d", "-k", key, "-i", self.path("enc"),
+                                       "-o", self.path("dec")), main.EXIT_OK)
+        self.assertEqual(self.read("dec"), b"no pipes here")
+        self.assertEqual(self.run_main("des-files", "-e", "-k", key, "-i", self.path("missing"),
+                                       "-o", self.path("out")), main.EXIT_USAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Segmented AES File Tests
+Round trips, byte counts and tamper detection of the parallel CTR/GCM file format
+"""
+
+import io
+import os
+import unittest
+
+from ciphers.aes_cipher import SEGMENT_HEADER, AESCipher
+from tests.helpers import AES_KEY
+
+SEGMENT = 64  # small segments so a few hundred bytes span many of them
+
+
+def encrypt(data, mode, segment_size=SEGMENT):
+    dst = io.BytesIO()
+    read, written = AESCipher(AES_KEY).encrypt_fileobj_parallel(io.BytesIO(data), dst, mode,
+                                                                segment_size=segment_size)
+    return dst.getvalue(), read, written
+
+
+def decrypt(blob, mode):
+    dst = io.BytesIO()
+    read, written = AESCipher(AES_KEY).decrypt_fileobj_parallel(io.BytesIO(blob), dst, mode)
+    return dst.getvalue(), read, written
+
+
+class SegmentedFileTests(unittest.TestCase):
+
+    def test_round_trip_and_byte_counts(self):
+        for mode in ("CTR", "GCM"):
+            for size in (0, 1, SEGMENT - 1, SEGMENT, 5 * SEGMENT + 7):
+                with self.subTest(mode=mode, size=size):
+                    data = os.urandom(size)
+                    blob, read, written = encrypt(data, mode)
+                    self.assertEqual((read, written), (size, len(blob)))
+
+                    plain, read, written = decrypt(blob, mode)
+                    self.assertEqual(plain, data)
+                    # Every stored byte is counted, sequence numbers included
+                    self.assertEqual((read, written), (len(blob), size))
+
+    def test_gcm_rejects_tampering(self):
+        data = os.urandom(4 * SEGMENT)
+        blob, _, _ = encrypt(data, "GCM")
+        header = SEGMENT_HEADER.size
+        stored = (len(blob) - header) // 4
+
+        flipped = bytearray(blob)
+        flipped[header + stored + 10] ^= 1
+        segments = [blob[header + i * stored:header + (i + 1) * stored] for i in range(4)]
+        swapped = blob[:header] + segments[1] + segments[0] + b''.join(segments[2:])
+        dropped_last = blob[:header + 3 * stored]
+        truncated = blob[:-1]
+
+        for name, bad in (("flipped", bytes(flipped)), ("swapped", swapped),
+                          ("dropped last segment", dropped_last), ("truncated", truncated)):
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    decrypt(bad, "GCM")
+
+    def test_random_access(self):
+        data = os.urandom(10 * SEGMENT + 3)
+        cipher = AESCipher(AES_KEY)
+        for mode in ("CTR", "GCM"):
+            with self.subTest(mode=mode):
+                blob = io.BytesIO(encrypt(data, mode)[0])
+                self.assertEqual(cipher.segment_info(blob, mode), (mode, SEGMENT, 11))
+                self.assertEqual(cipher.read_segment(blob, 3, mode), data[3 * SEGMENT:4 * SEGMENT])
+                for offset, length in ((0, 5), (60, 10), (5 * SEGMENT - 1, 2 * SEGMENT + 2),
+                                       (len(data) - 2, 100)):
+                    self.assertEqual(cipher.decrypt_range(blob, offset, length, mode),
+                                     data[offset:offset + length])
+                self.assertEqual(cipher.open_decrypted(blob, mode).read(), data)
+
+    def test_mode_must_match_header(self):
+        data = os.urandom(3 * SEGMENT)
+        cipher = AESCipher(AES_KEY)
+        gcm, _, _ = encrypt(data, "GCM")
+        ctr, _, _ = encrypt(data, "CTR")
+        # The header's mode byte sits right after the magic and version
+        downgraded = gcm[:5] + bytes([1]) + gcm[6:]
+
+        for blob, mode in ((gcm, "CTR"), (ctr, "GCM"), (downgraded, "GCM")):
+            with self.subTest(expected=mode, header=blob[5]):
+                with self.assertRaises(ValueError):
+                    decrypt(blob, mode)
+                with self.assertRaises(ValueError):
+                    cipher.decrypt_range(io.BytesIO(blob), 0, 10, mode)
+                with self.assertRaises(ValueError):
+                    cipher.read_segment(io.BytesIO(blob), 0, mode)
+
+        # CTR is never assumed: readers default to GCM
+        with self.assertRaises(ValueError):
+            AESCipher(AES_KEY).decrypt_fileobj_parallel(io.BytesIO(ctr), io.BytesIO())
+        with self.assertRaises(ValueError):
+            cipher.open_decrypted(io.BytesIO(downgraded))
+        with self.assertRaises(ValueError):
+            decrypt(gcm, "CBC")
+
+    def test_cbc_random_access(self):
+        data = os.urandom(1000)
+        cipher = AESCipher(AES_KEY)
+        blob = io.BytesIO(cipher.encrypt_file(data))
+        self.assertEqual(cipher.decrypt_range(blob, 100, 300, "CBC"), data[100:400])
+        self.assertEqual(cipher.open_decrypted(blob, "CBC").read(), data)
+
+
+if __name__ == "__main__":
+    unittest.main()